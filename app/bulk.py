@@ -0,0 +1,141 @@
+import os
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# Default ukuran batch executemany, bisa di-override lewat env
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "5000"))
+
+# Batas jumlah parameter per IN (...) supaya aman untuk limit variabel SQLite
+IN_CLAUSE_CHUNK = 900
+
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    """
+    Potong iterable menjadi list berukuran maksimal `size`.
+    """
+    it = iter(items)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_insert(
+    db: Session,
+    model,
+    rows: Iterable[dict],
+    batch_size: int = BULK_BATCH_SIZE,
+    returning: bool = False,
+) -> Optional[List[int]]:
+    """
+    INSERT set-based lewat Core `insert()` + executemany, tanpa membuat objek
+    ORM (tidak ada identity map / unit-of-work).
+
+    Semua dict di `rows` harus punya key yang sama. Default kolom (mis.
+    created_at) tetap diisi oleh SQLAlchemy. Kalau `returning=True`, kembalikan
+    list primary key sesuai urutan `rows`.
+    """
+    table = model.__table__
+    stmt = insert(table)
+    if returning:
+        stmt = stmt.returning(table.c.id, sort_by_parameter_order=True)
+
+    ids: List[int] = []
+    for batch in chunked(rows, batch_size):
+        result = db.execute(stmt, batch)
+        if returning:
+            ids.extend(result.scalars().all())
+
+    return ids if returning else None
+
+
+class BulkWriter:
+    """
+    Buffer untuk sumber streaming: kumpulkan row lalu tulis via bulk_insert
+    setiap `batch_size` row. Panggil flush() di akhir.
+    """
+
+    def __init__(self, db: Session, model, batch_size: int = BULK_BATCH_SIZE):
+        self.db = db
+        self.model = model
+        self.batch_size = batch_size
+        self.count = 0
+        self._buffer: List[dict] = []
+
+    def add(self, row: dict) -> None:
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, rows: Sequence[dict]) -> None:
+        for row in rows:
+            self.add(row)
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        bulk_insert(self.db, self.model, self._buffer, batch_size=self.batch_size)
+        self.count += len(self._buffer)
+        self._buffer = []
+
+
+def dialect_insert(db: Session, model):
+    """
+    `insert()` khusus dialect yang punya on_conflict_do_update /
+    on_conflict_do_nothing (SQLite & PostgreSQL), untuk upsert atomik.
+    """
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        return postgresql.insert(model.__table__)
+    if name == "sqlite":
+        return sqlite.insert(model.__table__)
+    raise NotImplementedError(f"Upsert not supported for dialect {name}")
+
+
+def executemany_compiled(db: Session, stmt, rows: Sequence[dict]) -> None:
+    """
+    executemany `stmt` (yang parameternya nama kolom, mis. insert/upsert
+    tanpa .values()) dengan statement yang di-compile sekali dan parameter
+    langsung ke DBAPI. Melewati construct_params SQLAlchemy per row, yang
+    untuk puluhan ribu row upsert lebih mahal dari eksekusinya sendiri.
+    """
+    if not rows:
+        return
+    conn = db.connection()
+    compiled = stmt.compile(dialect=conn.dialect, column_keys=list(rows[0]))
+
+    # bind processor type (mis. DateTime -> string di SQLite) tetap dipakai;
+    # dibuat sekali per type, bukan per bind
+    by_type = {}
+    processors = {}
+    for key, bind in compiled.binds.items():
+        type_ = bind.type
+        if id(type_) not in by_type:
+            by_type[id(type_)] = type_.dialect_impl(conn.dialect).bind_processor(conn.dialect)
+        if by_type[id(type_)] is not None:
+            processors[key] = by_type[id(type_)]
+    if processors:
+        rows = [
+            {**row, **{key: proc(row[key]) for key, proc in processors.items() if key in row}}
+            for row in rows
+        ]
+
+    # parameter di luar kolom row (mis. konstanta di set_ upsert) ikut nilai
+    # yang sudah ada di statement
+    keys = compiled.positiontup if compiled.positional else list(compiled.binds)
+    static = {
+        key: (processors[key](value) if key in processors else value)
+        for key, value in compiled.construct_params(params=rows[0]).items()
+        if key in keys and key not in rows[0]
+    }
+    if compiled.positional:
+        params = [tuple(row[key] if key in row else static[key] for key in keys) for row in rows]
+    else:
+        params = [{**static, **row} for row in rows] if static else list(rows)
+    conn.exec_driver_sql(str(compiled), params)
+
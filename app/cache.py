@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache in-process yang dibatasi jumlah entry (LRU) dan umur entry (TTL).
+    Thread-safe, karena route sync FastAPI jalan di threadpool.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.pop(key, None)
+            return item[1] if item else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# ==== INVALIDATION SETELAH COMMIT ==== #
+#
+# Write path mendaftarkan key cache yang terpengaruh ke session; key baru
+# dibuang SETELAH transaksi commit. Kalau dibuang sebelum commit, reader lain
+# bisa mengisi ulang cache dengan data lama. Kalau rollback, tidak ada yang
+# perlu dibuang.
+
+_PENDING_KEY = "_pending_cache_invalidations"
+_PENDING_SET_KEY = "_pending_cache_sets"
+
+
+def invalidate_on_commit(db: Session, cache: TTLCache, key: Hashable) -> None:
+    db.info.setdefault(_PENDING_KEY, []).append((cache, key))
+
+
+def set_on_commit(db: Session, cache: TTLCache, key: Hashable, value: Any) -> None:
+    """
+    Kebalikan invalidate_on_commit: isi cache hanya kalau row yang
+    bersangkutan benar-benar ter-commit (mis. id yang baru di-insert).
+    """
+    db.info.setdefault(_PENDING_SET_KEY, []).append((cache, key, value))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for cache, key in session.info.pop(_PENDING_KEY, []):
+        cache.pop(key)
+    for cache, key, value in session.info.pop(_PENDING_SET_KEY, []):
+        cache.set(key, value)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_PENDING_SET_KEY, None)
@@ -0,0 +1,203 @@
+"""
+Clustering failure satu run berdasarkan signature stack trace.
+
+1. Setiap failure message dinormalisasi menjadi signature: angka, alamat
+   memory, timestamp, UUID, dan path diganti placeholder.
+2. Message dengan signature yang sama persis digabung.
+3. Signature yang mirip (near-duplicate, mis. beda nama variabel di satu
+   baris) digabung lewat MinHash + LSH (numpy) atas shingle token.
+
+Karena message sudah content-addressed (app/messages.py), yang di-cluster
+adalah message unik di run itu (dengan bobot jumlah result), bukan setiap
+result.
+"""
+import re
+import zlib
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from . import models
+from .bulk import bulk_insert
+
+# Hanya awal trace yang dipakai untuk signature
+MAX_SIGNATURE_CHARS = 4000
+
+NUM_PERM = 64
+LSH_BANDS = 16  # NUM_PERM / LSH_BANDS = 4 row per band
+SIMILARITY_THRESHOLD = 0.7
+SHINGLE_SIZE = 3
+
+# Maks. elemen matrix (token x permutasi) per langkah, membatasi memory
+_MINHASH_BLOCK = 4_000_000
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM).astype(np.uint64)
+
+_NORMALIZERS = [
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?"), "<ts>"),
+    (re.compile(r"\b\d{1,2}:\d{2}:\d{2}(?:[.,]\d+)?\b"), "<ts>"),
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<uuid>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "<addr>"),
+    (re.compile(r"(?:\b[A-Za-z]:)?(?:[\\/][\w.\-]+){2,}[\\/]?"), "<path>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<n>"),  # termasuk angka di identifier (user_42)
+    (re.compile(r"[ \t]+"), " "),
+]
+
+_TOKEN = re.compile(r"<\w+>|\w+|[^\w\s]")
+
+
+def failure_signature(message: str) -> str:
+    text = message[:MAX_SIGNATURE_CHARS]
+    for pattern, placeholder in _NORMALIZERS:
+        text = pattern.sub(placeholder, text)
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+
+def _shingle_hashes(signature: str) -> np.ndarray:
+    tokens = _TOKEN.findall(signature)
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = [" ".join(tokens)]
+    else:
+        shingles = [" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+    return np.unique(np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64))
+
+
+def minhash_signatures(signatures: List[str]) -> np.ndarray:
+    """
+    Matrix MinHash [len(signatures), NUM_PERM]. Semua shingle di-hash sekali
+    lalu diproses per blok token dengan minimum.reduceat per signature.
+    """
+    hashes = [_shingle_hashes(sig) for sig in signatures]
+    result = np.empty((len(signatures), NUM_PERM), dtype=np.uint64)
+
+    rows_per_block = max(1, _MINHASH_BLOCK // NUM_PERM)
+    start = 0
+    while start < len(hashes):
+        # kumpulkan signature sampai blok penuh (minimal satu)
+        end, tokens = start, 0
+        while end < len(hashes) and (end == start or tokens + len(hashes[end]) <= rows_per_block):
+            tokens += len(hashes[end])
+            end += 1
+
+        block = np.concatenate(hashes[start:end])
+        offsets = np.cumsum([0] + [len(h) for h in hashes[start:end - 1]])
+        permuted = (block[:, None] * _PERM_A + _PERM_B) % _MERSENNE_PRIME
+        result[start:end] = np.minimum.reduceat(permuted, offsets, axis=0)
+        start = end
+    return result
+
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def merge_similar(minhashes: np.ndarray) -> List[int]:
+    """
+    LSH: signature yang sama di minimal satu band menjadi kandidat; kandidat
+    digabung (union-find) kalau estimasi Jaccard >= SIMILARITY_THRESHOLD.
+    Return root cluster untuk setiap baris.
+    """
+    n = len(minhashes)
+    parent = list(range(n))
+    rows = NUM_PERM // LSH_BANDS
+
+    for band in range(LSH_BANDS):
+        keys = np.ascontiguousarray(minhashes[:, band * rows:(band + 1) * rows]).view(f"V{rows * 8}").ravel()
+        buckets: Dict[bytes, int] = {}
+        for i, key in enumerate(keys.tolist()):
+            first = buckets.setdefault(key, i)
+            if first == i:
+                continue
+            a, b = _find(parent, first), _find(parent, i)
+            if a != b and np.mean(minhashes[a] == minhashes[b]) >= SIMILARITY_THRESHOLD:
+                parent[b] = a
+    return [_find(parent, i) for i in range(n)]
+
+
+def cluster_failures(failures: Dict[int, Tuple[str, int]]) -> List[dict]:
+    """
+    `failures`: {message_id: (teks message, jumlah result failed di run)}.
+    Return cluster terurut dari yang terbesar:
+    [{"signature", "count", "signatures", "message_ids", "example_message_id"}].
+    """
+    if not failures:
+        return []
+
+    # 1. exact signature
+    groups: Dict[str, dict] = {}
+    for message_id, (text, count) in failures.items():
+        sig = failure_signature(text)
+        group = groups.setdefault(sig, {"count": 0, "message_ids": [], "top": (0, message_id)})
+        group["count"] += count
+        group["message_ids"].append(message_id)
+        group["top"] = max(group["top"], (count, message_id))
+
+    sigs = list(groups)
+    roots = merge_similar(minhash_signatures(sigs)) if len(sigs) > 1 else [0]
+
+    # 2. near-duplicate
+    clusters: Dict[int, dict] = {}
+    for sig, root in zip(sigs, roots):
+        group = groups[sig]
+        cluster = clusters.setdefault(root, {"count": 0, "signatures": 0, "message_ids": [], "best": None})
+        cluster["count"] += group["count"]
+        cluster["signatures"] += 1
+        cluster["message_ids"].extend(group["message_ids"])
+        if cluster["best"] is None or group["count"] > cluster["best"][0]:
+            cluster["best"] = (group["count"], sig, group["top"][1])
+
+    result = [
+        {
+            "signature": c["best"][1],
+            "count": c["count"],
+            "signatures": c["signatures"],
+            "message_ids": c["message_ids"],
+            "example_message_id": c["best"][2],
+        }
+        for c in clusters.values()
+    ]
+    result.sort(key=lambda c: c["count"], reverse=True)
+    return result
+
+
+def record_clusters(db: Session, run_id: int, failures: Dict[int, Tuple[str, int]]) -> int:
+    """
+    Simpan cluster failure sebuah run (panggil sebelum commit). Return
+    jumlah cluster.
+    """
+    clusters = cluster_failures(failures)
+    if not clusters:
+        return 0
+
+    ids = bulk_insert(
+        db,
+        models.FailureCluster,
+        (
+            {
+                "test_run_id": run_id,
+                "signature": c["signature"],
+                "count": c["count"],
+                "signatures": c["signatures"],
+                "example_message_id": c["example_message_id"],
+            }
+            for c in clusters
+        ),
+        returning=True,
+    )
+    bulk_insert(
+        db,
+        models.FailureClusterMessage,
+        (
+            {"cluster_id": cluster_id, "message_id": message_id}
+            for cluster_id, c in zip(ids, clusters)
+            for message_id in c["message_ids"]
+        ),
+    )
+    return len(clusters)
@@ -1,26 +1,173 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import logging
 import os
 
-# Gunakan path absolut supaya tidak nyasar ke folder lain
-DATABASE_URL = "sqlite:///G:/dashboard-qa/qops.db"
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, declarative_base
+
+logger = logging.getLogger(__name__)
+
+# Default tetap path absolut lama supaya tidak nyasar ke folder lain;
+# override lewat env DATABASE_URL.
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///G:/dashboard-qa/qops.db")
+
+# Optional: URL terpisah untuk read path (mis. read replica Postgres)
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL") or DATABASE_URL
+
+
+# ==== ENGINE PROFILES ==== #
+#
+# DB_PROFILE memilih set default; setiap key bisa di-override satu per satu
+# lewat env DB_<KEY> (mis. DB_ECHO=1, DB_WRITE_POOL_SIZE=2).
+
+PROFILES = {
+    "default": {
+        "echo": False,
+        "write_pool_size": 5,
+        "read_pool_size": 10,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+        "sqlite_busy_timeout_ms": 5000,
+        "sqlite_cache_size_kb": 64 * 1024,
+        "sqlite_mmap_size": 256 * 1024 * 1024,
+    },
+    "dev": {
+        "echo": True,  # log semua SQL, untuk debug
+        "write_pool_size": 2,
+        "read_pool_size": 4,
+        "max_overflow": 4,
+        "pool_timeout": 30,
+        "sqlite_busy_timeout_ms": 5000,
+        "sqlite_cache_size_kb": 16 * 1024,
+        "sqlite_mmap_size": 0,
+    },
+}
+
+DB_PROFILE = os.getenv("DB_PROFILE", "default")
+if DB_PROFILE not in PROFILES:
+    raise ValueError(f"Unknown DB_PROFILE {DB_PROFILE!r}; expected one of {sorted(PROFILES)}")
+
+
+def _setting(name: str):
+    default = PROFILES[DB_PROFILE][name]
+    raw = os.getenv(f"DB_{name.upper()}")
+    if raw is None:
+        return default
+    if isinstance(default, bool):
+        return raw.lower() in ("1", "true", "yes", "on")
+    return type(default)(raw)
+
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def sqlite_pragmas(read_only: bool = False) -> list:
+    """
+    PRAGMA per koneksi SQLite.
+
+    WAL membuat reader tidak pernah menunggu writer (dan sebaliknya), jadi
+    dashboard tetap jalan selama ingest commit. synchronous=NORMAL aman di
+    mode WAL (hanya transaksi terakhir yang bisa hilang saat power loss).
+    """
+    pragmas = [
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),
+        ("busy_timeout", _setting("sqlite_busy_timeout_ms")),
+        ("cache_size", -_setting("sqlite_cache_size_kb")),  # negatif = KiB
+        ("mmap_size", _setting("sqlite_mmap_size")),
+    ]
+    if read_only:
+        pragmas.append(("query_only", "ON"))
+    return pragmas
+
+
+def _apply_sqlite_pragmas(engine: Engine, read_only: bool = False) -> None:
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+# ==== WRITER (sync) ==== #
+# Dipakai route POST/PUT/DELETE, ingest, dan migration.
+
+def _engine_kwargs(url: str, pool_size: int) -> dict:
+    kwargs = {"echo": _setting("echo")}
+    if make_url(url).database not in (None, "", ":memory:"):
+        kwargs.update(
+            pool_size=pool_size,
+            max_overflow=_setting("max_overflow"),
+            pool_timeout=_setting("pool_timeout"),
+            pool_pre_ping=not _is_sqlite(url),
+        )
+    return kwargs
+
 
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False},  # wajib untuk SQLite + FastAPI
-    echo=True,  # sementara untuk debug SQL, nanti bisa dimatikan
+    connect_args={"check_same_thread": False} if _is_sqlite(DATABASE_URL) else {},  # wajib untuk SQLite + FastAPI
+    **_engine_kwargs(DATABASE_URL, _setting("write_pool_size")),
 )
+if _is_sqlite(DATABASE_URL):
+    _apply_sqlite_pragmas(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+# ==== READER (async, read-only) ==== #
+# Semua route GET lewat pool ini. Di SQLite koneksinya query_only, jadi
+# tidak pernah memegang write lock dan tidak antre di belakang ingest.
+
+# Driver async default per backend; bisa di-override penuh lewat ASYNC_DATABASE_URL.
+# Hanya backend yang punya upsert di bulk.dialect_insert (ingest tidak jalan
+# di backend lain).
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.get_backend_name()}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_READ_URL)
+
+
+def _read_connect_args(url: str) -> dict:
+    if make_url(url).drivername == "postgresql+asyncpg":
+        return {"server_settings": {"default_transaction_read_only": "on"}}
+    return {}
+
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    connect_args=_read_connect_args(ASYNC_DATABASE_URL),
+    **_engine_kwargs(ASYNC_DATABASE_URL, _setting("read_pool_size")),
+)
+if _is_sqlite(ASYNC_DATABASE_URL):
+    _apply_sqlite_pragmas(async_engine.sync_engine, read_only=True)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
-print("FULL DB PATH:", os.path.abspath("G:/dashboard-qa/qops.db"))
+logger.info("database: %s (profile=%s)", engine.url.render_as_string(hide_password=True), DB_PROFILE)
 
 
 def get_db():
     """
-    Dependency untuk mendapatkan session DB per-request.
+    Dependency untuk mendapatkan session DB per-request (writer pool).
     Commit/rollback DIURUS di dalam route, bukan di sini.
     """
     db = SessionLocal()
@@ -28,3 +175,13 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Versi async + read-only dari get_db untuk route GET, supaya request
+    tidak memakan slot threadpool Starlette saat menunggu DB dan tidak
+    pernah menunggu commit ingest.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
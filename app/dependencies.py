@@ -1,15 +1,50 @@
+import hashlib
+import os
+from typing import NamedTuple
+
 from fastapi import Header, HTTPException, Depends
-from sqlalchemy.orm import Session
-from .database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .cache import TTLCache
+from .database import get_async_db
 from .models import APIKey
 
-def require_api_key(x_api_key: str = Header(None), db: Session = Depends(get_db)):
+API_KEY_CACHE_SIZE = int(os.getenv("API_KEY_CACHE_SIZE", "4096"))
+# Revoke hanya meng-invalidate cache worker yang memprosesnya; worker lain
+# tetap menerima key yang dicabut selama maksimal TTL ini.
+API_KEY_CACHE_TTL = float(os.getenv("API_KEY_CACHE_TTL", "30"))
+
+# sha256(key) -> APIKeyIdentity; hanya key yang valid yang di-cache
+api_key_cache = TTLCache(maxsize=API_KEY_CACHE_SIZE, ttl=API_KEY_CACHE_TTL)
+
+
+class APIKeyIdentity(NamedTuple):
+    id: int
+    name: str
+
+
+def hash_api_key(key: str) -> str:
+    """
+    Key adalah token acak 256-bit, jadi sha256 biasa sudah cukup (tidak perlu
+    bcrypt yang sengaja lambat) dan verifikasi tetap murah.
+    """
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+async def require_api_key(x_api_key: str = Header(None), db: AsyncSession = Depends(get_async_db)):
     if x_api_key is None:
         raise HTTPException(status_code=401, detail="Missing API Key")
 
-    rec = db.query(APIKey).filter(APIKey.key == x_api_key).first()
+    key_hash = hash_api_key(x_api_key)
+    identity = api_key_cache.get(key_hash)
+    if identity is not None:
+        return identity
+
+    rec = (await db.scalars(select(APIKey).where(APIKey.key == key_hash))).first()
 
     if not rec:
         raise HTTPException(status_code=403, detail="Invalid API Key")
 
-    return rec
+    identity = APIKeyIdentity(id=rec.id, name=rec.name)
+    api_key_cache.set(key_hash, identity)
+    return identity
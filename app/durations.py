@@ -0,0 +1,204 @@
+"""
+Analitik durasi per test (identity) untuk satu project dalam window waktu.
+
+Ingest menyimpan durasi setiap run sebagai kolom numpy ter-serialize
+(test_run_durations, satu row per run). Window dibaca lewat index test_runs
+(project_id, created_at) lalu kolom-kolom itu disambung dengan frombuffer,
+tanpa satu object Python per result; semua statistik per test dihitung
+sekaligus dengan numpy (sort + reduceat):
+
+- median, p90, mean, total durasi, share dari total waktu suite
+- slope: tren durasi (detik per run) hasil least squares atas urutan run
+- trend_delta: slope x rentang run tempat test itu muncul, yaitu perkiraan
+  kenaikan durasi dari awal ke akhir window
+"""
+import os
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import models
+from .cache import TTLCache
+
+# Kenaikan di bawah ini (detik) dianggap noise / round-off, bukan regresi
+MIN_TREND_DELTA = 0.001
+
+# format kolom test_run_durations
+_ID_DTYPE = np.dtype("<i8")
+_DURATION_DTYPE = np.dtype("<f8")
+
+# (project_id, days, branch, environment) -> DurationStats. Slowest dan
+# regressions memakai hasil yang sama; dashboard yang di-refresh tidak
+# menghitung ulang.
+_stats_cache = TTLCache(
+    maxsize=int(os.getenv("DURATION_CACHE_SIZE", "64")),
+    ttl=float(os.getenv("DURATION_CACHE_TTL", "120")),
+)
+
+
+class DurationStats(NamedTuple):
+    """Array sejajar, satu elemen per test (identity_id terurut)."""
+    identity_id: np.ndarray
+    runs: np.ndarray
+    median: np.ndarray
+    p90: np.ndarray
+    mean: np.ndarray
+    total: np.ndarray
+    share: np.ndarray
+    slope: np.ndarray
+    trend_delta: np.ndarray
+    n_runs: int
+    n_results: int
+
+    @property
+    def total_duration(self) -> float:
+        return float(self.total.sum())
+
+
+def record_run_durations(
+    db: Session,
+    run_id: int,
+    identity_ids: Sequence[int],
+    durations: Sequence[float],
+) -> None:
+    """
+    Simpan kolom durasi satu run (result tanpa durasi tidak ikut). Ingest
+    mengirim array("q") / array("d"); np.asarray membacanya tanpa copy.
+    Panggil sebelum commit.
+    """
+    if not identity_ids:
+        return
+    db.add(models.TestRunDurations(
+        test_run_id=run_id,
+        count=len(identity_ids),
+        identity_ids=np.asarray(identity_ids, dtype=_ID_DTYPE).tobytes(),
+        durations=np.asarray(durations, dtype=_DURATION_DTYPE).tobytes(),
+    ))
+
+
+def durations_stmt(
+    project_id: int,
+    since: datetime,
+    branch: Optional[str] = None,
+    environment: Optional[str] = None,
+) -> Select:
+    """Kolom durasi run project sejak `since`, lewat index test_runs (project_id, created_at)."""
+    Durations, Run = models.TestRunDurations, models.TestRun
+    stmt = (
+        select(Durations.test_run_id, Durations.count, Durations.identity_ids, Durations.durations)
+        .join(Run, Run.id == Durations.test_run_id)
+        .where(Run.project_id == project_id, Run.created_at >= since)
+    )
+    if branch is not None:
+        stmt = stmt.where(Run.branch == branch)
+    if environment is not None:
+        stmt = stmt.where(Run.environment == environment)
+    return stmt
+
+
+async def fetch_durations(
+    db: AsyncSession,
+    project_id: int,
+    since: datetime,
+    branch: Optional[str] = None,
+    environment: Optional[str] = None,
+) -> np.ndarray:
+    """Matrix [n, 3]: identity_id, test_run_id, duration."""
+    rows = (await db.execute(durations_stmt(project_id, since, branch, environment))).all()
+
+    # identity_id <= 53 bit, jadi tetap eksak di float64
+    data = np.empty((sum(row.count for row in rows), 3), dtype=np.float64)
+    start = 0
+    for run_id, count, identity_ids, durations in rows:
+        end = start + count
+        data[start:end, 0] = np.frombuffer(identity_ids, dtype=_ID_DTYPE)
+        data[start:end, 1] = run_id
+        data[start:end, 2] = np.frombuffer(durations, dtype=_DURATION_DTYPE)
+        start = end
+    return data
+
+
+def _group_quantile(values: np.ndarray, starts: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    # values sudah terurut di dalam setiap grup; interpolasi linear seperti np.percentile
+    pos = starts + q * (counts - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.ceil(pos).astype(np.int64)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def analyze(data: np.ndarray) -> DurationStats:
+    identity = data[:, 0].astype(np.int64)
+    duration = data[:, 2]
+
+    # x = urutan run di window (0, 1, ...), lewat lookup table id run (O(n),
+    # tanpa sort)
+    run_offset = data[:, 1].astype(np.int64)
+    if len(run_offset):
+        run_offset -= run_offset.min()
+    present = np.zeros(run_offset.max() + 1 if len(run_offset) else 0, dtype=bool)
+    present[run_offset] = True
+    x = (np.cumsum(present) - 1)[run_offset]
+
+    # urut per test, lalu per durasi (untuk quantile): sort durasi, lalu
+    # stable sort per identity (lebih cepat dari lexsort)
+    order = np.argsort(duration)
+    order = order[np.argsort(identity[order], kind="stable")]
+    identity, duration, x = identity[order], duration[order], x[order].astype(np.float64)
+
+    if len(identity):
+        starts = np.flatnonzero(np.r_[True, identity[1:] != identity[:-1]])
+    else:
+        starts = np.zeros(0, dtype=np.int64)
+    counts = np.diff(np.r_[starts, len(identity)])
+
+    if len(starts):
+        total = np.add.reduceat(duration, starts)
+        sum_x = np.add.reduceat(x, starts)
+        sum_xx = np.add.reduceat(x * x, starts)
+        sum_xy = np.add.reduceat(x * duration, starts)
+        span = np.maximum.reduceat(x, starts) - np.minimum.reduceat(x, starts)
+    else:
+        total = sum_x = sum_xx = sum_xy = span = np.zeros(0)
+
+    denom = counts * sum_xx - sum_x * sum_x
+    slope = np.divide(counts * sum_xy - sum_x * total, denom, out=np.zeros(len(starts)), where=denom > 0)
+    grand_total = total.sum()
+
+    return DurationStats(
+        identity_id=identity[starts],
+        runs=counts,
+        median=_group_quantile(duration, starts, counts, 0.5),
+        p90=_group_quantile(duration, starts, counts, 0.9),
+        mean=np.divide(total, counts, out=np.zeros(len(starts)), where=counts > 0),
+        total=total,
+        share=total / grand_total if grand_total > 0 else np.zeros(len(starts)),
+        slope=slope,
+        trend_delta=slope * span,
+        n_runs=int(present.sum()),
+        n_results=len(identity),
+    )
+
+
+async def project_stats(
+    db: AsyncSession,
+    project_id: int,
+    days: int,
+    branch: Optional[str] = None,
+    environment: Optional[str] = None,
+):
+    """Return (since, DurationStats) untuk `days` hari terakhir, di-cache singkat."""
+    key = (project_id, days, branch, environment)
+    cached = _stats_cache.get(key)
+    if cached is not None:
+        return cached
+
+    since = datetime.utcnow() - timedelta(days=days)
+    data = await fetch_durations(db, project_id, since, branch=branch, environment=environment)
+    result = since, await run_in_threadpool(analyze, data)  # numpy, jangan blok event loop
+    _stats_cache.set(key, result)
+    return result
@@ -0,0 +1,266 @@
+"""
+Export streaming hasil run (CSV / JUnit XML / Parquet) untuk auditor dan
+data warehouse.
+
+Row dibaca lewat server-side cursor (yield_per) di session sendiri, lalu
+setiap partisi langsung ditulis ke sink dan di-yield sebagai bytes. Memory
+konstan berapa pun jumlah row, dan byte pertama (header CSV / deklarasi XML)
+terkirim sebelum query pertama selesai.
+
+Parquet butuh pyarrow (opsional); tanpa pyarrow format itu dijawab 501.
+"""
+import csv
+import io
+import os
+from typing import AsyncIterator, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from lxml import etree
+from sqlalchemy import Boolean, DateTime, Float, Integer, Select, func, select
+
+from . import fastjson, models, schemas
+from .database import AsyncSessionLocal
+from .messages import decode_message
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # opsional, hanya untuk format=parquet
+    pa = pq = None
+
+# format -> (media type, ekstensi file)
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "junit": ("application/xml", "xml"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+FORMAT_PATTERN = f"^({'|'.join(FORMATS)})$"
+
+# Row per round-trip cursor; untuk Parquet juga = ukuran satu row group
+EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", "10000"))
+
+RESULT_COLUMNS = ["test_run_id", "result_id", "identity_id", "classname", "name", "status", "duration", "message"]
+
+
+class _Sink(io.RawIOBase):
+    """
+    File-like write-only yang isinya diambil (drain) setelah setiap partisi.
+    tell() tetap menghitung total byte, karena writer Parquet mencatat offset
+    row group dari situ.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _partitions(stmt: Select) -> AsyncIterator[Sequence]:
+    # session sendiri: generator jalan setelah route (dan session request) selesai
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_YIELD_PER))
+        async for rows in result.partitions():
+            yield rows
+
+
+def _identity(row):
+    return row
+
+
+def streaming_response(body: AsyncIterator[bytes], fmt: str, filename: str) -> StreamingResponse:
+    media_type, ext = FORMATS[fmt]
+    return StreamingResponse(
+        body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}.{ext}"'},
+    )
+
+
+def require_format(fmt: str) -> None:
+    if fmt == "parquet" and pa is None:
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+
+
+# ==== WRITER ==== #
+
+async def stream_csv(stmt: Select, columns: Sequence[str], convert: Callable = _identity) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def drain() -> bytes:
+        data = buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+        return data
+
+    writer.writerow(columns)
+    yield drain()
+    async for rows in _partitions(stmt):
+        writer.writerows(map(convert, rows))
+        yield drain()
+
+
+def _arrow_type(sa_type):
+    if isinstance(sa_type, Boolean):
+        return pa.bool_()
+    if isinstance(sa_type, Integer):  # termasuk BigInteger
+        return pa.int64()
+    if isinstance(sa_type, Float):
+        return pa.float64()
+    if isinstance(sa_type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+async def stream_parquet(stmt: Select, columns: Sequence[str], convert: Callable = _identity) -> AsyncIterator[bytes]:
+    """
+    Satu row group per partisi cursor. Tipe kolom diambil dari kolom select
+    dengan nama yang sama (bukan ditebak dari data), jadi partisi yang isinya
+    NULL semua tetap punya schema yang sama; kolom hasil convert = string.
+    """
+    sa_types = {col.name: col.type for col in stmt.selected_columns}
+    schema = pa.schema([
+        (name, _arrow_type(sa_types[name]) if name in sa_types else pa.string()) for name in columns
+    ])
+
+    sink = _Sink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        yield sink.drain()  # magic bytes "PAR1"
+        async for rows in _partitions(stmt):
+            values = zip(*map(convert, rows))  # kolom-wise
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(values, schema)], schema=schema,
+            ))
+            yield sink.drain()
+    yield sink.drain()  # footer
+
+
+# ==== TEST RUN ==== #
+
+def result_rows_stmt(run_id: int) -> Select:
+    """Result satu run; dua kolom terakhir (id, body message) di-decode oleh _result_row."""
+    Result, Identity, Message = models.TestCaseResult, models.TestIdentity, models.FailureMessage
+    return (
+        select(
+            Result.test_run_id, Result.id.label("result_id"), Result.identity_id, Identity.classname,
+            Identity.name, Result.status, Result.duration,
+            Message.id.label("message_id"), Message.body.label("message_body"),
+        )
+        .join(Identity, Identity.id == Result.identity_id)
+        .outerjoin(Message, Message.id == Result.message_id)
+        .where(Result.test_run_id == run_id)
+        .order_by(Result.id.asc())
+    )
+
+
+def _result_row(row) -> tuple:
+    return tuple(row[:7]) + (decode_message(row[7], row[8]),)
+
+
+_JUNIT_TAGS = {"failed": "failure", "error": "error", "skipped": "skipped"}
+
+
+def _fmt_time(seconds: float) -> str:
+    return f"{seconds:.3f}"
+
+
+async def stream_junit(run: models.TestRun) -> AsyncIterator[bytes]:
+    """
+    Kebalikan dari utils.parse_junit_xml: <testsuites><testsuite> dengan
+    satu <testcase> per result. Message dipecah jadi atribut message (baris
+    pertama) + teks (sisanya), jadi parse ulang menghasilkan message yang sama.
+    """
+    sink = _Sink()
+    with etree.xmlfile(sink, encoding="utf-8") as xf:
+        xf.write_declaration()
+        with xf.element("testsuites", name=run.name):
+            xf.flush()
+            yield sink.drain()
+
+            Result = models.TestCaseResult
+            async with AsyncSessionLocal() as db:
+                counts = {
+                    status: (count, total) for status, count, total in await db.execute(
+                        select(Result.status, func.count(), func.coalesce(func.sum(Result.duration), 0.0))
+                        .where(Result.test_run_id == run.id)
+                        .group_by(Result.status)
+                    )
+                }
+
+            attrs = {
+                "name": run.name,
+                "tests": str(sum(count for count, _ in counts.values())),
+                "failures": str(counts.get("failed", (0, 0))[0]),
+                "errors": str(counts.get("error", (0, 0))[0]),
+                "skipped": str(counts.get("skipped", (0, 0))[0]),
+                "time": _fmt_time(sum(total for _, total in counts.values())),
+            }
+            if run.created_at is not None:
+                attrs["timestamp"] = run.created_at.isoformat()
+
+            with xf.element("testsuite", attrs):
+                async for rows in _partitions(result_rows_stmt(run.id)):
+                    for row in rows:
+                        _, _, _, classname, name, status, duration, message = _result_row(row)
+                        tc = etree.Element("testcase", name=name)
+                        if classname is not None:
+                            tc.set("classname", classname)
+                        if duration is not None:
+                            tc.set("time", _fmt_time(duration))
+                        tag = _JUNIT_TAGS.get(status)
+                        if tag is not None:
+                            child = etree.SubElement(tc, tag)
+                            if message:
+                                summary, _, detail = message.partition("\n")
+                                child.set("message", summary)
+                                child.text = detail or None
+                        xf.write(tc)
+                    xf.flush()
+                    yield sink.drain()
+    yield sink.drain()
+
+
+def export_test_run(run: models.TestRun, fmt: str) -> StreamingResponse:
+    filename = f"test-run-{run.id}"
+    if fmt == "junit":
+        return streaming_response(stream_junit(run), fmt, filename)
+    stmt = result_rows_stmt(run.id)
+    writer = stream_parquet if fmt == "parquet" else stream_csv
+    return streaming_response(writer(stmt, RESULT_COLUMNS, _result_row), fmt, filename)
+
+
+# ==== LOAD RUN ==== #
+
+def export_load_runs(
+    project_id: int,
+    fmt: str,
+    environment: Optional[str] = None,
+    branch: Optional[str] = None,
+) -> StreamingResponse:
+    """Semua load run project (kolom = LoadTestRunBase), terlama dulu."""
+    Run = models.LoadTestRun
+    columns = fastjson.fields(schemas.LoadTestRunBase)
+    stmt = select(*(getattr(Run, name) for name in columns)).where(Run.project_id == project_id)
+    if environment is not None:
+        stmt = stmt.where(Run.environment == environment)
+    if branch is not None:
+        stmt = stmt.where(Run.branch == branch)
+    stmt = stmt.order_by(Run.created_at.asc(), Run.id.asc())
+    writer = stream_parquet if fmt == "parquet" else stream_csv
+    return streaming_response(writer(stmt, columns), fmt, f"load-runs-project-{project_id}")
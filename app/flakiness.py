@@ -0,0 +1,160 @@
+"""
+Flakiness per test (identity) per (project, branch), di-maintain incremental.
+
+State per test: bit window 32 hasil terakhir (bit 0 = run terbaru, 1 =
+failed) + counter total. Setiap ingest hanya menggeser window test yang ada
+di run itu (vektor numpy), tidak pernah membaca ulang history.
+
+- failure_rate: proporsi failed di window
+- flip_rate: proporsi pasangan run berurutan di window yang statusnya berbeda
+- score: sqrt(flip_rate * 2 * min(f, 1 - f)), 0..1. Test yang selalu gagal
+  (f = 1) atau selalu lulus mendapat 0; yang selang-seling mendapat ~1.
+"""
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models
+from .bulk import IN_CLAUSE_CHUNK, chunked, dialect_insert, executemany_compiled
+
+WINDOW_SIZE = 32
+_WINDOW_MASK = (1 << WINDOW_SIZE) - 1
+
+# Di atas jumlah test per run ini, state dibaca sekaligus per branch
+_FULL_FETCH_THRESHOLD = 5 * IN_CLAUSE_CHUNK
+
+# Status result yang dihitung (skipped tidak mengubah state)
+_OUTCOMES = {"passed": False, "failed": True, "error": True}
+
+
+def outcome(status: str) -> Optional[bool]:
+    """True = failed, False = passed, None = tidak dihitung."""
+    return _OUTCOMES.get(status)
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    as_bytes = values.astype(">u4").view(np.uint8).reshape(-1, 4)
+    return np.unpackbits(as_bytes, axis=1).sum(axis=1)
+
+
+def _low_bits(n: np.ndarray) -> np.ndarray:
+    # mask n bit terbawah; n <= WINDOW_SIZE
+    return ((np.uint64(1) << n.astype(np.uint64)) - np.uint64(1)).astype(np.uint64)
+
+
+def window_scores(window: np.ndarray, length: np.ndarray):
+    """
+    Return (failure_rate, flip_rate, score) untuk array window/length.
+    """
+    window = window.astype(np.uint64)
+    length = length.astype(np.int64)
+
+    fails = _popcount(window & _low_bits(length))
+    failure_rate = np.divide(fails, length, out=np.zeros(len(window)), where=length > 0)
+
+    pairs = np.maximum(length - 1, 0)
+    flips = _popcount((window ^ (window >> np.uint64(1))) & _low_bits(pairs))
+    flip_rate = np.divide(flips, pairs, out=np.zeros(len(window)), where=pairs > 0)
+
+    score = np.sqrt(flip_rate * 2 * np.minimum(failure_rate, 1 - failure_rate))
+    return failure_rate, flip_rate, score
+
+
+def record_outcomes(
+    db: Session,
+    project_id: int,
+    branch: Optional[str],
+    run_id: int,
+    outcomes: Dict[int, bool],
+) -> None:
+    """
+    Geser state flakiness untuk {identity_id: failed} dari satu run lalu
+    upsert. Boleh dipanggil berkali-kali untuk run yang sama (ingest
+    memanggilnya per batch): test yang sudah tercatat untuk run_id ini tidak
+    digeser lagi, hasilnya di-OR ke bit 0. Panggil sebelum commit.
+    """
+    if not outcomes:
+        return
+    branch = branch or ""
+    Flaky = models.TestFlakiness
+
+    ids = np.fromiter(outcomes.keys(), dtype=np.int64, count=len(outcomes))
+    failed = np.fromiter(outcomes.values(), dtype=bool, count=len(outcomes))
+
+    # state lama (0 untuk test yang baru pertama kali muncul). Run besar:
+    # satu query untuk seluruh branch (prefix primary key) lebih murah
+    # daripada puluhan IN (...).
+    state = select(Flaky.identity_id, Flaky.window_bits, Flaky.window_len, Flaky.last_run_id).where(
+        Flaky.project_id == project_id, Flaky.branch == branch,
+    )
+    if len(ids) > _FULL_FETCH_THRESHOLD:
+        rows = db.execute(state)
+    else:
+        rows = chain.from_iterable(
+            db.execute(state.where(Flaky.identity_id.in_(batch))) for batch in chunked(ids.tolist(), IN_CLAUSE_CHUNK)
+        )
+    existing = {identity_id: (bits, n, last_run or 0) for identity_id, bits, n, last_run in rows}
+    old = np.array([existing.get(i, (0, 0, 0)) for i in ids.tolist()], dtype=np.int64).reshape(-1, 3)
+    old_window, old_len, old_run = old.T
+
+    has_prev = old_len > 0
+    prev_failed = (old_window & 1).astype(bool)
+    # sudah di-upsert oleh batch sebelumnya dari run yang sama
+    repeat = has_prev & (old_run == run_id)
+
+    shifted = ((old_window.astype(np.uint64) << np.uint64(1)) | failed.astype(np.uint64)) & np.uint64(_WINDOW_MASK)
+    merged = old_window.astype(np.uint64) | failed.astype(np.uint64)
+    window = np.where(repeat, merged, shifted)
+    length = np.where(repeat, old_len, np.minimum(old_len + 1, WINDOW_SIZE))
+    last_failed = (window & np.uint64(1)).astype(bool)
+
+    # delta counter. Repeat: run tidak bertambah, failure hanya kalau bit 0
+    # berubah passed -> failed, flip dihitung ulang untuk pasangan bit 1/bit 0.
+    runs = (~repeat).astype(int)
+    n_failures = np.where(repeat, last_failed & ~prev_failed, failed).astype(int)
+    prev_bit = ((old_window >> 1) & 1).astype(bool)
+    has_pair = old_len >= 2
+    repeat_flips = (has_pair & (prev_bit != last_failed)).astype(int) - (has_pair & (prev_bit != prev_failed)).astype(int)
+    n_flips = np.where(repeat, repeat_flips, (has_prev & (prev_failed != failed)).astype(int))
+    failure_rate, flip_rate, score = window_scores(window, length)
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "project_id": project_id,
+            "branch": branch,
+            "identity_id": identity_id,
+            "window_bits": bits,
+            "window_len": n,
+            # counter total: nilai di sini adalah delta (lihat set_ di bawah)
+            "runs": n_runs,
+            "failures": n_failed,
+            "flips": n_flipped,
+            "failure_rate": f_rate,
+            "flip_rate": fl_rate,
+            "score": s,
+            "last_status": "failed" if is_failed else "passed",
+            "last_run_id": run_id,
+            "updated_at": now,
+        }
+        for identity_id, bits, n, n_runs, n_failed, n_flipped, f_rate, fl_rate, s, is_failed in zip(
+            ids.tolist(), window.tolist(), length.tolist(), runs.tolist(), n_failures.tolist(),
+            n_flips.tolist(), failure_rate.tolist(), flip_rate.tolist(), score.tolist(), last_failed.tolist(),
+        )
+    ]
+
+    stmt = dialect_insert(db, Flaky)
+    set_ = {
+        col: stmt.excluded[col]
+        for col in (
+            "window_bits", "window_len", "failure_rate", "flip_rate", "score",
+            "last_status", "last_run_id", "updated_at",
+        )
+    }
+    set_.update({col: getattr(Flaky, col) + stmt.excluded[col] for col in ("runs", "failures", "flips")})
+    stmt = stmt.on_conflict_do_update(index_elements=["project_id", "branch", "identity_id"], set_=set_)
+    executemany_compiled(db, stmt, rows)
@@ -0,0 +1,247 @@
+import multiprocessing
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import clustering, flakiness, messages, models, planning, rollups, versions
+from .bulk import IN_CLAUSE_CHUNK, bulk_insert, chunked, dialect_insert
+from .cache import TTLCache, set_on_commit
+from .durations import record_run_durations
+from .stats import record_test_run
+from .utils import count_status, new_summary, parse_junit_report, run_status, test_identity_id
+
+# Jumlah TestCaseResult yang ditulis per INSERT
+INGEST_BATCH_SIZE = 1000
+
+# Jumlah proses parser untuk ingest archive (default: semua core)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0")) or os.cpu_count() or 1
+
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "200000"))
+
+# test_identities.id yang sudah pasti ada di DB. Identity tidak pernah
+# berubah/dihapus, jadi tanpa TTL; hanya dibatasi jumlahnya (LRU).
+_known_identities = TTLCache(maxsize=IDENTITY_CACHE_SIZE, ttl=float("inf"))
+
+# failure_messages.id yang sudah pasti ada di DB
+_known_messages = TTLCache(maxsize=messages.MESSAGE_CACHE_SIZE, ttl=float("inf"))
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    # Pool dibuat sekali lalu dipakai ulang antar request. Pakai "spawn" karena
+    # fork dari server yang multi-thread bisa deadlock.
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=INGEST_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _parse_pool
+
+
+def _reset_parse_pool(pool: ProcessPoolExecutor) -> None:
+    # Worker yang mati (OOM / kill) membuat pool BrokenProcessPool permanen;
+    # buang supaya request berikutnya membuat pool baru.
+    global _parse_pool
+    if _parse_pool is pool:
+        _parse_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _parse_in_pool(reports: Iterable[Tuple[str, bytes]], submitted: List[Tuple[str, bytes]]):
+    pool = _get_parse_pool()
+    futures = []
+    try:
+        for name, data in reports:
+            submitted.append((name, data))
+            futures.append((name, pool.submit(parse_junit_report, data)))
+
+        parsed = []
+        for name, future in futures:
+            try:
+                testcases, summary = future.result()
+            except BrokenProcessPool:
+                raise
+            except Exception as exc:
+                for _, pending in futures:
+                    pending.cancel()
+                raise ValueError(f"{name}: {exc}") from exc
+            parsed.append((name, testcases, summary))
+        return parsed
+    except BrokenProcessPool:
+        _reset_parse_pool(pool)
+        raise
+
+
+def parse_reports_parallel(reports: Iterable[Tuple[str, bytes]]) -> List[Tuple[str, List[dict], dict]]:
+    """
+    Parse banyak JUnit XML sekaligus di process pool (parse_junit_xml itu
+    CPU-bound, jadi thread tidak membantu). Return [(nama, testcases, summary)] sesuai urutan input.
+
+    Error parse di-raise ulang sebagai ValueError yang menyebut nama file-nya.
+    Kalau worker pool mati, pool dibuat ulang dan semua report di-parse sekali
+    lagi; gagal lagi -> BrokenProcessPool (route menjawab 503).
+    """
+    submitted: List[Tuple[str, bytes]] = []
+    try:
+        return _parse_in_pool(reports, submitted)
+    except BrokenProcessPool:
+        retry: List[Tuple[str, bytes]] = []
+        # report yang belum sempat dibaca dari iterator ikut di-parse di percobaan kedua
+        return _parse_in_pool(chain(submitted, reports), retry)
+
+
+class IdentityResolver:
+    """
+    Map (classname, name) -> test_identities.id untuk satu ingest. Identity
+    yang belum dikenal cache dikumpulkan lalu ditulis sekali per batch
+    dengan insert-or-ignore; identity yang sudah di-cache tidak menyentuh DB.
+
+    Id adalah hash 53 bit, jadi setelah insert isi row yang tersimpan dicek:
+    kalau id yang sama sudah dipakai test lain (collision), ingest gagal
+    (RuntimeError, transaksi di-rollback) alih-alih menggabung dua test diam-diam.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._pending = {}
+
+    def resolve(self, classname: Optional[str], name: str) -> int:
+        classname = classname or None  # "" = tanpa classname, lihat test_identity_id
+        identity_id = test_identity_id(classname, name)
+        if identity_id not in self._pending and _known_identities.get(identity_id) is None:
+            self._pending[identity_id] = {"id": identity_id, "classname": classname, "name": name}
+        return identity_id
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        stmt = dialect_insert(self.db, models.TestIdentity).on_conflict_do_nothing(index_elements=["id"])
+        self.db.execute(stmt, list(self._pending.values()))
+        self._check_stored()
+        for identity_id in self._pending:
+            set_on_commit(self.db, _known_identities, identity_id, True)
+        self._pending = {}
+
+    def _check_stored(self) -> None:
+        Identity = models.TestIdentity
+        for batch in chunked(list(self._pending), IN_CLAUSE_CHUNK):
+            stored = self.db.execute(
+                select(Identity.id, Identity.classname, Identity.name).where(Identity.id.in_(batch))
+            )
+            for identity_id, classname, name in stored:
+                expected = self._pending[identity_id]
+                if (classname or None, name) != (expected["classname"], expected["name"]):
+                    raise RuntimeError(
+                        f"test identity id collision: {identity_id} is stored for "
+                        f"({classname!r}, {name!r}), ingest has ({expected['classname']!r}, {expected['name']!r})"
+                    )
+
+
+class MessageResolver:
+    """
+    Sama seperti IdentityResolver, untuk failure message: teks dinormalisasi
+    dan di-hash, message yang belum dikenal dikompres dan ditulis sekali per
+    batch; message yang sama di batch/ingest berikutnya tidak ditulis ulang.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._pending = {}
+
+    def resolve(self, text: Optional[str]) -> Optional[int]:
+        if not text:
+            return None
+        normalized = messages.normalize_message(text)
+        if not normalized:
+            return None
+        message_id = messages.message_id(normalized)
+        if message_id not in self._pending and _known_messages.get(message_id) is None:
+            self._pending[message_id] = {
+                "id": message_id,
+                "body": messages.compress_message(normalized),
+                "size": len(normalized),
+            }
+        return message_id
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        stmt = dialect_insert(self.db, models.FailureMessage).on_conflict_do_nothing(index_elements=["id"])
+        self.db.execute(stmt, list(self._pending.values()))
+        for message_id in self._pending:
+            set_on_commit(self.db, _known_messages, message_id, True)
+        self._pending = {}
+
+
+def store_junit_results(
+    db: Session,
+    run: models.TestRun,
+    testcases: Iterable[dict],
+    batch_size: int = INGEST_BATCH_SIZE,
+) -> dict:
+    """
+    Tulis hasil testcase (output iter_junit_xml / parse_junit_xml) ke
+    test_case_results dalam batch berukuran tetap, lalu isi counter TestRun
+    dan project_stats.
+
+    `run` harus sudah di-flush (punya id). Commit DIURUS oleh route.
+    """
+    summary = new_summary()
+    identities = IdentityResolver(db)
+    failure_messages = MessageResolver(db)
+    failures = {}  # message_id -> [teks, jumlah], untuk clustering
+    # semua result berdurasi, untuk app.durations; buffer array (16 byte per
+    # result), bukan list object Python
+    duration_ids, duration_values = array("q"), array("d")
+
+    for batch in chunked(testcases, batch_size):
+        rows = []
+        outcomes, durations = {}, {}
+        for tc in batch:
+            count_status(summary, tc["status"])
+            identity_id = identities.resolve(tc["classname"], tc["name"])
+            failed = flakiness.outcome(tc["status"])
+            if failed is not None:
+                outcomes[identity_id] = outcomes.get(identity_id, False) or failed
+                durations[identity_id] = tc["duration"]
+            message_id = failure_messages.resolve(tc["message"])
+            if failed and message_id is not None:
+                failures.setdefault(message_id, [tc["message"], 0])[1] += 1
+            if tc["duration"] is not None:
+                duration_ids.append(identity_id)
+                duration_values.append(tc["duration"])
+            rows.append({
+                "test_run_id": run.id,
+                "identity_id": identity_id,
+                "status": tc["status"],
+                "duration": tc["duration"],
+                "message_id": message_id,
+            })
+        # identity & message harus ada sebelum result yang menunjuk ke sana (FK)
+        identities.flush()
+        failure_messages.flush()
+        bulk_insert(db, models.TestCaseResult, rows, batch_size=batch_size)
+        # state per test di-update per batch supaya memori tidak tumbuh dengan
+        # ukuran run; test yang muncul lagi di batch berikutnya di-merge
+        flakiness.record_outcomes(db, run.project_id, run.branch, run.id, outcomes)
+        planning.record_results(db, run.project_id, run.id, outcomes, durations)
+
+    run.total = summary["total"]
+    run.passed = summary["passed"]
+    run.failed = summary["failed"]
+    run.skipped = summary["skipped"]
+    run.status = run_status(summary)
+    record_test_run(db, run)
+    rollups.record_test_run(db, run)
+    clustering.record_clusters(db, run.id, failures)
+    record_run_durations(db, run.id, duration_ids, duration_values)
+    versions.bump(db, versions.SCOPE_PROJECT, [run.project_id])
+    return summary
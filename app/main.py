@@ -1,11 +1,12 @@
 from fastapi import FastAPI, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.middleware.cors import CORSMiddleware
-from .database import Base, engine, get_db
-from . import models, schemas
-from .routers import projects, test_runs, load_runs, auth, test_cases, evidences
+from .database import engine, get_async_db
+from . import schemas, stats, versions
+from .migrations import init_db
+from .routers import projects, test_runs, load_runs, auth, test_cases, evidences, analytics
 
-Base.metadata.create_all(bind=engine)
+init_db(engine)
 
 app = FastAPI(
     title="QOps Backend",
@@ -22,6 +23,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
 app.include_router(projects.router)
@@ -30,40 +32,21 @@ app.include_router(load_runs.router)
 app.include_router(test_cases.router)
 app.include_router(evidences.router)
 app.include_router(auth.router)
+app.include_router(analytics.router)
 
 
 @app.get("/projects/{project_id}/summary", response_model=schemas.ProjectSummary)
-def get_project_summary(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(models.Project).get(project_id)
-    if not project:
+async def get_project_summary(
+    project_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    _etag=Depends(versions.conditional(versions.project_keys)),
+):
+    """
+    Dibaca dari project_stats (di-maintain oleh ingest route) lewat cache
+    in-process; cache hit tidak menyentuh DB sama sekali. ETag /
+    If-None-Match: 304 selama project tidak berubah.
+    """
+    summary = await stats.get_project_summary(db, project_id)
+    if summary is None:
         raise HTTPException(status_code=404, detail="Project not found")
-
-    last_test_run = (
-        db.query(models.TestRun)
-        .filter(models.TestRun.project_id == project_id)
-        .order_by(models.TestRun.created_at.desc())
-        .first()
-    )
-
-    last_load_run = (
-        db.query(models.LoadTestRun)
-        .filter(models.LoadTestRun.project_id == project_id)
-        .order_by(models.LoadTestRun.created_at.desc())
-        .first()
-    )
-
-    overall_pass_rate = None
-    if last_test_run and last_test_run.total > 0:
-        overall_pass_rate = (last_test_run.passed / last_test_run.total) * 100.0
-
-    last_load_failure_rate = None
-    if last_load_run:
-        last_load_failure_rate = last_load_run.failure_rate
-
-    return schemas.ProjectSummary(
-        project=project,
-        last_test_run=last_test_run,
-        last_load_run=last_load_run,
-        overall_pass_rate=overall_pass_rate,
-        last_load_failure_rate=last_load_failure_rate,
-    )
+    return summary
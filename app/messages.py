@@ -0,0 +1,52 @@
+"""
+Content-addressed store untuk failure message / stack trace.
+
+Saat environment down, ribuan test gagal dengan trace yang sama persis;
+teks itu disimpan SEKALI di failure_messages (zlib), test_case_results hanya
+menyimpan message_id.
+"""
+import hashlib
+import os
+import zlib
+from typing import Optional
+
+from .cache import TTLCache
+
+COMPRESSION_LEVEL = 6
+
+MESSAGE_CACHE_SIZE = int(os.getenv("MESSAGE_CACHE_SIZE", "10000"))
+
+# message_id -> teks yang sudah di-decompress (message immutable, tanpa TTL)
+_decoded = TTLCache(maxsize=MESSAGE_CACHE_SIZE, ttl=float("inf"))
+
+
+def normalize_message(text: str) -> str:
+    """
+    Line ending jadi \\n dan whitespace di ujung baris / ujung teks dibuang,
+    supaya report Windows dan Linux dengan trace yang sama ter-dedupe.
+    """
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def message_id(normalized: str) -> int:
+    """
+    blake2b 8 byte (signed 64-bit) dari teks yang sudah dinormalisasi.
+    Id ini tidak pernah keluar di API, jadi tidak perlu dibatasi 53 bit.
+    """
+    digest = hashlib.blake2b(normalized.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def compress_message(normalized: str) -> bytes:
+    return zlib.compress(normalized.encode(), COMPRESSION_LEVEL)
+
+
+def decode_message(id_: Optional[int], body: Optional[bytes]) -> Optional[str]:
+    if id_ is None or body is None:
+        return None
+    text = _decoded.get(id_)
+    if text is None:
+        text = zlib.decompress(body).decode()
+        _decoded.set(id_, text)
+    return text
@@ -0,0 +1,492 @@
+"""
+Versioned schema migration untuk database yang sudah ada (mis. qops.db lama).
+
+- DB baru: tabel dibuat oleh `Base.metadata.create_all` (model sudah versi
+  terbaru), lalu di-stamp ke versi migration terakhir.
+- DB lama: create_all hanya menambah tabel yang belum ada, lalu setiap
+  migration yang belum tercatat di `schema_migrations` dijalankan berurutan,
+  masing-masing dalam transaksinya sendiri.
+
+CLI:
+    python -m app.migrations upgrade       # jalankan migration yang pending
+    python -m app.migrations status        # versi sekarang vs terbaru
+
+Query plan hot query dicek oleh tests/test_query_plans.py (database sementara).
+"""
+import argparse
+import logging
+from array import array
+from datetime import datetime
+from itertools import groupby
+from typing import Callable, List, Tuple
+
+from sqlalchemy import DateTime, bindparam, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from . import clustering, flakiness, models, planning, rollups, search
+from .database import Base
+from .durations import record_run_durations
+from .dependencies import hash_api_key
+from .messages import compress_message, decode_message, message_id, normalize_message
+from .utils import test_identity_id
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = []
+
+
+def migration(version: int, description: str):
+    def register(fn: Callable[[Connection], None]):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+
+    return register
+
+
+def head_version() -> int:
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+# ==== BACKFILL HELPERS ==== #
+# Backfill memakai jalur incremental yang sama dengan ingest (flakiness,
+# clustering, rollups, planning, durations), jadi hasilnya identik dengan
+# state yang di-maintain. Kolom run dibaca eksplisit (bukan select model)
+# supaya migration lama tetap jalan walau model nanti mendapat kolom baru.
+
+def _replay_runs(conn: Connection):
+    """
+    Yield (run_id, project_id, branch, {identity_id: failed}, {identity_id: duration})
+    per run, urut id run. Result skipped tidak dihitung; identity yang muncul
+    berkali-kali di satu run gagal kalau salah satunya gagal, durasinya dari
+    result terakhir.
+    """
+    rows = conn.execute(text(
+        "SELECT r.test_run_id, t.project_id, t.branch, r.identity_id, r.status, r.duration "
+        "FROM test_case_results r JOIN test_runs t ON t.id = r.test_run_id "
+        "ORDER BY r.test_run_id, r.id"
+    ))
+    for (run_id, project_id, branch), run_rows in groupby(rows, key=lambda row: tuple(row[:3])):
+        outcomes, durations = {}, {}
+        for *_, identity_id, status, duration in run_rows:
+            failed = flakiness.outcome(status)
+            if failed is not None:
+                outcomes[identity_id] = outcomes.get(identity_id, False) or failed
+                durations[identity_id] = duration
+        if outcomes:
+            yield run_id, project_id, branch, outcomes, durations
+
+
+# ==== MIGRATIONS ==== #
+
+@migration(1, "composite indexes for hot query shapes")
+def _hot_query_indexes(conn: Connection) -> None:
+    # Unique (test_run_id, test_case_id): buang duplikat dulu, evidence yang
+    # menunjuk ke duplikat dipindah ke run case yang dipertahankan (id terkecil).
+    conn.execute(text("""
+        UPDATE evidences SET test_run_case_id = (
+            SELECT MIN(k.id) FROM test_run_cases d
+            JOIN test_run_cases k
+              ON k.test_run_id = d.test_run_id AND k.test_case_id = d.test_case_id
+            WHERE d.id = evidences.test_run_case_id
+        )
+        WHERE test_run_case_id IN (
+            SELECT id FROM test_run_cases WHERE id NOT IN (
+                SELECT MIN(id) FROM test_run_cases GROUP BY test_run_id, test_case_id
+            )
+        )
+    """))
+    conn.execute(text("""
+        DELETE FROM test_run_cases WHERE id NOT IN (
+            SELECT MIN(id) FROM test_run_cases GROUP BY test_run_id, test_case_id
+        )
+    """))
+
+    for ddl in (
+        "CREATE INDEX IF NOT EXISTS ix_projects_created ON projects (created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_test_runs_project_created ON test_runs (project_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_test_case_results_run ON test_case_results (test_run_id)",
+        "CREATE INDEX IF NOT EXISTS ix_load_test_runs_project_created "
+        "ON load_test_runs (project_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_test_suites_project ON test_suites (project_id)",
+        "CREATE INDEX IF NOT EXISTS ix_test_cases_project_created ON test_cases (project_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_test_cases_project_suite_created "
+        "ON test_cases (project_id, suite_id, created_at, id)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_test_run_cases_run_case ON test_run_cases (test_run_id, test_case_id)",
+        "CREATE INDEX IF NOT EXISTS ix_evidences_case_created ON evidences (test_case_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_evidences_run_case_created ON evidences (test_run_case_id, created_at, id)",
+    ):
+        conn.execute(text(ddl))
+
+
+@migration(2, "backfill project_stats")
+def _backfill_project_stats(conn: Connection) -> None:
+    # tabel project_stats sendiri sudah dibuat oleh create_all
+    conn.execute(text("""
+        INSERT INTO project_stats (
+            project_id, last_test_run_id, last_load_run_id,
+            overall_pass_rate, last_load_failure_rate, updated_at
+        )
+        SELECT
+            p.id,
+            tr.id,
+            lr.id,
+            CASE WHEN tr.total > 0 THEN tr.passed * 100.0 / tr.total END,
+            lr.failure_rate,
+            CURRENT_TIMESTAMP
+        FROM projects p
+        LEFT JOIN test_runs tr ON tr.id = (
+            SELECT id FROM test_runs WHERE project_id = p.id ORDER BY created_at DESC, id DESC LIMIT 1
+        )
+        LEFT JOIN load_test_runs lr ON lr.id = (
+            SELECT id FROM load_test_runs WHERE project_id = p.id ORDER BY created_at DESC, id DESC LIMIT 1
+        )
+        WHERE p.id NOT IN (SELECT project_id FROM project_stats)
+    """))
+
+
+@migration(3, "hash plaintext api keys")
+def _hash_api_keys(conn: Connection) -> None:
+    rows = conn.execute(text("SELECT id, key FROM api_keys")).all()
+    for id_, key in rows:
+        conn.execute(
+            text("UPDATE api_keys SET key = :key WHERE id = :id"),
+            {"key": hash_api_key(key), "id": id_},
+        )
+
+
+@migration(4, "backfill test run counters from manual run cases")
+def _backfill_run_case_counters(conn: Connection) -> None:
+    # Sebelumnya counter run manual tidak pernah di-update; recount sekali,
+    # setelah ini di-maintain incremental oleh route run case. Run hasil
+    # ingest JUnit (punya test_case_results) tidak disentuh.
+    conn.execute(text("""
+        UPDATE test_runs SET
+            total = (SELECT COUNT(*) FROM test_run_cases rc WHERE rc.test_run_id = test_runs.id),
+            passed = (SELECT COUNT(*) FROM test_run_cases rc
+                      WHERE rc.test_run_id = test_runs.id AND rc.status = 'passed'),
+            failed = (SELECT COUNT(*) FROM test_run_cases rc
+                      WHERE rc.test_run_id = test_runs.id AND rc.status IN ('failed', 'blocked')),
+            skipped = (SELECT COUNT(*) FROM test_run_cases rc
+                       WHERE rc.test_run_id = test_runs.id AND rc.status = 'skipped')
+        WHERE id IN (SELECT test_run_id FROM test_run_cases)
+          AND id NOT IN (SELECT test_run_id FROM test_case_results)
+    """))
+
+
+@migration(5, "intern test_case_results name/classname into test_identities")
+def _intern_test_identities(conn: Connection) -> None:
+    # test_identities sendiri sudah dibuat oleh create_all
+    columns = {c["name"] for c in inspect(conn).get_columns("test_case_results")}
+    if "name" not in columns:
+        return
+    if "identity_id" not in columns:
+        conn.execute(text(
+            "ALTER TABLE test_case_results ADD COLUMN identity_id BIGINT REFERENCES test_identities (id)"
+        ))
+
+    # Hash dihitung di Python, jadi pasangan unik dipetakan lewat tabel temp
+    # lalu di-join balik dengan satu UPDATE (bukan UPDATE per pasangan).
+    conn.execute(text(
+        "CREATE TEMPORARY TABLE _identity_map (classname_key VARCHAR(255), name VARCHAR(255), id BIGINT)"
+    ))
+    pairs = conn.execute(text("SELECT DISTINCT classname, name FROM test_case_results"))
+    while True:
+        batch = pairs.fetchmany(5000)
+        if not batch:
+            break
+        rows = [
+            {"id": test_identity_id(classname, name), "classname": classname, "classname_key": classname or "", "name": name}
+            for classname, name in batch
+        ]
+        conn.execute(text("INSERT INTO _identity_map (classname_key, name, id) VALUES (:classname_key, :name, :id)"), rows)
+        conn.execute(
+            text(
+                "INSERT INTO test_identities (id, classname, name) "
+                "SELECT :id, :classname, :name WHERE NOT EXISTS (SELECT 1 FROM test_identities WHERE id = :id)"
+            ),
+            rows,
+        )
+    conn.execute(text("CREATE INDEX _ix_identity_map ON _identity_map (name, classname_key)"))
+
+    conn.execute(text("""
+        UPDATE test_case_results SET identity_id = (
+            SELECT m.id FROM _identity_map m
+            WHERE m.name = test_case_results.name
+              AND m.classname_key = COALESCE(test_case_results.classname, '')
+        )
+    """))
+    conn.execute(text("DROP TABLE _identity_map"))
+
+    # Kolom string dibuang (ruang disk baru kembali setelah VACUUM manual)
+    conn.execute(text("ALTER TABLE test_case_results DROP COLUMN name"))
+    conn.execute(text("ALTER TABLE test_case_results DROP COLUMN classname"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_test_case_results_identity_run ON test_case_results (identity_id, test_run_id)"
+    ))
+
+
+@migration(6, "move failure messages into content-addressed failure_messages")
+def _dedupe_failure_messages(conn: Connection) -> None:
+    # failure_messages sendiri sudah dibuat oleh create_all
+    columns = {c["name"] for c in inspect(conn).get_columns("test_case_results")}
+    if "message" not in columns:
+        return
+    if "message_id" not in columns:
+        conn.execute(text(
+            "ALTER TABLE test_case_results ADD COLUMN message_id BIGINT REFERENCES failure_messages (id)"
+        ))
+
+    # Keyset per id supaya tabel besar diproses per batch, bukan dimuat utuh
+    last_id = 0
+    seen = set()
+    while True:
+        batch = conn.execute(
+            text(
+                "SELECT id, message FROM test_case_results "
+                "WHERE id > :last AND message IS NOT NULL ORDER BY id LIMIT 5000"
+            ),
+            {"last": last_id},
+        ).all()
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        updates, new_messages = [], {}
+        for result_id, message in batch:
+            normalized = normalize_message(message)
+            if not normalized:
+                continue
+            mid = message_id(normalized)
+            updates.append({"mid": mid, "id": result_id})
+            if mid not in seen and mid not in new_messages:
+                new_messages[mid] = {"id": mid, "body": compress_message(normalized), "size": len(normalized)}
+
+        if new_messages:
+            conn.execute(
+                text(
+                    "INSERT INTO failure_messages (id, body, size) SELECT :id, :body, :size "
+                    "WHERE NOT EXISTS (SELECT 1 FROM failure_messages WHERE id = :id)"
+                ),
+                list(new_messages.values()),
+            )
+            seen.update(new_messages)
+        if updates:
+            conn.execute(text("UPDATE test_case_results SET message_id = :mid WHERE id = :id"), updates)
+
+    conn.execute(text("ALTER TABLE test_case_results DROP COLUMN message"))
+
+
+@migration(7, "backfill test_flakiness from result history")
+def _backfill_flakiness(conn: Connection) -> None:
+    conn.execute(text("DELETE FROM test_flakiness"))
+    with Session(bind=conn) as db:
+        for run_id, project_id, branch, outcomes, _ in _replay_runs(conn):
+            flakiness.record_outcomes(db, project_id, branch, run_id, outcomes)
+
+
+@migration(8, "backfill failure clusters")
+def _backfill_failure_clusters(conn: Connection) -> None:
+    runs = conn.execute(text(
+        "SELECT DISTINCT test_run_id FROM test_case_results "
+        "WHERE status IN ('failed', 'error') AND message_id IS NOT NULL "
+        "AND test_run_id NOT IN (SELECT test_run_id FROM failure_clusters) ORDER BY test_run_id"
+    )).scalars().all()
+    with Session(bind=conn) as db:
+        for run_id in runs:
+            rows = conn.execute(
+                text(
+                    "SELECT m.id, m.body, COUNT(*) FROM test_case_results r "
+                    "JOIN failure_messages m ON m.id = r.message_id "
+                    "WHERE r.test_run_id = :run AND r.status IN ('failed', 'error') GROUP BY m.id, m.body"
+                ),
+                {"run": run_id},
+            )
+            failures = {mid: (decode_message(mid, body), count) for mid, body, count in rows}
+            clustering.record_clusters(db, run_id, failures)
+
+
+@migration(9, "backfill daily/weekly trend rollups")
+def _backfill_rollups(conn: Connection) -> None:
+    # Rollup dihitung ulang dari nol; sum bersifat aditif jadi urutan run
+    # tidak berpengaruh.
+    conn.execute(text("DELETE FROM test_run_rollups"))
+    conn.execute(text("DELETE FROM load_run_rollups"))
+    with Session(bind=conn) as db:
+        test_runs = conn.execute(text(
+            "SELECT project_id, environment, branch, created_at, total, passed, failed, skipped FROM test_runs"
+        ).columns(created_at=DateTime))
+        for run in test_runs:
+            rollups.record_test_run(db, run)
+        load_runs = conn.execute(text(
+            "SELECT project_id, environment, branch, created_at, total_requests, total_failures, "
+            "avg_response_time, p95_response_time, p99_response_time, requests_per_second FROM load_test_runs"
+        ).columns(created_at=DateTime))
+        for run in load_runs:
+            rollups.record_load_run(db, run)
+
+
+@migration(10, "index for load run regression baselines")
+def _load_run_baseline_index(conn: Connection) -> None:
+    # load_run_verdicts sudah dibuat oleh create_all; run lama tidak diberi
+    # verdict (baseline-nya dibangun dari history saat ingest berikutnya).
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_load_test_runs_baseline "
+        "ON load_test_runs (project_id, environment, branch, created_at, id)"
+    ))
+
+
+@migration(11, "backfill test_stats for CI planning")
+def _backfill_test_stats(conn: Connection) -> None:
+    # Sama seperti migration 7: replay run demi run lewat upsert ingest.
+    conn.execute(text("DELETE FROM test_stats"))
+    with Session(bind=conn) as db:
+        for run_id, project_id, _, outcomes, durations in _replay_runs(conn):
+            planning.record_results(db, project_id, run_id, outcomes, durations)
+
+
+@migration(12, "full-text search index over test cases")
+def _test_case_search_index(conn: Connection) -> None:
+    if conn.dialect.name != "sqlite":
+        return  # dialect lain memakai fallback LIKE (app.search)
+    conn.execute(text(search.FTS_DDL))
+    search.rebuild(conn)
+
+
+@migration(13, "index for listing run cases in id order")
+def _run_case_order_index(conn: Connection) -> None:
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_test_run_cases_run_id ON test_run_cases (test_run_id, id)"
+    ))
+
+
+
+# tabel yang di-list dengan keyset pagination (created_at, id)
+_PAGINATED_TABLES = ("projects", "test_runs", "load_test_runs", "test_cases", "evidences")
+
+
+@migration(14, "backfill NULL created_at on paginated tables")
+def _backfill_created_at(conn: Connection) -> None:
+    # Cursor pagination butuh created_at terisi: row NULL tidak pernah
+    # terpilih oleh perbandingan tuple dan cursor-nya gagal di-encode. Row
+    # lama diberi created_at row sebelumnya (urut id) supaya posisinya di
+    # list tidak melompat; kolomnya NOT NULL di model untuk DB baru.
+    now = datetime.utcnow()
+    for name in _PAGINATED_TABLES:
+        conn.execute(
+            text(
+                f"UPDATE {name} SET created_at = COALESCE("
+                f"(SELECT p.created_at FROM {name} p WHERE p.id < {name}.id AND p.created_at IS NOT NULL "
+                f"ORDER BY p.id DESC LIMIT 1), "
+                f"(SELECT MIN(created_at) FROM {name}), :now) "
+                "WHERE created_at IS NULL"
+            ).bindparams(bindparam("now", now, type_=DateTime)),
+        )
+
+
+@migration(15, "backfill test_run_durations columns")
+def _backfill_run_durations(conn: Connection) -> None:
+    conn.execute(text("DELETE FROM test_run_durations"))
+    rows = conn.execute(text(
+        "SELECT test_run_id, identity_id, duration FROM test_case_results "
+        "WHERE duration IS NOT NULL ORDER BY test_run_id, id"
+    ))
+    with Session(bind=conn) as db:
+        for run_id, run_rows in groupby(rows, key=lambda row: row[0]):
+            identity_ids, values = array("q"), array("d")
+            for _, identity_id, duration in run_rows:
+                identity_ids.append(identity_id)
+                values.append(duration)
+            record_run_durations(db, run_id, identity_ids, values)
+            db.flush()
+
+
+@migration(16, "test_stats merge state for per-batch ingest")
+def _test_stats_merge_state(conn: Connection) -> None:
+    # kolom yang dipakai app.planning.record_results untuk merge test yang
+    # muncul di beberapa batch satu run; row lama (NULL) tidak pernah di-merge
+    columns = {c["name"] for c in inspect(conn).get_columns("test_stats")}
+    for name, ddl in (
+        ("last_run_id", "INTEGER REFERENCES test_runs (id)"),
+        ("last_failed", "INTEGER"),
+        ("prev_failure_ewma", "FLOAT"),
+        ("prev_duration_ewma", "FLOAT"),
+    ):
+        if name not in columns:
+            conn.execute(text(f"ALTER TABLE test_stats ADD COLUMN {name} {ddl}"))
+
+
+# ==== RUNNER ==== #
+
+def _ensure_version_table(conn: Connection) -> None:
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at DATETIME NOT NULL
+        )
+    """))
+
+
+def _record(conn: Connection, version: int, description: str) -> None:
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)"),
+        {"v": version, "d": description, "t": datetime.utcnow()},
+    )
+
+
+def current_version(engine: Engine) -> int:
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+
+
+def upgrade(engine: Engine) -> List[int]:
+    """
+    Jalankan semua migration yang belum tercatat. Return versi yang dijalankan.
+    """
+    applied = []
+    version = current_version(engine)
+    for target, description, fn in MIGRATIONS:
+        if target <= version:
+            continue
+        with engine.begin() as conn:
+            fn(conn)
+            _record(conn, target, description)
+        applied.append(target)
+        logger.info("migrations: applied %s: %s", target, description)
+    return applied
+
+
+def init_db(engine: Engine) -> None:
+    """
+    Dipanggil saat startup (menggantikan create_all langsung di main.py).
+    """
+    fresh = not inspect(engine).has_table(models.Project.__tablename__)
+    Base.metadata.create_all(bind=engine)
+
+    if fresh:
+        # schema dari create_all sudah versi terbaru, cukup di-stamp
+        with engine.begin() as conn:
+            _ensure_version_table(conn)
+            for version, description, _ in MIGRATIONS:
+                _record(conn, version, description)
+        return
+
+    upgrade(engine)
+
+
+if __name__ == "__main__":
+    from .database import engine
+
+    parser = argparse.ArgumentParser(prog="python -m app.migrations")
+    parser.add_argument("command", choices=["upgrade", "status"])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")  # migration yang dijalankan ikut tampil
+
+    if args.command == "upgrade":
+        init_db(engine)
+        print(f"schema version: {current_version(engine)}")
+    elif args.command == "status":
+        print(f"schema version: {current_version(engine)} (head: {head_version()})")
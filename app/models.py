@@ -2,25 +2,32 @@ from datetime import datetime
 from sqlalchemy import (
     Column,
     Integer,
+    BigInteger,
     String,
     DateTime,
+    Date,
     ForeignKey,
     Float,
     Boolean,
     Text,
+    LargeBinary,
+    UniqueConstraint,
+    Index,
 )
 from sqlalchemy.orm import relationship
 
 from .database import Base
+from .messages import decode_message
 
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (Index("ix_projects_created", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), unique=True, nullable=False, index=True)
     description = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     test_runs = relationship("TestRun", back_populates="project", cascade="all, delete-orphan")
     load_runs = relationship("LoadTestRun", back_populates="project", cascade="all, delete-orphan")
@@ -33,6 +40,7 @@ class Project(Base):
 
 class TestRun(Base):
     __tablename__ = "test_runs"
+    __table_args__ = (Index("ix_test_runs_project_created", "project_id", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
@@ -48,31 +56,94 @@ class TestRun(Base):
     skipped = Column(Integer, default=0)
     started_at = Column(DateTime, nullable=True)
     finished_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     project = relationship("Project", back_populates="test_runs")
     cases = relationship("TestCaseResult", back_populates="test_run", cascade="all, delete-orphan")
+    duration_columns = relationship("TestRunDurations", cascade="all, delete-orphan", uselist=False)
 
     # ✅ Execution cases (manual execution like TestRail/Qase)
     run_cases = relationship("TestRunCase", back_populates="test_run", cascade="all, delete-orphan")
 
 
+class TestIdentity(Base):
+    """
+    Satu row per test (classname, name) unik. id = utils.test_identity_id(),
+    jadi ingest bisa menghitung FK tanpa lookup.
+    """
+    __tablename__ = "test_identities"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    classname = Column(String(255), nullable=True)
+    name = Column(String(255), nullable=False)
+
+    results = relationship("TestCaseResult", back_populates="identity")
+
+
+class FailureMessage(Base):
+    """
+    Failure message / stack trace unik (content-addressed, lihat app/messages.py).
+    """
+    __tablename__ = "failure_messages"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)  # messages.message_id()
+    body = Column(LargeBinary, nullable=False)  # zlib(teks yang sudah dinormalisasi)
+    size = Column(Integer, nullable=False)  # panjang teks sebelum kompresi
+
+
 class TestCaseResult(Base):
     __tablename__ = "test_case_results"
+    __table_args__ = (
+        Index("ix_test_case_results_run", "test_run_id"),
+        Index("ix_test_case_results_identity_run", "identity_id", "test_run_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     test_run_id = Column(Integer, ForeignKey("test_runs.id"), nullable=False)
-    name = Column(String(255), nullable=False)
-    classname = Column(String(255), nullable=True)
+    identity_id = Column(BigInteger, ForeignKey("test_identities.id"), nullable=False)
     status = Column(String(50), nullable=False)  # passed/failed/skipped/error
     duration = Column(Float, nullable=True)
-    message = Column(Text, nullable=True)
+    message_id = Column(BigInteger, ForeignKey("failure_messages.id"), nullable=True)
 
     test_run = relationship("TestRun", back_populates="cases")
+    identity = relationship("TestIdentity", back_populates="results", lazy="joined")
+    failure_message = relationship("FailureMessage", lazy="joined")
+
+    @property
+    def message(self):
+        rec = self.failure_message
+        return decode_message(rec.id, rec.body) if rec else None
+
+    @property
+    def name(self) -> str:
+        return self.identity.name
+
+    @property
+    def classname(self):
+        return self.identity.classname
+
+
+class TestRunDurations(Base):
+    """
+    (identity_id, duration) semua result satu run yang durasinya terisi,
+    sebagai dua kolom numpy ter-serialize (app.durations). Analitik durasi
+    membaca satu row per run, bukan satu row per result.
+    """
+    __tablename__ = "test_run_durations"
+
+    test_run_id = Column(Integer, ForeignKey("test_runs.id"), primary_key=True)
+    count = Column(Integer, nullable=False)
+    identity_ids = Column(LargeBinary, nullable=False)  # int64 little-endian
+    durations = Column(LargeBinary, nullable=False)  # float64 little-endian
 
 
 class LoadTestRun(Base):
     __tablename__ = "load_test_runs"
+    __table_args__ = (
+        Index("ix_load_test_runs_project_created", "project_id", "created_at", "id"),
+        # window baseline regresi (app.regression)
+        Index("ix_load_test_runs_baseline", "project_id", "environment", "branch", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
@@ -97,9 +168,249 @@ class LoadTestRun(Base):
 
     started_at = Column(DateTime, nullable=True)
     finished_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     project = relationship("Project", back_populates="load_runs")
+    sketches = relationship("LoadTestSketch", back_populates="load_run", cascade="all, delete-orphan")
+    series = relationship("LoadTestSeries", back_populates="load_run", cascade="all, delete-orphan")
+    verdict = relationship("LoadRunVerdict", uselist=False, cascade="all, delete-orphan")
+
+
+class LoadRunVerdict(Base):
+    """
+    Hasil deteksi regresi run terhadap baseline bergulir (app.regression).
+    status: pass / regression / insufficient_baseline.
+    """
+    __tablename__ = "load_run_verdicts"
+
+    load_run_id = Column(Integer, ForeignKey("load_test_runs.id"), primary_key=True)
+    status = Column(String(30), nullable=False)
+    baseline_runs = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    metrics = relationship("LoadRunMetricVerdict", cascade="all, delete-orphan")
+
+
+class LoadRunMetricVerdict(Base):
+    __tablename__ = "load_run_metric_verdicts"
+
+    load_run_id = Column(Integer, ForeignKey("load_run_verdicts.load_run_id"), primary_key=True)
+    metric = Column(String(50), primary_key=True)
+    value = Column(Float, nullable=True)
+    baseline_median = Column(Float, nullable=True)
+    baseline_mad = Column(Float, nullable=True)
+    baseline_runs = Column(Integer, nullable=False, default=0)  # run baseline yang punya nilai metric ini
+    delta = Column(Float, nullable=True)
+    delta_pct = Column(Float, nullable=True)
+    score = Column(Float, nullable=True)  # None = baseline belum cukup
+    regressed = Column(Boolean, nullable=False, default=False)
+
+
+class LoadTestSketch(Base):
+    """
+    Latency sketch (app.sketch.LatencySketch, serialized) per run per worker.
+    worker NULL = sketch untuk seluruh run (mis. dari stats CSV).
+    """
+    __tablename__ = "load_test_sketches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    load_run_id = Column(Integer, ForeignKey("load_test_runs.id"), nullable=False, index=True)
+    worker = Column(String(100), nullable=True)
+    count = Column(Integer, nullable=False, default=0)
+    sketch = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    load_run = relationship("LoadTestRun", back_populates="sketches")
+
+
+class LoadTestSeries(Base):
+    """
+    Time series satu metric selama run (rps, p95, users, ...), disimpan
+    columnar: timestamps delta-encoded + values byte-shuffled, keduanya zlib
+    (lihat app.timeseries). Satu row per (run, metric), bukan per sample.
+    """
+    __tablename__ = "load_test_series"
+    __table_args__ = (UniqueConstraint("load_run_id", "metric", name="uq_load_test_series_run_metric"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    load_run_id = Column(Integer, ForeignKey("load_test_runs.id"), nullable=False)
+    metric = Column(String(50), nullable=False)
+    points = Column(Integer, nullable=False, default=0)
+    timestamps = Column(LargeBinary, nullable=False)
+    values = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    load_run = relationship("LoadTestRun", back_populates="series")
+
+
+class ProjectStats(Base):
+    """
+    Ringkasan per project (denormalized) untuk /projects/{id}/summary.
+    Di-update oleh ingest route dalam transaksi yang sama (app.stats).
+    """
+    __tablename__ = "project_stats"
+
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    last_test_run_id = Column(Integer, ForeignKey("test_runs.id"), nullable=True)
+    last_load_run_id = Column(Integer, ForeignKey("load_test_runs.id"), nullable=True)
+    overall_pass_rate = Column(Float, nullable=True)
+    last_load_failure_rate = Column(Float, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    project = relationship("Project", lazy="joined")
+    last_test_run = relationship("TestRun", lazy="joined")
+    last_load_run = relationship("LoadTestRun", lazy="joined")
+
+
+class FailureCluster(Base):
+    """
+    Kelompok failure satu run dengan root cause (signature) yang sama,
+    dihitung saat ingest (app.clustering).
+    """
+    __tablename__ = "failure_clusters"
+    __table_args__ = (Index("ix_failure_clusters_run_count", "test_run_id", "count"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    test_run_id = Column(Integer, ForeignKey("test_runs.id"), nullable=False)
+    signature = Column(Text, nullable=False)  # signature representatif
+    count = Column(Integer, nullable=False)  # jumlah result failed
+    signatures = Column(Integer, nullable=False, default=1)  # signature exact yang digabung
+    example_message_id = Column(BigInteger, ForeignKey("failure_messages.id"), nullable=True)
+
+    example_message = relationship("FailureMessage", lazy="joined")
+    messages = relationship("FailureClusterMessage", cascade="all, delete-orphan")
+
+
+class FailureClusterMessage(Base):
+    """Message (failure_messages) yang termasuk ke sebuah cluster."""
+    __tablename__ = "failure_cluster_messages"
+
+    cluster_id = Column(Integer, ForeignKey("failure_clusters.id"), primary_key=True)
+    message_id = Column(BigInteger, ForeignKey("failure_messages.id"), primary_key=True)
+
+
+class TestFlakiness(Base):
+    """
+    State flakiness per (project, branch, test), di-update setiap ingest
+    (app.flakiness). branch "" = run tanpa branch.
+    """
+    __tablename__ = "test_flakiness"
+    __table_args__ = (Index("ix_test_flakiness_rank", "project_id", "branch", "score"),)
+
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    branch = Column(String(100), primary_key=True, default="")
+    identity_id = Column(BigInteger, ForeignKey("test_identities.id"), primary_key=True)
+
+    window_bits = Column(BigInteger, nullable=False, default=0)  # bit 0 = run terbaru, 1 = failed
+    window_len = Column(Integer, nullable=False, default=0)
+    runs = Column(Integer, nullable=False, default=0)
+    failures = Column(Integer, nullable=False, default=0)
+    flips = Column(Integer, nullable=False, default=0)
+
+    failure_rate = Column(Float, nullable=False, default=0.0)  # di window
+    flip_rate = Column(Float, nullable=False, default=0.0)  # di window
+    score = Column(Float, nullable=False, default=0.0)
+
+    last_status = Column(String(50), nullable=True)
+    last_run_id = Column(Integer, ForeignKey("test_runs.id"), nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    identity = relationship("TestIdentity", lazy="joined")
+
+    @property
+    def name(self) -> str:
+        return self.identity.name
+
+    @property
+    def classname(self):
+        return self.identity.classname
+
+
+class EntityVersion(Base):
+    """
+    Version counter per (scope, entity) untuk ETag / conditional GET
+    (app.versions). Naik setiap ada write ke data entity itu.
+    """
+    __tablename__ = "entity_versions"
+
+    scope = Column(String(20), primary_key=True)  # project / test_run / catalog
+    entity_id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class TestStats(Base):
+    """
+    Statistik per test per project untuk planning CI (app.planning): EWMA
+    durasi dan EWMA failure, di-update setiap ingest.
+    """
+    __tablename__ = "test_stats"
+
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    identity_id = Column(BigInteger, ForeignKey("test_identities.id"), primary_key=True)
+
+    runs = Column(Integer, nullable=False, default=0)
+    failures = Column(Integer, nullable=False, default=0)
+    duration_ewma = Column(Float, nullable=True)  # detik
+    failure_ewma = Column(Float, nullable=False, default=0.0)  # 0..1
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    # run terakhir yang di-upsert + state sebelum run itu: ingest menulis per
+    # batch, test yang muncul lagi di batch lain dari run yang sama di-merge
+    last_run_id = Column(Integer, ForeignKey("test_runs.id"), nullable=True)
+    last_failed = Column(Integer, nullable=True)  # 0/1
+    prev_failure_ewma = Column(Float, nullable=True)
+    prev_duration_ewma = Column(Float, nullable=True)
+
+
+class TestRunRollup(Base):
+    """
+    Agregat TestRun per project x environment x branch per hari/minggu
+    (app.rollups). environment/branch "" = tidak diisi.
+    """
+    __tablename__ = "test_run_rollups"
+    __table_args__ = (
+        # trend tanpa filter environment/branch: SUM per period_start
+        Index("ix_test_run_rollups_period", "project_id", "granularity", "period_start"),
+    )
+
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    granularity = Column(String(10), primary_key=True)  # day/week
+    environment = Column(String(100), primary_key=True, default="")
+    branch = Column(String(100), primary_key=True, default="")
+    period_start = Column(Date, primary_key=True)
+
+    runs = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)
+    passed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)
+
+
+class LoadRunRollup(Base):
+    """
+    Agregat LoadTestRun per project x environment x branch per hari/minggu.
+    Kolom sum_* dibagi runs (avg response time: dibagi total_requests) saat
+    dibaca.
+    """
+    __tablename__ = "load_run_rollups"
+    __table_args__ = (
+        Index("ix_load_run_rollups_period", "project_id", "granularity", "period_start"),
+    )
+
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    granularity = Column(String(10), primary_key=True)
+    environment = Column(String(100), primary_key=True, default="")
+    branch = Column(String(100), primary_key=True, default="")
+    period_start = Column(Date, primary_key=True)
+
+    runs = Column(Integer, nullable=False, default=0)
+    total_requests = Column(Integer, nullable=False, default=0)
+    total_failures = Column(Integer, nullable=False, default=0)
+    sum_avg_response_time = Column(Float, nullable=False, default=0.0)  # avg x requests
+    sum_p95_response_time = Column(Float, nullable=False, default=0.0)
+    sum_p99_response_time = Column(Float, nullable=False, default=0.0)
+    sum_requests_per_second = Column(Float, nullable=False, default=0.0)
 
 
 class APIKey(Base):
@@ -107,7 +418,7 @@ class APIKey(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False)
-    key = Column(String(255), nullable=False, unique=True, index=True)
+    key = Column(String(255), nullable=False, unique=True, index=True)  # sha256 hex, bukan plaintext
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -117,6 +428,7 @@ class APIKey(Base):
 
 class TestSuite(Base):
     __tablename__ = "test_suites"
+    __table_args__ = (Index("ix_test_suites_project", "project_id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
@@ -130,6 +442,10 @@ class TestSuite(Base):
 
 class TestCase(Base):
     __tablename__ = "test_cases"
+    __table_args__ = (
+        Index("ix_test_cases_project_created", "project_id", "created_at", "id"),
+        Index("ix_test_cases_project_suite_created", "project_id", "suite_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
@@ -142,7 +458,7 @@ class TestCase(Base):
     priority = Column(String(50), nullable=True)
     automation_type = Column(String(50), nullable=True)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow)
 
     project = relationship("Project", back_populates="test_cases")
@@ -158,6 +474,11 @@ class TestCase(Base):
 
 class TestRunCase(Base):
     __tablename__ = "test_run_cases"
+    __table_args__ = (
+        Index("uq_test_run_cases_run_case", "test_run_id", "test_case_id", unique=True),
+        # list run case: urut id dalam satu run tanpa sort
+        Index("ix_test_run_cases_run_id", "test_run_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     test_run_id = Column(Integer, ForeignKey("test_runs.id"), nullable=False)
@@ -180,6 +501,10 @@ class TestRunCase(Base):
 
 class Evidence(Base):
     __tablename__ = "evidences"
+    __table_args__ = (
+        Index("ix_evidences_case_created", "test_case_id", "created_at", "id"),
+        Index("ix_evidences_run_case_created", "test_run_case_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
@@ -191,7 +516,7 @@ class Evidence(Base):
     web_view_link = Column(Text, nullable=True)
     mime_type = Column(String(120), nullable=True)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     project = relationship("Project", back_populates="evidences")
     test_case = relationship("TestCase", back_populates="evidences")
@@ -0,0 +1,131 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import AsyncSessionLocal
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Jumlah row yang di-fetch per round-trip saat streaming NDJSON
+STREAM_YIELD_PER = 1000
+
+
+class PageParams:
+    """
+    Dependency query param untuk semua list endpoint:
+    ?limit=...&cursor=... (cursor diambil dari header X-Next-Cursor
+    response sebelumnya).
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Jumlah item per halaman"),
+        cursor: Optional[str] = Query(None, description="Opaque cursor dari header X-Next-Cursor"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+
+
+def encode_cursor(created_at: datetime, id_: int) -> str:
+    raw = json.dumps([created_at.isoformat(), id_]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id_ = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(id_)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Cursor untuk hasil yang urutannya bukan (created_at, id), mis. ranking search."""
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode().rstrip("=")
+
+
+def decode_offset_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded))["offset"])
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+
+def keyset_order(stmt: Select, model, cursor: Optional[str]) -> Select:
+    """
+    Urutkan (created_at DESC, id DESC) dan lanjutkan setelah cursor (keyset),
+    jadi halaman ke-N sama murahnya dengan halaman pertama (tanpa OFFSET).
+    created_at model yang dipaginate NOT NULL (lihat migration 14).
+    """
+    stmt = stmt.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        created_at, id_ = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(model.created_at, model.id) < tuple_(created_at, id_))
+    return stmt
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_response(stmt: Select, schema) -> StreamingResponse:
+    """
+    Stream seluruh hasil `stmt` sebagai NDJSON (satu object per baris) pakai
+    server-side cursor (yield_per), jadi memory konstan berapa pun jumlah row.
+
+    Pakai session sendiri karena generator jalan setelah route selesai.
+    """
+
+    async def generate():
+        async with AsyncSessionLocal() as db:
+            rows = await db.stream_scalars(stmt.execution_options(yield_per=STREAM_YIELD_PER))
+            async for obj in rows:
+                yield schema.model_validate(obj).model_dump_json() + "\n"
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def paginate(
+    db: AsyncSession,
+    request: Request,
+    response: Response,
+    stmt: Select,
+    model,
+    schema,
+    page: PageParams,
+):
+    """
+    Jalankan list query dengan keyset pagination.
+
+    - Default: return maksimal `page.limit` item; kalau masih ada halaman
+      berikutnya, cursor-nya dikirim di header X-Next-Cursor.
+    - `Accept: application/x-ndjson`: stream SEMUA item mulai dari cursor
+      (limit diabaikan).
+    """
+    stmt = keyset_order(stmt, model, page.cursor)
+
+    if wants_ndjson(request):
+        return ndjson_response(stmt, schema)
+
+    items: List = (await db.scalars(stmt.limit(page.limit + 1))).all()
+    if len(items) > page.limit:
+        items = items[:page.limit]
+        last = items[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    return items
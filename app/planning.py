@@ -0,0 +1,143 @@
+"""
+Urutan eksekusi test dan pembagian shard untuk CI.
+
+Statistik per test (test_stats) di-maintain incremental saat ingest:
+EWMA durasi dan EWMA failure (probabilitas gagal yang condong ke run
+terbaru), di-update langsung di SQL upsert per batch ingest tanpa membaca
+state lama.
+
+Saat planning:
+- urutan: p_fail / durasi terbesar dulu (Smith's rule: meminimalkan waktu
+  sampai failure pertama terlihat), seri diurutkan dari yang tercepat
+- shard: LPT (longest processing time first), test terpanjang masuk ke
+  shard dengan beban terkecil; di dalam shard tetap mengikuti urutan di atas
+"""
+import heapq
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import Select, and_, case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import models
+from .bulk import IN_CLAUSE_CHUNK, chunked, dialect_insert, executemany_compiled
+
+# bobot run terbaru di EWMA
+EWMA_ALPHA = float(os.getenv("TEST_STATS_EWMA_ALPHA", "0.3"))
+
+# test tanpa history: probabilitas gagal ini, durasi = median test yang dikenal
+NEW_TEST_FAILURE_PROB = float(os.getenv("PLAN_NEW_TEST_FAILURE_PROB", "0.25"))
+DEFAULT_DURATION = 1.0  # detik, kalau project belum punya history sama sekali
+_MIN_DURATION = 0.001
+
+_FULL_FETCH_THRESHOLD = 5 * IN_CLAUSE_CHUNK
+
+
+def record_results(
+    db: Session,
+    project_id: int,
+    run_id: int,
+    outcomes: Dict[int, bool],
+    durations: Dict[int, Optional[float]],
+) -> None:
+    """
+    Update test_stats untuk {identity_id: failed} satu run (test skipped tidak
+    ikut). Boleh dipanggil per batch: test yang sudah tercatat untuk run_id
+    ini dihitung ulang dari state sebelum run (prev_*) dengan hasil yang
+    di-OR dan durasi terakhir. Panggil sebelum commit.
+    """
+    if not outcomes:
+        return
+    Stats = models.TestStats
+    now = datetime.utcnow()
+    rows = [
+        {
+            "project_id": project_id,
+            "identity_id": identity_id,
+            # nilai di sini adalah observasi run ini (lihat set_ di bawah)
+            "runs": 1,
+            "failures": int(failed),
+            "failure_ewma": float(failed),
+            "duration_ewma": durations.get(identity_id),
+            "updated_at": now,
+            "last_run_id": run_id,
+            "last_failed": int(failed),
+            "prev_failure_ewma": None,
+            "prev_duration_ewma": None,
+        }
+        for identity_id, failed in outcomes.items()
+    ]
+
+    stmt = dialect_insert(db, Stats)
+    new = stmt.excluded
+    repeat = Stats.last_run_id == new.last_run_id
+    failed = case((and_(repeat, Stats.last_failed == 1), 1), else_=new.last_failed)
+    # state sebelum run ini; NULL = test baru muncul di run ini
+    failure_base = case((repeat, Stats.prev_failure_ewma), else_=Stats.failure_ewma)
+    duration_base = case((repeat, Stats.prev_duration_ewma), else_=Stats.duration_ewma)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["project_id", "identity_id"],
+        set_={
+            "runs": Stats.runs + case((repeat, 0), else_=new.runs),
+            "failures": Stats.failures + case((repeat, failed - Stats.last_failed), else_=new.failures),
+            "failure_ewma": func.coalesce(failure_base + EWMA_ALPHA * (failed - failure_base), failed),
+            # durasi kosong di salah satu sisi: pakai yang ada
+            "duration_ewma": func.coalesce(
+                duration_base + EWMA_ALPHA * (new.duration_ewma - duration_base),
+                new.duration_ewma,
+                duration_base,
+            ),
+            "updated_at": new.updated_at,
+            "last_run_id": new.last_run_id,
+            "last_failed": failed,
+            "prev_failure_ewma": failure_base,
+            "prev_duration_ewma": duration_base,
+        },
+    )
+    executemany_compiled(db, stmt, rows)
+
+
+def stats_stmt(project_id: int, identity_ids: Optional[List[int]] = None) -> Select:
+    """Statistik test project; `identity_ids` None = seluruh project (range scan primary key)."""
+    Stats = models.TestStats
+    stmt = select(Stats.identity_id, Stats.duration_ewma, Stats.failure_ewma).where(Stats.project_id == project_id)
+    if identity_ids is not None:
+        stmt = stmt.where(Stats.identity_id.in_(identity_ids))
+    return stmt
+
+
+async def load_stats(db: AsyncSession, project_id: int, identity_ids: List[int]) -> Dict[int, tuple]:
+    """{identity_id: (duration_ewma, failure_ewma)} untuk test yang punya history."""
+    found = {}
+    if len(identity_ids) > _FULL_FETCH_THRESHOLD:
+        # satu range scan primary key lebih murah dari puluhan IN (...)
+        wanted = set(identity_ids)
+        found.update((row[0], row[1:]) for row in await db.execute(stats_stmt(project_id)) if row[0] in wanted)
+    else:
+        for batch in chunked(identity_ids, IN_CLAUSE_CHUNK):
+            found.update((row[0], row[1:]) for row in await db.execute(stats_stmt(project_id, batch)))
+    return found
+
+
+def plan(durations: np.ndarray, fail_prob: np.ndarray, shards: int):
+    """
+    Return (order, assignment, loads): `order` index test dalam urutan
+    eksekusi, `assignment[i]` shard test i, `loads` total durasi per shard.
+    """
+    durations = np.maximum(durations, _MIN_DURATION)
+    order = np.lexsort((durations, -(fail_prob / durations)))
+
+    assignment = np.zeros(len(durations), dtype=np.int64)
+    loads = [0.0] * shards
+    heap = [(0.0, shard) for shard in range(shards)]
+    values = durations.tolist()
+    for i in np.argsort(-durations, kind="stable").tolist():
+        load, shard = heapq.heappop(heap)
+        assignment[i] = shard
+        load += values[i]
+        loads[shard] = load
+        heapq.heappush(heap, (load, shard))
+    return order, assignment, loads
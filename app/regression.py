@@ -0,0 +1,166 @@
+"""
+Deteksi regresi load test terhadap baseline bergulir.
+
+Baseline = BASELINE_SIZE run terakhir dengan project, environment, dan branch
+yang sama. Per metric dihitung median dan MAD (median absolute deviation)
+dengan numpy, lalu skor robust:
+
+    score = arah * (nilai - median) / skala
+    skala = max(1.4826 * MAD, REL_FLOOR * |median|, ABS_FLOOR metric)
+
+arah +1 untuk metric yang makin besar makin buruk (p95/p99/failure_rate),
+-1 untuk RPS. Metric dengan score > SCORE_THRESHOLD dianggap regresi. Lantai
+skala mencegah baseline yang sangat stabil (MAD ~ 0) menandai perubahan kecil
+sebagai regresi.
+
+Window baseline di-cache per (project, environment, branch) dan digeser
+setelah commit, jadi ingest biasa tidak membaca ulang history. Cache ditandai
+version project (app.versions): load run dari worker lain menaikkan version
+itu, jadi window yang sudah basi tidak pernah dipakai.
+"""
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from . import models, versions
+from .bulk import bulk_insert
+from .cache import TTLCache, set_on_commit
+
+BASELINE_SIZE = int(os.getenv("REGRESSION_BASELINE_SIZE", "20"))
+MIN_BASELINE_RUNS = int(os.getenv("REGRESSION_MIN_BASELINE_RUNS", "5"))
+SCORE_THRESHOLD = float(os.getenv("REGRESSION_SCORE_THRESHOLD", "3.0"))
+REL_FLOOR = 0.05
+
+# metric -> (arah, lantai absolut skala)
+METRICS = {
+    "p95_response_time": (1.0, 1.0),  # ms
+    "p99_response_time": (1.0, 1.0),
+    "requests_per_second": (-1.0, 0.1),
+    "failure_rate": (1.0, 0.5),  # persen
+}
+_NAMES = list(METRICS)
+_DIRECTION = np.array([METRICS[m][0] for m in _NAMES])
+_ABS_FLOOR = np.array([METRICS[m][1] for m in _NAMES])
+
+STATUS_PASS = "pass"
+STATUS_REGRESSION = "regression"
+STATUS_INSUFFICIENT = "insufficient_baseline"
+
+# (project_id, environment, branch) -> (version project, matrix
+# [n_run, len(METRICS)]), NaN = kosong
+_windows = TTLCache(
+    maxsize=int(os.getenv("REGRESSION_CACHE_SIZE", "1000")),
+    ttl=float(os.getenv("REGRESSION_CACHE_TTL", "600")),
+)
+
+
+def _key(run: models.LoadTestRun) -> Tuple[int, str, str]:
+    return run.project_id, run.environment or "", run.branch or ""
+
+
+def _values(run: models.LoadTestRun) -> np.ndarray:
+    return np.array([getattr(run, m) for m in _NAMES], dtype=float)  # None -> NaN
+
+
+def baseline_stmt(run: models.LoadTestRun) -> Select:
+    """BASELINE_SIZE run terakhir di (project, environment, branch) yang sama, selain `run`."""
+    Run = models.LoadTestRun
+    return (
+        select(*(getattr(Run, m) for m in _NAMES))
+        .where(
+            Run.project_id == run.project_id,
+            Run.environment.is_(None) if run.environment is None else Run.environment == run.environment,
+            Run.branch.is_(None) if run.branch is None else Run.branch == run.branch,
+            Run.id != run.id,
+        )
+        .order_by(Run.created_at.desc(), Run.id.desc())
+        .limit(BASELINE_SIZE)
+    )
+
+
+def _load_window(db: Session, run: models.LoadTestRun) -> np.ndarray:
+    rows = db.execute(baseline_stmt(run)).all()[::-1]  # lama -> baru
+    return np.array(rows, dtype=float).reshape(-1, len(_NAMES))
+
+
+def compare(values: np.ndarray, window: np.ndarray):
+    """
+    Bandingkan vektor metric run terhadap window baseline [n, len(METRICS)].
+    Return (median, mad, score, baseline_counts); semuanya vektor per metric.
+    """
+    counts = np.sum(~np.isnan(window), axis=0)
+    if len(window) == 0:
+        nan = np.full(len(_NAMES), np.nan)
+        return nan, nan, nan, counts
+
+    with np.errstate(all="ignore"):
+        median = np.nanmedian(window, axis=0)
+        mad = np.nanmedian(np.abs(window - median), axis=0)
+    scale = np.fmax(np.fmax(1.4826 * mad, REL_FLOOR * np.abs(median)), _ABS_FLOOR)
+    score = _DIRECTION * (values - median) / scale
+    return median, mad, score, counts
+
+
+def evaluate(db: Session, run: models.LoadTestRun) -> Optional[models.LoadRunVerdict]:
+    """
+    Hitung dan simpan verdict run baru (sudah di-flush, belum commit), lalu
+    jadwalkan window baseline yang sudah digeser ke cache setelah commit.
+    Panggil sebelum versions.bump project run ini.
+    success_threshold_met yang tidak dikirim client diisi dari verdict.
+    """
+    key = _key(run)
+    version = versions.stored(db, (versions.SCOPE_PROJECT, run.project_id))
+    cached = _windows.get(key)
+    if cached is not None and cached[0] == version:
+        window = cached[1]
+    else:
+        window = _load_window(db, run)
+
+    values = _values(run)
+    median, mad, score, counts = compare(values, window)
+    usable = (counts >= MIN_BASELINE_RUNS) & ~np.isnan(values)
+    regressed = usable & (score > SCORE_THRESHOLD)
+
+    if not usable.any():
+        status = STATUS_INSUFFICIENT
+    elif regressed.any():
+        status = STATUS_REGRESSION
+    else:
+        status = STATUS_PASS
+
+    verdict = models.LoadRunVerdict(load_run_id=run.id, status=status, baseline_runs=len(window))
+    db.add(verdict)
+    db.flush()
+
+    def _num(x) -> Optional[float]:
+        return None if np.isnan(x) else float(x)
+
+    bulk_insert(
+        db,
+        models.LoadRunMetricVerdict,
+        (
+            {
+                "load_run_id": run.id,
+                "metric": name,
+                "value": _num(values[i]),
+                "baseline_median": _num(median[i]),
+                "baseline_mad": _num(mad[i]),
+                "baseline_runs": int(counts[i]),
+                "delta": _num(values[i] - median[i]),
+                "delta_pct": _num((values[i] - median[i]) / median[i] * 100.0) if median[i] else None,
+                "score": _num(score[i]) if usable[i] else None,
+                "regressed": bool(regressed[i]),
+            }
+            for i, name in enumerate(_NAMES)
+        ),
+    )
+
+    if run.success_threshold_met is None and status != STATUS_INSUFFICIENT:
+        run.success_threshold_met = status == STATUS_PASS
+
+    # caller mem-bump version project sekali setelah evaluate (load_runs._save_run)
+    set_on_commit(db, _windows, key, (version + 1, np.vstack([window, values])[-BASELINE_SIZE:]))
+    return verdict
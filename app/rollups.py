@@ -0,0 +1,94 @@
+"""
+Rollup harian & mingguan per project x environment x branch untuk trend
+chart, di-update incremental oleh ingest (INSERT ... ON CONFLICT DO UPDATE
+SET kolom = kolom + delta). Chart setahun cukup membaca ~365 / ~52 row.
+"""
+from datetime import date, datetime, timedelta
+from typing import Mapping
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models
+from .bulk import IN_CLAUSE_CHUNK, chunked, dialect_insert
+
+GRANULARITIES = ("day", "week")
+
+_KEYS = ["project_id", "granularity", "environment", "branch", "period_start"]
+TEST_SUMS = ["runs", "total", "passed", "failed", "skipped"]
+LOAD_SUMS = [
+    "runs", "total_requests", "total_failures", "sum_avg_response_time",
+    "sum_p95_response_time", "sum_p99_response_time", "sum_requests_per_second",
+]
+
+
+def period_start_of(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())  # Senin
+    return day
+
+
+def period_start(ts: datetime, granularity: str) -> date:
+    return period_start_of(ts.date(), granularity)
+
+
+def _increment(db: Session, model, sums, rows) -> None:
+    stmt = dialect_insert(db, model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=_KEYS,
+        set_={col: getattr(model, col) + stmt.excluded[col] for col in sums},
+    )
+    db.execute(stmt, rows)
+
+
+def _rows(run, values: Mapping[str, float]):
+    created_at = run.created_at or datetime.utcnow()
+    for granularity in GRANULARITIES:
+        yield {
+            "project_id": run.project_id,
+            "granularity": granularity,
+            "environment": run.environment or "",
+            "branch": run.branch or "",
+            "period_start": period_start(created_at, granularity),
+            **values,
+        }
+
+
+def record_test_run(db: Session, run: models.TestRun) -> None:
+    """Run baru (counter sudah terisi). Panggil sebelum commit."""
+    _increment(db, models.TestRunRollup, TEST_SUMS, list(_rows(run, {
+        "runs": 1,
+        "total": run.total or 0,
+        "passed": run.passed or 0,
+        "failed": run.failed or 0,
+        "skipped": run.skipped or 0,
+    })))
+
+
+def apply_test_run_deltas(db: Session, deltas: Mapping[int, Mapping[str, int]]) -> None:
+    """
+    Counter run yang berubah setelah dibuat (update status run case):
+    {run_id: {"passed": +1, "failed": -1, ...}} masuk ke period run itu.
+    """
+    rows = []
+    for ids in chunked(list(deltas), IN_CLAUSE_CHUNK):
+        for run in db.scalars(select(models.TestRun).where(models.TestRun.id.in_(ids))):
+            delta = deltas[run.id]
+            values = {"runs": 0, **{col: delta.get(col, 0) for col in TEST_SUMS if col != "runs"}}
+            rows.extend(_rows(run, values))
+    if rows:
+        _increment(db, models.TestRunRollup, TEST_SUMS, rows)
+
+
+def record_load_run(db: Session, run: models.LoadTestRun) -> None:
+    """Load run baru. Panggil sebelum commit."""
+    _increment(db, models.LoadRunRollup, LOAD_SUMS, list(_rows(run, {
+        "runs": 1,
+        "total_requests": run.total_requests or 0,
+        "total_failures": run.total_failures or 0,
+        # avg response time dibobot jumlah request
+        "sum_avg_response_time": (run.avg_response_time or 0.0) * (run.total_requests or 0),
+        "sum_p95_response_time": run.p95_response_time or 0.0,
+        "sum_p99_response_time": run.p99_response_time or 0.0,
+        "sum_requests_per_second": run.requests_per_second or 0.0,
+    })))
@@ -0,0 +1,321 @@
+from datetime import date, timedelta
+from typing import List, Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import durations, models, planning, rollups, schemas
+from ..bulk import IN_CLAUSE_CHUNK, chunked
+from ..database import get_async_db
+from ..dependencies import require_api_key
+from ..utils import test_identity_id
+
+router = APIRouter(prefix="/projects", tags=["analytics"])
+
+
+def flaky_tests_stmt(
+    project_id: int, branch: Optional[str], min_runs: int, min_score: float, limit: int,
+) -> Select:
+    Flaky = models.TestFlakiness
+    return (
+        select(Flaky)
+        .where(
+            Flaky.project_id == project_id,
+            Flaky.branch == (branch or ""),
+            Flaky.runs >= min_runs,
+            Flaky.score > min_score,
+        )
+        .order_by(Flaky.score.desc())
+        .limit(limit)
+    )
+
+
+@router.get("/{project_id}/flaky-tests", response_model=List[schemas.FlakyTest])
+async def list_flaky_tests(
+    project_id: int,
+    branch: Optional[str] = Query(None, description="Branch run; kosong = run tanpa branch"),
+    min_runs: int = Query(5, ge=1, description="Abaikan test dengan history lebih pendek"),
+    min_score: float = Query(0.0, ge=0.0, le=1.0),
+    limit: int = Query(50, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
+):
+    """
+    Test paling flaky di satu project + branch, diurutkan dari score
+    tertinggi. Score di-maintain setiap ingest (app.flakiness), jadi endpoint
+    ini hanya membaca index (project_id, branch, score).
+    Requires API key.
+    """
+    if not await db.get(models.Project, project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    return (await db.scalars(flaky_tests_stmt(project_id, branch, min_runs, min_score, limit))).all()
+
+
+def _ratio(num, den, scale: float = 1.0) -> Optional[float]:
+    return (num / den) * scale if den else None
+
+
+def rollup_stmt(model, sums, project_id, granularity, start, end, environment=None, branch=None) -> Select:
+    stmt = (
+        select(model.period_start, *(func.sum(getattr(model, col)).label(col) for col in sums))
+        .where(
+            model.project_id == project_id,
+            model.granularity == granularity,
+            model.period_start >= start,
+            model.period_start <= end,
+        )
+        .group_by(model.period_start)
+        .order_by(model.period_start)
+    )
+    if environment is not None:
+        stmt = stmt.where(model.environment == environment)
+    if branch is not None:
+        stmt = stmt.where(model.branch == branch)
+    return stmt
+
+
+async def _rollup_rows(db: AsyncSession, model, sums, project_id, granularity, start, end, environment, branch):
+    stmt = rollup_stmt(model, sums, project_id, granularity, start, end, environment, branch)
+    return (await db.execute(stmt)).all()
+
+
+@router.get("/{project_id}/trends", response_model=schemas.ProjectTrends)
+async def project_trends(
+    project_id: int,
+    granularity: str = Query("day", pattern="^(day|week)$"),
+    start: Optional[date] = Query(None, description="Default: 365 hari sebelum end"),
+    end: Optional[date] = Query(None, description="Default: hari ini (UTC)"),
+    environment: Optional[str] = Query(None, description="Kosong = semua environment; \"\" = run tanpa environment"),
+    branch: Optional[str] = Query(None, description="Kosong = semua branch; \"\" = run tanpa branch"),
+    db: AsyncSession = Depends(get_async_db),
+    api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
+):
+    """
+    Trend pass rate test run dan metric load run per hari/minggu, dibaca dari
+    rollup yang di-update saat ingest (app.rollups), bukan dari run mentah.
+    Period tanpa run tidak dikembalikan.
+    Requires API key.
+    """
+    if not await db.get(models.Project, project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    end = end or date.today()
+    start = start or end - timedelta(days=365)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    # period minggu diawali Senin: sertakan minggu yang memuat `start`
+    start = rollups.period_start_of(start, granularity)
+
+    test_rows = await _rollup_rows(
+        db, models.TestRunRollup, rollups.TEST_SUMS, project_id, granularity, start, end, environment, branch,
+    )
+    load_rows = await _rollup_rows(
+        db, models.LoadRunRollup, rollups.LOAD_SUMS, project_id, granularity, start, end, environment, branch,
+    )
+
+    return schemas.ProjectTrends(
+        project_id=project_id,
+        granularity=granularity,
+        start=start,
+        end=end,
+        environment=environment,
+        branch=branch,
+        test_runs=[
+            schemas.TestTrendPoint(
+                period_start=row.period_start,
+                runs=row.runs,
+                total=row.total,
+                passed=row.passed,
+                failed=row.failed,
+                skipped=row.skipped,
+                pass_rate=_ratio(row.passed, row.total, 100.0),
+            )
+            for row in test_rows
+        ],
+        load_runs=[
+            schemas.LoadTrendPoint(
+                period_start=row.period_start,
+                runs=row.runs,
+                total_requests=row.total_requests,
+                total_failures=row.total_failures,
+                failure_rate=_ratio(row.total_failures, row.total_requests, 100.0),
+                avg_response_time=_ratio(row.sum_avg_response_time, row.total_requests),
+                p95_response_time=_ratio(row.sum_p95_response_time, row.runs),
+                p99_response_time=_ratio(row.sum_p99_response_time, row.runs),
+                requests_per_second=_ratio(row.sum_requests_per_second, row.runs),
+            )
+            for row in load_rows
+        ],
+    )
+
+
+# ==== DURATIONS ==== #
+
+_DURATION_SORTS = {"median", "p90", "mean", "total_duration"}
+
+
+async def _duration_report(db, project_id, days, branch, environment, min_runs, limit, rank, min_value=0.0):
+    if not await db.get(models.Project, project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    since, stats = await durations.project_stats(db, project_id, days, branch=branch, environment=environment)
+
+    key = rank(stats)
+    candidates = np.flatnonzero((stats.runs >= min_runs) & (key > min_value))
+    top = candidates[np.argsort(-key[candidates], kind="stable")[:limit]]
+
+    ids = stats.identity_id[top].tolist()
+    identities = {}
+    if ids:
+        identities = {
+            i.id: i
+            for i in await db.scalars(select(models.TestIdentity).where(models.TestIdentity.id.in_(ids)))
+        }
+
+    return schemas.DurationReport(
+        project_id=project_id,
+        since=since,
+        environment=environment,
+        branch=branch,
+        runs=stats.n_runs,
+        results=stats.n_results,
+        total_duration=stats.total_duration,
+        tests=[
+            schemas.TestDurationStats(
+                identity_id=identity_id,
+                classname=identities[identity_id].classname if identity_id in identities else None,
+                name=identities[identity_id].name if identity_id in identities else str(identity_id),
+                runs=int(stats.runs[i]),
+                median=float(stats.median[i]),
+                p90=float(stats.p90[i]),
+                mean=float(stats.mean[i]),
+                total_duration=float(stats.total[i]),
+                share=float(stats.share[i]),
+                slope=float(stats.slope[i]),
+                trend_delta=float(stats.trend_delta[i]),
+            )
+            for identity_id, i in zip(ids, top.tolist())
+        ],
+    )
+
+
+@router.get("/{project_id}/durations/slowest", response_model=schemas.DurationReport)
+async def slowest_tests(
+    project_id: int,
+    days: int = Query(30, ge=1, le=365),
+    sort: str = Query("total_duration", description="median / p90 / mean / total_duration"),
+    branch: Optional[str] = None,
+    environment: Optional[str] = None,
+    min_runs: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
+):
+    """
+    Test paling lambat dalam `days` hari terakhir. sort=total_duration
+    mengurutkan berdasarkan kontribusi ke total waktu CI (lihat `share`).
+    Requires API key.
+    """
+    if sort not in _DURATION_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {sorted(_DURATION_SORTS)}")
+    field = "total" if sort == "total_duration" else sort
+    return await _duration_report(
+        db, project_id, days, branch, environment, min_runs, limit, lambda s: getattr(s, field),
+    )
+
+
+@router.get("/{project_id}/durations/regressions", response_model=schemas.DurationReport)
+async def duration_regressions(
+    project_id: int,
+    days: int = Query(30, ge=1, le=365),
+    branch: Optional[str] = None,
+    environment: Optional[str] = None,
+    min_runs: int = Query(5, ge=2),
+    limit: int = Query(20, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
+):
+    """
+    Test yang durasinya paling naik dalam `days` hari terakhir, diurutkan
+    dari trend_delta (slope least squares x rentang run) terbesar.
+    Requires API key.
+    """
+    return await _duration_report(
+        db, project_id, days, branch, environment, min_runs, limit, lambda s: s.trend_delta,
+        min_value=durations.MIN_TREND_DELTA,
+    )
+
+
+# ==== TEST PLAN ==== #
+
+@router.post("/{project_id}/test-plan", response_model=schemas.TestPlan)
+async def plan_tests(
+    project_id: int,
+    payload: schemas.TestPlanRequest,
+    db: AsyncSession = Depends(get_async_db),
+    api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
+):
+    """
+    Urutan eksekusi (yang kemungkinan gagal dan cepat dulu) dan pembagian
+    `shards` shard seimbang untuk daftar test, dari statistik per test yang
+    di-maintain saat ingest (app.planning). Test bisa dikirim sebagai
+    classname/name (sama seperti di JUnit) atau identity_id.
+    Requires API key.
+    """
+    if not await db.get(models.Project, project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    refs = {}  # identity_id -> (classname, name), urutan request dipertahankan
+    for test in payload.tests:
+        refs.setdefault(test_identity_id(test.classname, test.name), (test.classname, test.name))
+    for identity_id in payload.identity_ids:
+        refs.setdefault(identity_id, (None, None))
+    if not refs:
+        raise HTTPException(status_code=400, detail="tests or identity_ids required")
+
+    ids = list(refs)
+    unnamed = [i for i in ids if refs[i][1] is None]
+    for batch in chunked(unnamed, IN_CLAUSE_CHUNK):
+        for identity in await db.scalars(select(models.TestIdentity).where(models.TestIdentity.id.in_(batch))):
+            refs[identity.id] = (identity.classname, identity.name)
+
+    stats = await planning.load_stats(db, project_id, ids)
+    known = np.array([stats.get(i, (None,))[0] is not None for i in ids], dtype=bool)
+    expected = np.array([stats[i][0] if k else np.nan for i, k in zip(ids, known)], dtype=float)
+    fail_prob = np.array(
+        [stats[i][1] if i in stats else planning.NEW_TEST_FAILURE_PROB for i in ids], dtype=float,
+    )
+    default = float(np.median(expected[known])) if known.any() else planning.DEFAULT_DURATION
+    expected[~known] = default
+
+    order, assignment, loads = planning.plan(expected, fail_prob, payload.shards)
+
+    planned = [
+        schemas.PlannedTest(
+            identity_id=identity_id,
+            classname=refs[identity_id][0],
+            name=refs[identity_id][1],
+            expected_duration=duration,
+            failure_probability=p,
+            known=k,
+        )
+        for identity_id, duration, p, k in zip(ids, expected.tolist(), fail_prob.tolist(), known.tolist())
+    ]
+    ordered = [planned[i] for i in order.tolist()]
+    shards = [
+        schemas.TestShard(index=shard, expected_duration=load, tests=[])
+        for shard, load in enumerate(loads)
+    ]
+    for i in order.tolist():
+        shards[assignment[i]].tests.append(planned[i])
+
+    return schemas.TestPlan(
+        project_id=project_id,
+        total_expected_duration=float(expected.sum()),
+        makespan=max(loads),
+        order=ordered,
+        shards=shards,
+    )
@@ -1,19 +1,49 @@
 import secrets
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
+from ..cache import invalidate_on_commit
 from ..database import get_db
+from ..dependencies import api_key_cache, hash_api_key, require_api_key
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/api-key", response_model=schemas.APIKeyBase)
 def create_api_key(payload: schemas.APIKeyCreate, db: Session = Depends(get_db)):
+    """
+    Key plaintext HANYA dikembalikan di response ini; yang disimpan di DB
+    hanya hash-nya.
+    """
     key = secrets.token_hex(32)
+    key_hash = hash_api_key(key)
 
-    rec = models.APIKey(name=payload.name, key=key)
+    rec = models.APIKey(name=payload.name, key=key_hash)
     db.add(rec)
+    invalidate_on_commit(db, api_key_cache, key_hash)
     db.commit()
     db.refresh(rec)
-    return rec
+    return schemas.APIKeyBase(id=rec.id, name=rec.name, key=key, created_at=rec.created_at)
+
+
+@router.delete("/api-key/{api_key_id}", status_code=204)
+def revoke_api_key(
+    api_key_id: int,
+    db: Session = Depends(get_db),
+    api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
+):
+    """
+    Cache key di worker ini langsung di-invalidate setelah commit; worker lain
+    masih menerima key yang sudah dicabut sampai entry cache-nya kedaluwarsa
+    (API_KEY_CACHE_TTL, default 30 detik).
+    Requires API key header.
+    """
+    rec = db.query(models.APIKey).get(api_key_id)
+    if not rec:
+        raise HTTPException(status_code=404, detail="API key not found")
+
+    invalidate_on_commit(db, api_key_cache, rec.key)
+    db.delete(rec)
+    db.commit()
+    return None
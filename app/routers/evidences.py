@@ -1,10 +1,13 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
-from ..database import get_db
+from ..database import get_async_db, get_db
+from ..pagination import PageParams, paginate
 
 router = APIRouter(
     prefix="/evidences",
@@ -51,28 +54,49 @@ def create_evidence(
     return evidence
 
 
+def evidences_by_run_stmt(test_run_id: int, project_id: Optional[int] = None) -> Select:
+    # Evidence terhubung ke run lewat test_run_cases
+    stmt = (
+        select(models.Evidence)
+        .join(models.TestRunCase, models.Evidence.test_run_case_id == models.TestRunCase.id)
+        .where(models.TestRunCase.test_run_id == test_run_id)
+    )
+    if project_id is not None:
+        stmt = stmt.where(models.Evidence.project_id == project_id)
+    return stmt
+
+
+def evidences_by_case_stmt(test_case_id: int, project_id: Optional[int] = None) -> Select:
+    stmt = select(models.Evidence).where(models.Evidence.test_case_id == test_case_id)
+    if project_id is not None:
+        stmt = stmt.where(models.Evidence.project_id == project_id)
+    return stmt
+
+
 @router.get("/by-run/{test_run_id}", response_model=List[schemas.EvidenceBase])
-def list_evidences_by_run(
+async def list_evidences_by_run(
     test_run_id: int,
+    request: Request,
+    response: Response,
     project_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    q = db.query(models.Evidence).filter(models.Evidence.test_run_id == test_run_id)
-    if project_id is not None:
-        q = q.filter(models.Evidence.project_id == project_id)
-    return q.order_by(models.Evidence.created_at.desc()).all()
+    stmt = evidences_by_run_stmt(test_run_id, project_id)
+    return await paginate(db, request, response, stmt, models.Evidence, schemas.EvidenceBase, page)
 
 
 @router.get("/by-case/{test_case_id}", response_model=List[schemas.EvidenceBase])
-def list_evidences_by_case(
+async def list_evidences_by_case(
     test_case_id: int,
+    request: Request,
+    response: Response,
     project_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    q = db.query(models.Evidence).filter(models.Evidence.test_case_id == test_case_id)
-    if project_id is not None:
-        q = q.filter(models.Evidence.project_id == project_id)
-    return q.order_by(models.Evidence.created_at.desc()).all()
+    stmt = evidences_by_case_stmt(test_case_id, project_id)
+    return await paginate(db, request, response, stmt, models.Evidence, schemas.EvidenceBase, page)
 
 @router.delete("/{evidence_id}", status_code=204)
 def delete_evidence(evidence_id: int, db: Session = Depends(get_db)):
@@ -1,14 +1,117 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import numpy as np
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile
+from sqlalchemy import Select, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
-from .. import models, schemas
-from ..database import get_db
+from .. import export, models, regression, rollups, schemas, versions
+from ..database import get_async_db, get_db
 from ..dependencies import require_api_key
+from ..pagination import PageParams, paginate
+from ..sketch import LatencySketch, sketch_from_percentiles
+from ..stats import record_load_run
+from ..timeseries import (
+    DOWNSAMPLE_MODES,
+    HISTORY_METRICS,
+    decode_timestamps,
+    decode_values,
+    downsample_buckets,
+    encode_timestamps,
+    encode_values,
+    lttb,
+)
+from ..utils import parse_locust_history_csv, parse_locust_stats_csv
 
 router = APIRouter(prefix="/load-runs", tags=["load-runs"])
 
+DEFAULT_PERCENTILES = [50.0, 90.0, 95.0, 99.0, 99.9]
+
+
+def _run_from_sketch(
+    meta,
+    sketch: LatencySketch,
+    total_failures: int,
+    duration_seconds: float,
+    requests_per_second: Optional[float] = None,
+) -> models.LoadTestRun:
+    """
+    Bangun LoadTestRun yang summary-nya dihitung server-side dari sketch.
+    failure_rate dalam persen.
+    """
+    if requests_per_second is None:
+        requests_per_second = sketch.count / duration_seconds if duration_seconds else None
+
+    return models.LoadTestRun(
+        project_id=meta.project_id,
+        name=meta.name,
+        environment=meta.environment,
+        build=meta.build,
+        branch=meta.branch,
+        triggered_by=meta.triggered_by,
+        total_requests=sketch.count,
+        total_failures=total_failures,
+        avg_response_time=sketch.avg,
+        p95_response_time=sketch.quantile(0.95),
+        p99_response_time=sketch.quantile(0.99),
+        max_response_time=sketch.max if sketch.count else None,
+        min_response_time=sketch.min if sketch.count else None,
+        requests_per_second=requests_per_second,
+        failure_rate=(total_failures / sketch.count * 100.0) if sketch.count else None,
+        duration_seconds=duration_seconds,
+        success_threshold_met=meta.success_threshold_met,
+        started_at=meta.started_at,
+        finished_at=meta.finished_at,
+    )
+
+
+def _save_run(db: Session, run: models.LoadTestRun) -> models.LoadTestRun:
+    db.add(run)
+    db.flush()
+    regression.evaluate(db, run)
+    record_load_run(db, run)
+    rollups.record_load_run(db, run)
+    versions.bump(db, versions.SCOPE_PROJECT, [run.project_id])
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+def sketches_stmt(load_run_ids: List[int], worker: Optional[str] = None) -> Select:
+    stmt = select(models.LoadTestSketch.sketch).where(models.LoadTestSketch.load_run_id.in_(load_run_ids))
+    if worker is not None:
+        stmt = stmt.where(models.LoadTestSketch.worker == worker)
+    return stmt
+
+
+async def _merged_sketch(
+    db: AsyncSession,
+    load_run_ids: List[int],
+    worker: Optional[str] = None,
+) -> LatencySketch:
+    merged = LatencySketch()
+    for blob in await db.scalars(sketches_stmt(load_run_ids, worker)):
+        merged.merge(LatencySketch.from_bytes(blob))
+    return merged
+
+
+def _percentiles_response(
+    load_run_ids: List[int],
+    sketch: LatencySketch,
+    ps: List[float],
+    worker: Optional[str] = None,
+) -> schemas.LatencyPercentiles:
+    return schemas.LatencyPercentiles(
+        load_run_ids=load_run_ids,
+        worker=worker,
+        count=sketch.count,
+        min_response_time=sketch.min if sketch.count else None,
+        max_response_time=sketch.max if sketch.count else None,
+        avg_response_time=sketch.avg,
+        percentiles=sketch.percentiles(ps),
+    )
+
 
 @router.post("/locust", response_model=schemas.LoadTestRunBase)
 def ingest_locust_run(
@@ -48,42 +151,333 @@ def ingest_locust_run(
         finished_at=payload.finished_at,
     )
 
-    db.add(run)
-    db.commit()
-    db.refresh(run)
+    return _save_run(db, run)
+
+
+@router.post("/locust/raw", response_model=schemas.LoadTestRunBase)
+def ingest_locust_raw(
+    payload: schemas.LocustRawPayload,
+    db: Session = Depends(get_db),
+    api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
+):
+    """
+    Ingest sample mentah (atau histogram `response_times`) per worker Locust.
+    Setiap worker disimpan sebagai latency sketch, summary run (avg/p95/p99/
+    min/max/rps/failure_rate) dihitung server-side dari gabungan sketch.
+    Requires X-API-KEY header.
+    """
+    project = db.query(models.Project).get(payload.project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    merged = LatencySketch()
+    worker_sketches = []
+    for item in payload.workers:
+        sketch = LatencySketch()
+        if item.samples:
+            sketch.add_many(item.samples)
+        if item.response_times:
+            sketch.add_histogram(item.response_times)
+        merged.merge(sketch)
+        worker_sketches.append((item.worker, sketch))
+
+    if merged.count == 0:
+        raise HTTPException(status_code=400, detail="No samples in payload")
+
+    run = _run_from_sketch(
+        payload,
+        merged,
+        total_failures=sum(item.failures for item in payload.workers),
+        duration_seconds=payload.duration_seconds,
+    )
+    run.sketches = [
+        models.LoadTestSketch(worker=worker, count=sketch.count, sketch=sketch.to_bytes())
+        for worker, sketch in worker_sketches
+    ]
+
+    return _save_run(db, run)
+
+
+@router.post("/locust/csv", response_model=schemas.LoadTestRunBase)
+def ingest_locust_csv(
+    project_id: int = Form(...),
+    name: str = Form("locust-run"),
+    environment: Optional[str] = Form(None),
+    build: Optional[str] = Form(None),
+    branch: Optional[str] = Form(None),
+    triggered_by: Optional[str] = Form(None),
+    duration_seconds: float = Form(...),
+    stats_file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
+):
+    """
+    Ingest `<prefix>_stats.csv` Locust. Sketch direkonstruksi dari kolom
+    percentile tiap endpoint lalu di-merge, jadi run ini bisa digabung dengan
+    run lain di endpoint /percentiles.
+    Requires X-API-KEY header.
+    """
+    meta = schemas.LocustRawPayload(
+        project_id=project_id,
+        name=name,
+        environment=environment,
+        build=build,
+        branch=branch,
+        triggered_by=triggered_by,
+        duration_seconds=duration_seconds,
+        workers=[],
+    )
+
+    project = db.query(models.Project).get(meta.project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    try:
+        rows = parse_locust_stats_csv(stats_file.file)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid Locust stats CSV: {exc}")
+
+    # pakai baris per-endpoint kalau ada (lebih akurat), fallback ke "Aggregated"
+    endpoint_rows = [r for r in rows if not r["aggregated"]] or [r for r in rows if r["aggregated"]]
+    aggregated = next((r for r in rows if r["aggregated"]), None)
+
+    merged = LatencySketch()
+    for row in endpoint_rows:
+        if not row["count"]:
+            continue
+        min_value = row["min"] if row["min"] is not None else min(row["percentiles"].values(), default=0.0)
+        merged.merge(sketch_from_percentiles(row["count"], min_value, row["percentiles"]))
+
+    if merged.count == 0:
+        raise HTTPException(status_code=400, detail="No requests in stats CSV")
+
+    run = _run_from_sketch(
+        meta,
+        merged,
+        total_failures=sum(r["failures"] for r in endpoint_rows),
+        duration_seconds=duration_seconds,
+        requests_per_second=aggregated["rps"] if aggregated else None,
+    )
+    run.sketches = [models.LoadTestSketch(worker=None, count=merged.count, sketch=merged.to_bytes())]
+
+    return _save_run(db, run)
+
+
+@router.get("/percentiles", response_model=schemas.LatencyPercentiles)
+async def get_merged_percentiles(
+    run_ids: List[int] = Query(..., description="Load run ids yang digabung"),
+    q: List[float] = Query(DEFAULT_PERCENTILES, description="Percentile dalam persen"),
+    db: AsyncSession = Depends(get_async_db),
+    api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
+):
+    """
+    Percentile gabungan beberapa load run (merge sketch, O(bucket)).
+    Requires API key.
+    """
+    merged = await _merged_sketch(db, run_ids)
+    if merged.count == 0:
+        raise HTTPException(status_code=404, detail="No latency sketches for these runs")
+    return _percentiles_response(run_ids, merged, q)
 
-    return run
+
+def load_runs_stmt(project_id: int) -> Select:
+    return select(models.LoadTestRun).where(models.LoadTestRun.project_id == project_id)
 
 
 @router.get("", response_model=List[schemas.LoadTestRunBase])
-def list_load_runs(
+async def list_load_runs(
     project_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
+    _etag=Depends(versions.conditional(versions.project_keys)),
 ):
     """
-    List all load test runs for a project.
+    List load test runs for a project, keyset-paginated (?limit=&cursor=,
+    cursor berikutnya di header X-Next-Cursor) atau stream NDJSON dengan
+    Accept: application/x-ndjson. ETag / If-None-Match: 304 selama project
+    tidak berubah.
     Requires API key header.
     """
-    return (
-        db.query(models.LoadTestRun)
-        .filter(models.LoadTestRun.project_id == project_id)
-        .order_by(models.LoadTestRun.created_at.desc())
-        .all()
-    )
+    stmt = load_runs_stmt(project_id)
+    return await paginate(db, request, response, stmt, models.LoadTestRun, schemas.LoadTestRunBase, page)
+
+
+@router.get("/export")
+async def export_load_runs(
+    project_id: int,
+    fmt: str = Query("csv", alias="format", pattern="^(csv|parquet)$"),
+    environment: Optional[str] = Query(None),
+    branch: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
+):
+    """
+    Stream semua load run project sebagai CSV atau Parquet (?format=), lewat
+    server-side cursor: memory konstan berapa pun jumlah run.
+    Requires API key header.
+    """
+    export.require_format(fmt)
+    if not await db.get(models.Project, project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+    return export.export_load_runs(project_id, fmt, environment=environment, branch=branch)
 
 
 @router.get("/{load_run_id}", response_model=schemas.LoadTestRunBase)
-def get_load_run(
+async def get_load_run(
     load_run_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
 ):
     """
     Retrieve detail of a single load test run.
     Requires API key.
     """
-    run = db.query(models.LoadTestRun).get(load_run_id)
+    run = await db.get(models.LoadTestRun, load_run_id)
     if not run:
         raise HTTPException(status_code=404, detail="Load test run not found")
     return run
+
+
+@router.get("/{load_run_id}/comparison", response_model=schemas.LoadRunComparison)
+async def get_load_run_comparison(
+    load_run_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
+):
+    """
+    Verdict regresi run terhadap baseline (run terakhir dengan project,
+    environment, dan branch yang sama), dihitung saat ingest.
+    Requires API key.
+    """
+    verdict = await db.get(
+        models.LoadRunVerdict, load_run_id, options=[selectinload(models.LoadRunVerdict.metrics)],
+    )
+    if not verdict:
+        if not await db.get(models.LoadTestRun, load_run_id):
+            raise HTTPException(status_code=404, detail="Load run not found")
+        raise HTTPException(status_code=404, detail="No regression verdict for this load run")
+    return verdict
+
+
+@router.get("/{load_run_id}/percentiles", response_model=schemas.LatencyPercentiles)
+async def get_load_run_percentiles(
+    load_run_id: int,
+    q: List[float] = Query(DEFAULT_PERCENTILES, description="Percentile dalam persen"),
+    worker: Optional[str] = Query(None, description="Optional: hanya worker ini"),
+    db: AsyncSession = Depends(get_async_db),
+    api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
+):
+    """
+    Percentile apa pun untuk satu load run (atau satu worker-nya) dari sketch.
+    Requires API key.
+    """
+    run = await db.get(models.LoadTestRun, load_run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Load test run not found")
+
+    sketch = await _merged_sketch(db, [load_run_id], worker)
+    if sketch.count == 0:
+        raise HTTPException(status_code=404, detail="No latency sketch for this run")
+    return _percentiles_response([load_run_id], sketch, q, worker)
+
+
+@router.post("/{load_run_id}/history", response_model=List[schemas.LoadSeriesInfo])
+def upload_load_run_history(
+    load_run_id: int,
+    history_file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
+):
+    """
+    Upload `<prefix>_stats_history.csv` Locust untuk run ini. Setiap metric
+    (users, rps, p95, ...) disimpan sebagai satu blob columnar ter-compress;
+    upload ulang menggantikan series sebelumnya.
+    Requires X-API-KEY header.
+    """
+    run = db.query(models.LoadTestRun).get(load_run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Load test run not found")
+
+    try:
+        parsed = parse_locust_history_csv(history_file.file, HISTORY_METRICS)
+    except (KeyError, ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid Locust stats history CSV: {exc}")
+
+    if not parsed:
+        raise HTTPException(status_code=400, detail="No Aggregated rows in stats history CSV")
+
+    # Series lama dihapus eksplisit dulu: mengganti koleksi delete-orphan
+    # membuat ORM meng-INSERT sebelum DELETE dan melanggar unique (run, metric)
+    db.execute(delete(models.LoadTestSeries).where(models.LoadTestSeries.load_run_id == run.id))
+    db.flush()
+    run.series = [
+        models.LoadTestSeries(
+            metric=metric,
+            points=len(ts),
+            timestamps=encode_timestamps(np.asarray(ts, dtype=np.int64)),
+            values=encode_values(np.asarray(values, dtype=np.float64)),
+        )
+        for metric, (ts, values) in parsed.items()
+    ]
+    versions.bump(db, versions.SCOPE_PROJECT, [run.project_id])
+    db.commit()
+    return run.series
+
+
+def series_stmt(load_run_id: int, metric: str) -> Select:
+    return select(models.LoadTestSeries).where(
+        models.LoadTestSeries.load_run_id == load_run_id,
+        models.LoadTestSeries.metric == metric,
+    )
+
+
+@router.get("/{load_run_id}/series", response_model=schemas.LoadSeriesPoints)
+async def get_load_run_series(
+    load_run_id: int,
+    metric: str = Query("rps", description="users/rps/failures_per_s/p50/p95/p99/avg_response_time"),
+    points: int = Query(500, ge=3, le=10000, description="Jumlah titik maksimum"),
+    mode: str = Query("lttb", description="lttb / minmax / avg"),
+    db: AsyncSession = Depends(get_async_db),
+    api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
+):
+    """
+    Time series satu metric, di-downsample server-side ke maksimal `points`
+    titik (LTTB atau bucket min/max/avg), jadi ukuran response tidak
+    tergantung panjang run.
+    Requires API key.
+    """
+    if mode not in DOWNSAMPLE_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(DOWNSAMPLE_MODES)}")
+
+    rec = (await db.scalars(series_stmt(load_run_id, metric))).first()
+    if not rec:
+        raise HTTPException(status_code=404, detail="Series not found for this run/metric")
+
+    ts = decode_timestamps(rec.timestamps)
+    values = decode_values(rec.values)
+
+    if mode == "lttb":
+        ts_out, v_out = lttb(ts, values, points)
+        return schemas.LoadSeriesPoints(
+            load_run_id=load_run_id,
+            metric=metric,
+            mode=mode,
+            source_points=len(values),
+            timestamps=ts_out.tolist(),
+            values=v_out.tolist(),
+        )
+
+    ts_out, v_min, v_max, v_avg = downsample_buckets(ts, values, points)
+    return schemas.LoadSeriesPoints(
+        load_run_id=load_run_id,
+        metric=metric,
+        mode=mode,
+        source_points=len(values),
+        timestamps=ts_out.tolist(),
+        min=v_min.tolist() if mode == "minmax" else None,
+        max=v_max.tolist() if mode == "minmax" else None,
+        avg=v_avg.tolist(),
+    )
@@ -1,10 +1,13 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .. import models, schemas
-from ..database import get_db
+from .. import models, schemas, versions
+from ..database import get_async_db, get_db
+from ..pagination import PageParams, paginate
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
@@ -28,6 +31,8 @@ def create_project(payload: schemas.ProjectCreate, db: Session = Depends(get_db)
         description=payload.description,
     )
     db.add(project)
+    db.flush()
+    versions.bump(db, versions.SCOPE_PROJECT, [project.id])
     db.commit()          # ✅ COMMIT DI SINI
     db.refresh(project)  # ✅ Biar ID terisi
 
@@ -36,6 +41,19 @@ def create_project(payload: schemas.ProjectCreate, db: Session = Depends(get_db)
     return project
 
 
+def projects_stmt() -> Select:
+    return select(models.Project)
+
+
 @router.get("", response_model=List[schemas.ProjectBase])
-def list_projects(db: Session = Depends(get_db)):
-    return db.query(models.Project).order_by(models.Project.created_at.desc()).all()
+async def list_projects(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Keyset pagination (?limit=&cursor=, cursor berikutnya di header
+    X-Next-Cursor) atau stream NDJSON dengan Accept: application/x-ndjson.
+    """
+    return await paginate(db, request, response, projects_stmt(), models.Project, schemas.ProjectBase, page)
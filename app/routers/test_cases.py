@@ -1,11 +1,14 @@
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .. import models, schemas
-from ..database import get_db
+from .. import models, schemas, search, versions
+from ..database import get_async_db, get_db
+from ..pagination import PageParams, decode_offset_cursor, encode_offset_cursor, paginate
 
 router = APIRouter(
     prefix="/test-cases",
@@ -46,27 +49,66 @@ def create_test_case(
         updated_at=now,
     )
     db.add(case)
+    db.flush()
+    search.index_case(db, case)
+    versions.bump(db, versions.SCOPE_CATALOG, [case.project_id])
     db.commit()
     db.refresh(case)
     return case
 
 
+def cases_stmt(project_id: int, suite_id: Optional[int] = None) -> Select:
+    stmt = select(models.TestCase).where(models.TestCase.project_id == project_id)
+    if suite_id is not None:
+        stmt = stmt.where(models.TestCase.suite_id == suite_id)
+    return stmt
+
+
 @router.get("", response_model=List[schemas.TestCaseBase])
-def list_test_cases(
+async def list_test_cases(
+    request: Request,
+    response: Response,
     project_id: int = Query(..., description="Filter by project_id"),
     suite_id: Optional[int] = Query(None, description="Optional: filter by suite_id"),
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    q = db.query(models.TestCase).filter(models.TestCase.project_id == project_id)
-    if suite_id is not None:
-        q = q.filter(models.TestCase.suite_id == suite_id)
+    stmt = cases_stmt(project_id, suite_id)
+    return await paginate(db, request, response, stmt, models.TestCase, schemas.TestCaseBase, page)
 
-    return q.order_by(models.TestCase.created_at.desc()).all()
+
+@router.get("/search", response_model=List[schemas.TestCaseSearchHit])
+async def search_test_cases(
+    response: Response,
+    project_id: int = Query(..., description="Filter by project_id"),
+    q: str = Query(..., min_length=1, max_length=200, description="Kata kunci; setiap kata dicocokkan sebagai prefix"),
+    suite_id: Optional[int] = Query(None, description="Optional: filter by suite_id"),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Full-text search di title, preconditions, steps, dan expected_result,
+    diurutkan dari yang paling relevan. Halaman berikutnya lewat header
+    X-Next-Cursor seperti list endpoint lain.
+    """
+    if search.match_query(q) is None:
+        raise HTTPException(status_code=400, detail="q must contain at least one word")
+    offset = decode_offset_cursor(page.cursor)
+
+    hits = await search.search_cases(db, project_id, q, suite_id, page.limit + 1, offset)
+    if len(hits) > page.limit:
+        hits = hits[:page.limit]
+        response.headers["X-Next-Cursor"] = encode_offset_cursor(offset + page.limit)
+
+    return [
+        schemas.TestCaseSearchHit.model_validate(case).model_copy(update={"snippet": snippet, "score": score})
+        for case, snippet, score in hits
+    ]
 
 
 @router.get("/{case_id}", response_model=schemas.TestCaseBase)
-def get_test_case(case_id: int, db: Session = Depends(get_db)):
-    case = db.query(models.TestCase).get(case_id)
+async def get_test_case(case_id: int, db: AsyncSession = Depends(get_async_db)):
+    case = await db.get(models.TestCase, case_id)
     if not case:
         raise HTTPException(status_code=404, detail="Test case not found")
     return case
@@ -89,6 +131,8 @@ def update_test_case(
 
     case.updated_at = datetime.utcnow()
     db.add(case)
+    search.index_case(db, case)
+    versions.bump(db, versions.SCOPE_CATALOG, [case.project_id])
     db.commit()
     db.refresh(case)
     return case
@@ -101,5 +145,7 @@ def delete_test_case(case_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Test case not found")
 
     db.delete(case)
+    search.remove_case(db, case_id)
+    versions.bump(db, versions.SCOPE_CATALOG, [case.project_id])
     db.commit()
     return None
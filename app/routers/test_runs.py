@@ -1,51 +1,501 @@
+from collections import Counter
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import List
+from itertools import chain
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile
+from lxml import etree
+from sqlalchemy import Select, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 
-from ..database import get_db
-from .. import models, schemas
+from ..bulk import IN_CLAUSE_CHUNK, chunked, dialect_insert
+from ..database import get_async_db, get_db
+from ..dependencies import require_api_key
+from ..ingest import parse_reports_parallel, store_junit_results
+from ..pagination import PageParams, paginate
+from ..utils import RUN_CASE_COUNTERS, iter_archive_reports, iter_junit_xml
+from .. import export, fastjson, models, rollups, schemas, stats, versions
+from ..messages import decode_message
 
 router = APIRouter(prefix="/test-runs", tags=["test-runs"])
 
 
-@router.get("", response_model=List[schemas.TestRunBase])
-def list_test_runs(project_id: int, db: Session = Depends(get_db)):
-    return (
-        db.query(models.TestRun)
-        .filter(models.TestRun.project_id == project_id)
-        .order_by(models.TestRun.created_at.desc())
-        .all()
+def robot_run_meta(
+    project_id: int = Form(...),
+    name: str = Form("robot-run"),
+    environment: Optional[str] = Form(None),
+    build: Optional[str] = Form(None),
+    branch: Optional[str] = Form(None),
+    triggered_by: Optional[str] = Form(None),
+) -> schemas.RobotRunMeta:
+    return schemas.RobotRunMeta(
+        project_id=project_id,
+        name=name,
+        environment=environment,
+        build=build,
+        branch=branch,
+        triggered_by=triggered_by,
+    )
+
+
+def _create_run(db: Session, meta: schemas.RobotRunMeta) -> models.TestRun:
+    project = db.query(models.Project).get(meta.project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    run = models.TestRun(
+        project_id=meta.project_id,
+        name=meta.name,
+        environment=meta.environment,
+        build=meta.build,
+        branch=meta.branch,
+        triggered_by=meta.triggered_by,
+        status="unknown",
     )
+    db.add(run)
+    db.flush()  # butuh run.id untuk test_case_results
+    return run
+
+
+@router.post("/robot", response_model=schemas.TestRunBase)
+def ingest_robot_run(
+    meta: schemas.RobotRunMeta = Depends(robot_run_meta),
+    junit_file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
+):
+    """
+    Ingest JUnit XML (Robot --xunit / pytest / dll) sebagai TestRun baru.
+    File di-parse secara streaming dan hasilnya ditulis per batch, jadi report
+    ratusan MB tidak pernah dimuat utuh ke memory.
+    Requires X-API-KEY header.
+    """
+    run = _create_run(db, meta)
+
+    try:
+        store_junit_results(db, run, iter_junit_xml(junit_file.file))
+    except etree.XMLSyntaxError as exc:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Invalid JUnit XML: {exc}")
+
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+@router.post("/robot/archive", response_model=schemas.TestRunBase)
+def ingest_robot_archive(
+    meta: schemas.RobotRunMeta = Depends(robot_run_meta),
+    archive: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    api=Depends(require_api_key),  # 🔐 VALIDATE API KEY
+):
+    """
+    Ingest satu .zip / .tar.gz berisi banyak JUnit XML (satu per shard CI).
+    Semua report di-parse paralel di process pool, lalu digabung menjadi
+    SATU TestRun dengan counter total/passed/failed/skipped gabungan.
+    Requires X-API-KEY header.
+    """
+    try:
+        parsed = parse_reports_parallel(iter_archive_reports(archive.file))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid archive: {exc}")
+    except BrokenProcessPool:
+        raise HTTPException(status_code=503, detail="Report parser unavailable, retry later")
+
+    if not parsed:
+        raise HTTPException(status_code=400, detail="Archive contains no .xml reports")
+
+    run = _create_run(db, meta)
+    store_junit_results(db, run, chain.from_iterable(testcases for _, testcases, _ in parsed))
+
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+def runs_stmt(project_id: int) -> Select:
+    return select(models.TestRun).where(models.TestRun.project_id == project_id)
+
+
+@router.get("", response_model=List[schemas.TestRunBase])
+async def list_test_runs(
+    project_id: int,
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    _etag=Depends(versions.conditional(versions.project_keys)),
+):
+    """
+    Keyset pagination (?limit=&cursor=, cursor berikutnya di header
+    X-Next-Cursor) atau stream NDJSON dengan Accept: application/x-ndjson.
+    ETag / If-None-Match: 304 selama project tidak berubah.
+    """
+    return await paginate(db, request, response, runs_stmt(project_id), models.TestRun, schemas.TestRunBase, page)
 
 
 @router.get("/{run_id}", response_model=schemas.TestRunBase)
-def get_test_run(run_id: int, db: Session = Depends(get_db)):
-    tr = db.query(models.TestRun).get(run_id)
+async def get_test_run(run_id: int, db: AsyncSession = Depends(get_async_db)):
+    tr = await db.get(models.TestRun, run_id)
     if not tr:
         raise HTTPException(status_code=404, detail="Test run not found")
     return tr
 
 
+def run_results_stmt(run_id: int) -> Select:
+    """Result satu run untuk /detail; dua kolom terakhir (id, body message) untuk decode_message."""
+    Result, Identity, Message = models.TestCaseResult, models.TestIdentity, models.FailureMessage
+    return (
+        select(
+            Result.id, Result.identity_id, Identity.name, Identity.classname,
+            Result.status, Result.duration, Message.id, Message.body,
+        )
+        .join(Identity, Identity.id == Result.identity_id)
+        .outerjoin(Message, Message.id == Result.message_id)
+        .where(Result.test_run_id == run_id)
+        .order_by(Result.id.asc())
+    )
+
+
+@router.get("/{run_id}/detail", response_model=schemas.TestRunDetail)
+async def get_test_run_detail(run_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Test run beserta semua result-nya (bisa puluhan ribu), diserialisasi
+    lewat fast path fastjson.
+    """
+    tr = (await db.execute(
+        select(*(getattr(models.TestRun, k) for k in fastjson.fields(schemas.TestRunBase)))
+        .where(models.TestRun.id == run_id)
+    )).first()
+    if not tr:
+        raise HTTPException(status_code=404, detail="Test run not found")
+
+    rows = await db.execute(run_results_stmt(run_id))
+    with fastjson.gc_paused():
+        detail = dict(zip(fastjson.fields(schemas.TestRunBase), tr))
+        detail["cases"] = fastjson.records(
+            (row[:6] + (decode_message(row[6], row[7]),) for row in rows),
+            fastjson.fields(schemas.TestCaseResultBase),
+        )
+        return fastjson.json_response(detail)
+
+
+@router.get("/{run_id}/export")
+async def export_test_run(
+    run_id: int,
+    fmt: str = Query("csv", alias="format", pattern=export.FORMAT_PATTERN),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Stream semua result run sebagai CSV, JUnit XML, atau Parquet (?format=),
+    lewat server-side cursor: memory konstan berapa pun jumlah result.
+    """
+    export.require_format(fmt)
+    tr = await db.get(models.TestRun, run_id)
+    if not tr:
+        raise HTTPException(status_code=404, detail="Test run not found")
+    return export.export_test_run(tr, fmt)
+
+
+def failure_clusters_stmt(run_id: int, limit: int) -> Select:
+    return (
+        select(models.FailureCluster)
+        .where(models.FailureCluster.test_run_id == run_id)
+        .order_by(models.FailureCluster.count.desc())
+        .limit(limit)
+    )
+
+
+def cluster_samples_stmt(run_id: int, cluster_ids: List[int], sample: int) -> Select:
+    """
+    `sample` contoh test pertama per cluster: nomor urut result per cluster
+    (window function) atas failure run ini.
+    """
+    Result, Identity, Member = models.TestCaseResult, models.TestIdentity, models.FailureClusterMessage
+    ranked = (
+        select(
+            Member.cluster_id, Identity.classname, Identity.name,
+            func.row_number().over(partition_by=Member.cluster_id, order_by=Result.id).label("n"),
+        )
+        .join(Result, Result.message_id == Member.message_id)
+        .join(Identity, Identity.id == Result.identity_id)
+        .where(Member.cluster_id.in_(cluster_ids), Result.test_run_id == run_id)
+        .subquery()
+    )
+    return (
+        select(ranked.c.cluster_id, ranked.c.classname, ranked.c.name)
+        .where(ranked.c.n <= sample)
+        .order_by(ranked.c.cluster_id, ranked.c.n)
+    )
+
+
+@router.get("/{run_id}/failure-clusters", response_model=List[schemas.FailureClusterBase])
+async def list_failure_clusters(
+    run_id: int,
+    limit: int = Query(50, ge=1, le=1000),
+    sample: int = Query(5, ge=0, le=100, description="Jumlah contoh test per cluster"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Failure run dikelompokkan per root cause (dihitung saat ingest),
+    cluster terbesar dulu.
+    """
+    if not await db.get(models.TestRun, run_id):
+        raise HTTPException(status_code=404, detail="Test run not found")
+
+    clusters = (await db.scalars(failure_clusters_stmt(run_id, limit))).all()
+
+    # contoh test semua cluster sekaligus, satu query per chunk id cluster
+    samples: Dict[int, List[str]] = {}
+    if sample:
+        for ids in chunked([cluster.id for cluster in clusters], IN_CLAUSE_CHUNK):
+            rows = await db.execute(cluster_samples_stmt(run_id, ids, sample))
+            for cluster_id, classname, name in rows:
+                samples.setdefault(cluster_id, []).append(f"{classname}.{name}" if classname else name)
+
+    response = []
+    for cluster in clusters:
+        example = cluster.example_message
+        response.append(schemas.FailureClusterBase(
+            id=cluster.id,
+            signature=cluster.signature,
+            count=cluster.count,
+            signatures=cluster.signatures,
+            example_message=decode_message(example.id, example.body) if example else None,
+            sample_tests=samples.get(cluster.id, []),
+        ))
+    return response
+
+
+def history_stmt(
+    identity_id: int,
+    project_id: Optional[int] = None,
+    branch: Optional[str] = None,
+    before_run_id: Optional[int] = None,
+    limit: int = 50,
+) -> Select:
+    Result, Run = models.TestCaseResult, models.TestRun
+    stmt = (
+        select(
+            Result.id.label("result_id"),
+            Result.test_run_id,
+            Run.name.label("run_name"),
+            Run.environment,
+            Run.branch,
+            Run.build,
+            Run.created_at,
+            Result.status,
+            Result.duration,
+            models.FailureMessage.id.label("message_id"),
+            models.FailureMessage.body.label("message_body"),
+        )
+        .join(Run, Run.id == Result.test_run_id)
+        .outerjoin(models.FailureMessage, models.FailureMessage.id == Result.message_id)
+        .where(Result.identity_id == identity_id)
+        .order_by(Result.test_run_id.desc())
+        .limit(limit)
+    )
+    if project_id is not None:
+        stmt = stmt.where(Run.project_id == project_id)
+    if branch is not None:
+        stmt = stmt.where(Run.branch == branch)
+    if before_run_id is not None:
+        stmt = stmt.where(Result.test_run_id < before_run_id)
+    return stmt
+
+
+@router.get("/tests/{identity_id}/history", response_model=schemas.TestHistory)
+async def get_test_history(
+    identity_id: int,
+    project_id: Optional[int] = Query(None, description="Optional: hanya run project ini"),
+    branch: Optional[str] = Query(None, description="Optional: hanya run branch ini"),
+    before_run_id: Optional[int] = Query(None, description="Halaman berikutnya: run id < nilai ini"),
+    limit: int = Query(50, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Riwayat satu test (identity_id dari result / utils.test_identity_id)
+    lintas run, terbaru dulu. Dilayani index (identity_id, test_run_id).
+    """
+    identity = await db.get(models.TestIdentity, identity_id)
+    if not identity:
+        raise HTTPException(status_code=404, detail="Test identity not found")
+
+    stmt = history_stmt(identity_id, project_id, branch, before_run_id, limit)
+    history = []
+    for row in (await db.execute(stmt)).mappings():
+        row = dict(row)
+        row["message"] = decode_message(row.pop("message_id"), row.pop("message_body"))
+        history.append(schemas.TestHistoryEntry(**row))
+    return schemas.TestHistory(identity=identity, history=history)
+
+
 # ==========================
 # ✅ EXECUTION CASES
 # ==========================
 
+def run_cases_stmt(run_id: int) -> Select:
+    """Kolom TestRunCaseBase lalu TestCaseBase (urutan fastjson.fields), urut id run case."""
+    RunCase, TestCase = models.TestRunCase, models.TestCase
+    return (
+        select(
+            *(getattr(RunCase, k) for k in fastjson.fields(schemas.TestRunCaseBase)),
+            *(getattr(TestCase, k) for k in fastjson.fields(schemas.TestCaseBase)),
+        )
+        .join(TestCase, TestCase.id == RunCase.test_case_id)
+        .where(RunCase.test_run_id == run_id)
+        .order_by(RunCase.id.asc())
+    )
+
+
 @router.get("/{run_id}/cases", response_model=List[schemas.TestRunCaseWithTestCase])
-def list_run_cases(run_id: int, db: Session = Depends(get_db)):
-    tr = db.query(models.TestRun).get(run_id)
+async def list_run_cases(
+    run_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    _etag=Depends(versions.conditional(versions.run_case_keys)),
+):
+    tr = await db.get(models.TestRun, run_id)
     if not tr:
         raise HTTPException(status_code=404, detail="Test run not found")
 
-    run_cases = (
-        db.query(models.TestRunCase)
-        .options(joinedload(models.TestRunCase.test_case))
-        .filter(models.TestRunCase.test_run_id == run_id)
-        .order_by(models.TestRunCase.id.asc())
-        .all()
+    # fast path: tuple Core -> orjson, tanpa object ORM / validasi per row
+    case_keys = fastjson.fields(schemas.TestRunCaseBase)
+    test_case_keys = fastjson.fields(schemas.TestCaseBase)
+    rows = await db.execute(run_cases_stmt(run_id))
+    with fastjson.gc_paused():
+        return fastjson.json_response(
+            fastjson.nested_records(rows, case_keys, "test_case", test_case_keys), response,
+        )
+
+
+# ==== COUNTER DELTA ==== #
+# Counter TestRun untuk eksekusi manual di-maintain incremental:
+# total += run case baru, dan setiap perubahan status memindahkan 1 dari
+# kolom status lama ke kolom status baru. Tidak pernah recount test_run_cases.
+
+def _counter_for(status: str) -> Optional[str]:
+    if status not in RUN_CASE_COUNTERS:
+        raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+    return RUN_CASE_COUNTERS[status]
+
+
+def _add_transition(deltas: Dict[int, Counter], run_id: int, old_status: str, new_status: str) -> None:
+    delta = deltas.setdefault(run_id, Counter())
+    old_col = RUN_CASE_COUNTERS.get(old_status)
+    new_col = _counter_for(new_status)
+    if old_col:
+        delta[old_col] -= 1
+    if new_col:
+        delta[new_col] += 1
+
+
+def _apply_counter_deltas(db: Session, deltas: Dict[int, Counter]) -> List[int]:
+    """
+    UPDATE test_runs SET kolom = kolom + delta, satu statement per run,
+    plus delta yang sama ke rollup trend. Return id run yang berubah.
+    """
+    changed = []
+    for run_id, delta in deltas.items():
+        values = {
+            col: func.coalesce(getattr(models.TestRun, col), 0) + n
+            for col, n in delta.items()
+            if n
+        }
+        if values:
+            db.execute(update(models.TestRun).where(models.TestRun.id == run_id).values(**values))
+            changed.append(run_id)
+    rollups.apply_test_run_deltas(db, {run_id: deltas[run_id] for run_id in changed})
+    return changed
+
+
+def _validate_case_ids(db: Session, tr: models.TestRun, case_ids: List[int]) -> None:
+    # Validate test cases belong to same project (1 query per chunk, bukan per item)
+    found = 0
+    for ids in chunked(case_ids, IN_CLAUSE_CHUNK):
+        found += db.scalar(
+            select(func.count()).where(
+                models.TestCase.id.in_(ids),
+                models.TestCase.project_id == tr.project_id,
+            )
+        )
+    if found != len(case_ids):
+        raise HTTPException(status_code=400, detail="Invalid test_case_id for this run")
+
+
+def run_cases_insert_stmt(db: Session, tr: models.TestRun, *filters):
+    """
+    INSERT ... SELECT test case project yang cocok dengan `filters`; yang
+    sudah ada di run di-skip oleh unique (test_run_id, test_case_id).
+    """
+    now = datetime.utcnow()
+    source = select(
+        literal(tr.id),
+        models.TestCase.id,
+        literal("untested"),
+        literal(now),
+        literal(now),
+    ).where(models.TestCase.project_id == tr.project_id, *filters)
+
+    return (
+        dialect_insert(db, models.TestRunCase)
+        .from_select(["test_run_id", "test_case_id", "status", "created_at", "updated_at"], source)
+        .on_conflict_do_nothing(index_elements=["test_run_id", "test_case_id"])
     )
-    return run_cases
+
+
+def _insert_run_cases(db: Session, tr: models.TestRun, *filters) -> int:
+    """Return jumlah run case yang benar-benar di-insert."""
+    return db.execute(run_cases_insert_stmt(db, tr, *filters)).rowcount
+
+
+def _insert_run_cases_by_ids(db: Session, tr: models.TestRun, case_ids: List[int], *filters) -> int:
+    inserted = 0
+    for ids in chunked(case_ids, IN_CLAUSE_CHUNK):
+        inserted += _insert_run_cases(db, tr, models.TestCase.id.in_(ids), *filters)
+    return inserted
+
+
+@router.post("/{run_id}/cases/generate", response_model=schemas.TestRunCaseGenerateResult)
+def generate_run_cases_by_filter(
+    run_id: int,
+    payload: schemas.TestRunCaseGenerate,
+    db: Session = Depends(get_db),
+):
+    """
+    Isi run dari filter (suite / priority / automation_type / daftar id)
+    dalam satu transaksi, tanpa query per test case.
+    """
+    tr = db.get(models.TestRun, run_id)
+    if not tr:
+        raise HTTPException(status_code=404, detail="Test run not found")
+
+    filters = []
+    if payload.suite_id is not None:
+        filters.append(models.TestCase.suite_id == payload.suite_id)
+    if payload.priority is not None:
+        filters.append(models.TestCase.priority == payload.priority)
+    if payload.automation_type is not None:
+        filters.append(models.TestCase.automation_type == payload.automation_type)
+
+    if payload.test_case_ids is not None:
+        case_ids = list(dict.fromkeys(payload.test_case_ids))
+        _validate_case_ids(db, tr, case_ids)
+        inserted = _insert_run_cases_by_ids(db, tr, case_ids, *filters)
+    else:
+        inserted = _insert_run_cases(db, tr, *filters)
+
+    _apply_counter_deltas(db, {run_id: Counter(total=inserted)})
+    versions.bump_test_runs(db, [run_id])
+    total_cases = db.scalar(
+        select(func.count()).where(models.TestRunCase.test_run_id == run_id)
+    )
+    db.commit()
+
+    return schemas.TestRunCaseGenerateResult(test_run_id=run_id, inserted=inserted, total_cases=total_cases)
 
 
 @router.post("/{run_id}/cases", response_model=List[schemas.TestRunCaseWithTestCase])
@@ -54,23 +504,11 @@ def generate_run_cases(run_id: int, payload: List[schemas.TestRunCaseCreate], db
     if not tr:
         raise HTTPException(status_code=404, detail="Test run not found")
 
-    # Validate test cases belong to same project
-    for item in payload:
-        tc = db.query(models.TestCase).get(item.test_case_id)
-        if not tc or tc.project_id != tr.project_id:
-            raise HTTPException(status_code=400, detail="Invalid test_case_id for this run")
-
-        exists = (
-            db.query(models.TestRunCase)
-            .filter(models.TestRunCase.test_run_id == run_id, models.TestRunCase.test_case_id == item.test_case_id)
-            .first()
-        )
-        if not exists:
-            db.add(models.TestRunCase(
-                test_run_id=run_id,
-                test_case_id=item.test_case_id,
-                status="untested"
-            ))
+    requested_ids = list(dict.fromkeys(item.test_case_id for item in payload))
+    _validate_case_ids(db, tr, requested_ids)
+    inserted = _insert_run_cases_by_ids(db, tr, requested_ids)
+    _apply_counter_deltas(db, {run_id: Counter(total=inserted)})
+    versions.bump_test_runs(db, [run_id])
 
     db.commit()
 
@@ -90,12 +528,70 @@ def update_run_case(run_case_id: int, payload: schemas.TestRunCaseUpdate, db: Se
     if not rc:
         raise HTTPException(status_code=404, detail="Run case not found")
 
+    deltas: Dict[int, Counter] = {}
+    _add_transition(deltas, rc.test_run_id, rc.status, payload.status)
+
     # Update
     rc.status = payload.status
     rc.comment = payload.comment
     rc.executed_at = datetime.utcnow()
     rc.updated_at = datetime.utcnow()
 
+    stats.refresh_test_runs(db, _apply_counter_deltas(db, deltas))
+    versions.bump_test_runs(db, [rc.test_run_id])
     db.commit()
     db.refresh(rc)
     return rc
+
+
+@router.put("/cases", response_model=schemas.TestRunCaseBatchResult)
+def update_run_cases(payload: List[schemas.TestRunCaseStatusUpdate], db: Session = Depends(get_db)):
+    """
+    Update status banyak run case (boleh lintas run) dalam satu transaksi.
+    Kalau run_case_id yang sama muncul lebih dari sekali, yang terakhir dipakai.
+    """
+    updates = {item.run_case_id: item for item in payload}
+    for item in updates.values():
+        _counter_for(item.status)
+
+    # status lama, dikunci sampai commit (FOR UPDATE; no-op di SQLite yang
+    # memang hanya punya satu writer)
+    current = {}
+    for ids in chunked(list(updates), IN_CLAUSE_CHUNK):
+        current.update(
+            (id_, (run_id, status))
+            for id_, run_id, status in db.execute(
+                select(models.TestRunCase.id, models.TestRunCase.test_run_id, models.TestRunCase.status)
+                .where(models.TestRunCase.id.in_(ids))
+                .with_for_update()
+            )
+        )
+    missing = sorted(set(updates) - set(current))
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Run case not found: {missing[:20]}")
+
+    now = datetime.utcnow()
+    deltas: Dict[int, Counter] = {}
+    rows = []
+    for id_, item in updates.items():
+        run_id, old_status = current[id_]
+        _add_transition(deltas, run_id, old_status, item.status)
+        rows.append({
+            "id": id_,
+            "status": item.status,
+            "comment": item.comment,
+            "executed_at": now,
+            "updated_at": now,
+        })
+
+    # ORM bulk UPDATE by primary key (executemany)
+    for batch in chunked(rows, IN_CLAUSE_CHUNK):
+        db.execute(update(models.TestRunCase), batch)
+
+    changed = _apply_counter_deltas(db, deltas)
+    stats.refresh_test_runs(db, changed)
+    versions.bump_test_runs(db, {run_id for run_id, _ in current.values()})
+    db.commit()
+
+    test_runs = db.scalars(select(models.TestRun).where(models.TestRun.id.in_(changed))).all() if changed else []
+    return schemas.TestRunCaseBatchResult(updated=len(rows), test_runs=test_runs)
@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 # ==== PROJECTS ==== #
@@ -24,6 +24,7 @@ class ProjectBase(BaseModel):
 
 class TestCaseResultBase(BaseModel):
     id: int
+    identity_id: int
     name: str
     classname: Optional[str]
     status: str
@@ -59,6 +60,152 @@ class TestRunDetail(TestRunBase):
     cases: List[TestCaseResultBase]
 
 
+class TestIdentityBase(BaseModel):
+    id: int
+    classname: Optional[str]
+    name: str
+
+    class Config:
+        from_attributes = True
+
+
+class TestHistoryEntry(BaseModel):
+    result_id: int
+    test_run_id: int
+    run_name: str
+    environment: Optional[str]
+    branch: Optional[str]
+    build: Optional[str]
+    created_at: datetime
+    status: str
+    duration: Optional[float]
+    message: Optional[str]
+
+
+class TestHistory(BaseModel):
+    identity: TestIdentityBase
+    history: List[TestHistoryEntry]  # run terbaru dulu
+
+
+class FailureClusterBase(BaseModel):
+    id: int
+    signature: str
+    count: int
+    signatures: int
+    example_message: Optional[str]
+    sample_tests: List[str]  # "classname.name", maksimal `sample` test
+
+
+class FlakyTest(BaseModel):
+    identity_id: int
+    classname: Optional[str]
+    name: str
+    branch: str
+    runs: int
+    failures: int
+    failure_rate: float
+    flip_rate: float
+    score: float
+    last_status: Optional[str]
+    last_run_id: Optional[int]
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class TestTrendPoint(BaseModel):
+    period_start: date
+    runs: int
+    total: int
+    passed: int
+    failed: int
+    skipped: int
+    pass_rate: Optional[float]
+
+
+class LoadTrendPoint(BaseModel):
+    period_start: date
+    runs: int
+    total_requests: int
+    total_failures: int
+    failure_rate: Optional[float]
+    avg_response_time: Optional[float]
+    p95_response_time: Optional[float]
+    p99_response_time: Optional[float]
+    requests_per_second: Optional[float]
+
+
+class ProjectTrends(BaseModel):
+    project_id: int
+    granularity: str
+    start: date
+    end: date
+    environment: Optional[str]
+    branch: Optional[str]
+    test_runs: List[TestTrendPoint]
+    load_runs: List[LoadTrendPoint]
+
+
+class TestDurationStats(BaseModel):
+    identity_id: int
+    classname: Optional[str]
+    name: str
+    runs: int
+    median: float
+    p90: float
+    mean: float
+    total_duration: float
+    share: float
+    slope: float  # detik per run
+    trend_delta: float  # perkiraan kenaikan durasi sepanjang window (detik)
+
+
+class DurationReport(BaseModel):
+    project_id: int
+    since: datetime
+    environment: Optional[str]
+    branch: Optional[str]
+    runs: int
+    results: int
+    total_duration: float
+    tests: List[TestDurationStats]
+
+
+class TestRef(BaseModel):
+    classname: Optional[str] = None
+    name: str
+
+
+class TestPlanRequest(BaseModel):
+    tests: List[TestRef] = []
+    identity_ids: List[int] = []
+    shards: int = Field(1, ge=1, le=256)
+
+
+class PlannedTest(BaseModel):
+    identity_id: int
+    classname: Optional[str]
+    name: Optional[str]
+    expected_duration: float
+    failure_probability: float
+    known: bool  # False = belum ada history, pakai default
+
+
+class TestShard(BaseModel):
+    index: int
+    expected_duration: float
+    tests: List[PlannedTest]
+
+
+class TestPlan(BaseModel):
+    project_id: int
+    total_expected_duration: float
+    makespan: float  # durasi shard terlama
+    order: List[PlannedTest]
+    shards: List[TestShard]
+
+
 class RobotRunMeta(BaseModel):
     project_id: int
     name: str = "robot-run"
@@ -70,6 +217,32 @@ class RobotRunMeta(BaseModel):
 
 # ==== LOAD TEST RUNS ==== #
 
+class MetricComparison(BaseModel):
+    metric: str
+    value: Optional[float]
+    baseline_median: Optional[float]
+    baseline_mad: Optional[float]
+    baseline_runs: int
+    delta: Optional[float]
+    delta_pct: Optional[float]
+    score: Optional[float]
+    regressed: bool
+
+    class Config:
+        from_attributes = True
+
+
+class LoadRunComparison(BaseModel):
+    load_run_id: int
+    status: str
+    baseline_runs: int
+    created_at: datetime
+    metrics: List[MetricComparison]
+
+    class Config:
+        from_attributes = True
+
+
 class LoadTestRunBase(BaseModel):
     id: int
     project_id: int
@@ -122,6 +295,62 @@ class LocustRunPayload(BaseModel):
     extra: Optional[Dict[str, Any]] = None
 
 
+class LocustWorkerSamples(BaseModel):
+    worker: Optional[str] = None
+    # response time mentah (ms), termasuk request yang gagal
+    samples: Optional[List[float]] = None
+    # atau histogram {response_time_ms: jumlah}, format `response_times` Locust
+    response_times: Optional[Dict[float, int]] = None
+    failures: int = 0
+
+
+class LocustRawPayload(BaseModel):
+    project_id: int
+    name: str = "locust-run"
+    environment: Optional[str] = None
+    build: Optional[str] = None
+    branch: Optional[str] = None
+    triggered_by: Optional[str] = None
+
+    duration_seconds: float
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    success_threshold_met: Optional[bool] = None
+
+    workers: List[LocustWorkerSamples]
+
+
+class LatencyPercentiles(BaseModel):
+    load_run_ids: List[int]
+    worker: Optional[str] = None
+    count: int
+    min_response_time: Optional[float]
+    max_response_time: Optional[float]
+    avg_response_time: Optional[float]
+    percentiles: Dict[str, Optional[float]]
+
+
+class LoadSeriesInfo(BaseModel):
+    metric: str
+    points: int
+
+    class Config:
+        from_attributes = True
+
+
+class LoadSeriesPoints(BaseModel):
+    load_run_id: int
+    metric: str
+    mode: str
+    source_points: int
+    timestamps: List[int]
+    # mode lttb -> values; mode minmax/avg -> min/max/avg per bucket
+    values: Optional[List[float]] = None
+    min: Optional[List[float]] = None
+    max: Optional[List[float]] = None
+    avg: Optional[List[float]] = None
+
+
 # ==== DASHBOARD SUMMARY ==== #
 
 class ProjectSummary(BaseModel):
@@ -207,6 +436,11 @@ class TestCaseBase(BaseModel):
         from_attributes = True
 
 
+class TestCaseSearchHit(TestCaseBase):
+    snippet: Optional[str] = None  # potongan teks ter-escape HTML dengan <mark>...</mark>
+    score: Optional[float] = None  # makin besar makin relevan
+
+
 # ============================
 # ✅ Execution: TestRunCase
 # ============================
@@ -229,11 +463,37 @@ class TestRunCaseCreate(BaseModel):
     test_case_id: int
 
 
+class TestRunCaseGenerate(BaseModel):
+    """
+    Filter test case (dalam project run) yang dimasukkan ke run. Semua filter
+    di-AND; tanpa filter = semua test case di project.
+    """
+    suite_id: Optional[int] = None
+    priority: Optional[str] = None
+    automation_type: Optional[str] = None
+    test_case_ids: Optional[List[int]] = None
+
+
+class TestRunCaseGenerateResult(BaseModel):
+    test_run_id: int
+    inserted: int  # run case baru (yang sudah ada di-skip)
+    total_cases: int  # jumlah run case di run setelah generate
+
+
 class TestRunCaseUpdate(BaseModel):
     status: str
     comment: Optional[str] = None
 
 
+class TestRunCaseStatusUpdate(TestRunCaseUpdate):
+    run_case_id: int
+
+
+class TestRunCaseBatchResult(BaseModel):
+    updated: int
+    test_runs: List[TestRunBase]  # run yang counternya berubah
+
+
 class TestRunCaseWithTestCase(TestRunCaseBase):
     test_case: TestCaseBase
 
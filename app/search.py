@@ -0,0 +1,148 @@
+"""
+Full-text search test case.
+
+SQLite: tabel FTS5 test_cases_fts (rowid = test_cases.id) berisi salinan
+title/preconditions/steps/expected_result, di-sync oleh route test case
+lewat index_case / remove_case dalam transaksi yang sama. Ranking bm25
+dengan bobot title lebih tinggi, plus snippet dari kolom yang paling cocok.
+
+Dialect lain: fallback LIKE per kata (tanpa ranking dan snippet).
+"""
+import html
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import DDL, and_, event, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import models
+
+FTS_TABLE = "test_cases_fts"
+FTS_COLUMNS = ("title", "preconditions", "steps", "expected_result")
+
+# prefix='2 3': index prefix supaya "login*" tidak perlu scan seluruh term
+FTS_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{', '.join(FTS_COLUMNS)}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+
+# create_all / drop_all ikut membuat / membuang tabel FTS (hanya SQLite)
+event.listen(models.TestCase.__table__, "after_create", DDL(FTS_DDL).execute_if(dialect="sqlite"))
+event.listen(
+    models.TestCase.__table__, "before_drop", DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite"),
+)
+
+# bobot bm25 per kolom (urutan FTS_COLUMNS)
+_WEIGHTS = "10.0, 2.0, 1.0, 1.0"
+SNIPPET_TOKENS = 12
+SNIPPET_OPEN, SNIPPET_CLOSE = "<mark>", "</mark>"
+# snippet() SQLite menandai term dengan karakter kontrol ini; teks test case
+# di-escape dulu, baru penanda diganti tag <mark> (teks tersimpan bisa berisi HTML)
+_SENTINEL_OPEN, _SENTINEL_CLOSE = "\x02", "\x03"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_enabled(db) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def match_query(q: str) -> Optional[str]:
+    """
+    Input user -> query FTS5: setiap kata jadi prefix term ("kata"*) dan
+    semuanya harus cocok. Operator/sintaks FTS dari user tidak diteruskan.
+    """
+    words = _WORD.findall(q)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def index_case(db: Session, case: models.TestCase) -> None:
+    """Insert / replace entry test case (case sudah di-flush). Panggil sebelum commit."""
+    if not fts_enabled(db):
+        return
+    remove_case(db, case.id)
+    db.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) "
+            f"VALUES (:id, {', '.join(':' + col for col in FTS_COLUMNS)})"
+        ),
+        {"id": case.id, **{col: getattr(case, col) for col in FTS_COLUMNS}},
+    )
+
+
+def remove_case(db: Session, case_id: int) -> None:
+    if not fts_enabled(db):
+        return
+    db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": case_id})
+
+
+def rebuild(conn) -> None:
+    """Isi ulang seluruh index dari test_cases (migration)."""
+    conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    conn.execute(text(
+        f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) "
+        f"SELECT id, {', '.join(FTS_COLUMNS)} FROM test_cases"
+    ))
+
+
+async def search_cases(
+    db: AsyncSession,
+    project_id: int,
+    q: str,
+    suite_id: Optional[int],
+    limit: int,
+    offset: int,
+) -> List[Tuple[models.TestCase, Optional[str], Optional[float]]]:
+    """Return [(case, snippet, score)] terurut dari yang paling relevan."""
+    if not fts_enabled(db):
+        return await _search_like(db, project_id, q, suite_id, limit, offset)
+
+    sql = (
+        f"SELECT f.rowid, snippet({FTS_TABLE}, -1, :open, :close, '…', :tokens), "
+        f"bm25({FTS_TABLE}, {_WEIGHTS}) AS score "
+        f"FROM {FTS_TABLE} f JOIN test_cases c ON c.id = f.rowid "
+        f"WHERE {FTS_TABLE} MATCH :q AND c.project_id = :project_id "
+    )
+    params = {
+        "q": match_query(q), "project_id": project_id, "limit": limit, "offset": offset,
+        "open": _SENTINEL_OPEN, "close": _SENTINEL_CLOSE, "tokens": SNIPPET_TOKENS,
+    }
+    if suite_id is not None:
+        sql += "AND c.suite_id = :suite_id "
+        params["suite_id"] = suite_id
+    sql += "ORDER BY score, f.rowid LIMIT :limit OFFSET :offset"
+
+    hits = (await db.execute(text(sql), params)).all()
+    if not hits:
+        return []
+    cases = {
+        case.id: case
+        for case in await db.scalars(select(models.TestCase).where(models.TestCase.id.in_([h[0] for h in hits])))
+    }
+    # bm25 makin kecil makin relevan; dibalik supaya score besar = relevan
+    return [(cases[case_id], _render_snippet(snippet), -score) for case_id, snippet, score in hits if case_id in cases]
+
+
+def _render_snippet(snippet: Optional[str]) -> Optional[str]:
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_SENTINEL_OPEN, SNIPPET_OPEN).replace(_SENTINEL_CLOSE, SNIPPET_CLOSE)
+
+
+async def _search_like(db, project_id, q, suite_id, limit, offset):
+    TestCase = models.TestCase
+    words = _WORD.findall(q)
+    stmt = select(TestCase).where(
+        TestCase.project_id == project_id,
+        and_(*(
+            or_(*(getattr(TestCase, col).ilike(f"%{word}%") for col in FTS_COLUMNS))
+            for word in words
+        )),
+    )
+    if suite_id is not None:
+        stmt = stmt.where(TestCase.suite_id == suite_id)
+    stmt = stmt.order_by(TestCase.created_at.desc(), TestCase.id.desc()).limit(limit).offset(offset)
+    return [(case, None, None) for case in await db.scalars(stmt)]
@@ -0,0 +1,204 @@
+import math
+import struct
+import zlib
+from typing import Dict, Iterable, Mapping, Optional
+
+import numpy as np
+
+# Error relatif maksimum setiap percentile (1%)
+RELATIVE_ACCURACY = 0.01
+
+# Nilai <= MIN_VALUE (ms) masuk ke "zero bucket"
+MIN_VALUE = 1e-3
+
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<BdqqdddI")
+
+
+class LatencySketch:
+    """
+    Quantile sketch ala DDSketch untuk response time (ms).
+
+    Setiap nilai v masuk ke bucket ceil(log_gamma(v)), gamma = (1+a)/(1-a),
+    sehingga percentile apa pun punya error relatif <= a. Sketch bisa di-merge
+    (jumlahkan count per bucket), jadi percentile gabungan beberapa worker /
+    run dihitung dalam O(jumlah bucket) tanpa membaca ulang sample mentah.
+
+    Sample NaN / inf dibuang (tidak dihitung di count, sum, min/max): log-nya
+    tidak punya bucket yang valid.
+    """
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    # ---- insert ---- #
+
+    def add(self, value: float, count: int = 1) -> None:
+        if count <= 0 or not math.isfinite(value):
+            return
+        if value <= MIN_VALUE:
+            self.zero_count += count
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.count += count
+        self.sum += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def add_many(self, values: Iterable[float]) -> None:
+        """
+        Tambah banyak sample sekaligus (vectorized, tanpa loop per sample).
+        """
+        arr = np.asarray(values if isinstance(values, np.ndarray) else list(values), dtype=np.float64)
+        arr = arr[np.isfinite(arr)]
+        if arr.size == 0:
+            return
+
+        small = arr <= MIN_VALUE
+        self.zero_count += int(small.sum())
+        keys = np.ceil(np.log(arr[~small]) / self._log_gamma).astype(np.int64)
+        uniq, counts = np.unique(keys, return_counts=True)
+        for key, cnt in zip(uniq.tolist(), counts.tolist()):
+            self.buckets[key] = self.buckets.get(key, 0) + cnt
+
+        self.count += int(arr.size)
+        self.sum += float(arr.sum())
+        self.min = min(self.min, float(arr.min()))
+        self.max = max(self.max, float(arr.max()))
+
+    def add_histogram(self, histogram: Mapping[float, int]) -> None:
+        """
+        Tambah histogram {response_time: jumlah}, mis. `response_times`
+        dari stats JSON Locust.
+        """
+        for value, count in histogram.items():
+            self.add(float(value), int(count))
+
+    def merge(self, other: "LatencySketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    # ---- query ---- #
+
+    @property
+    def avg(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        q dalam 0..1. Return None kalau sketch kosong.
+        """
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return self.min
+
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def percentiles(self, ps: Iterable[float]) -> Dict[str, Optional[float]]:
+        """
+        ps dalam persen (mis. [50, 95, 99.9]); key hasil = "p50", "p95", "p99.9".
+        """
+        return {f"p{p:g}": self.quantile(p / 100.0) for p in ps}
+
+    # ---- persistence ---- #
+
+    def to_bytes(self) -> bytes:
+        keys = np.fromiter(sorted(self.buckets), dtype=np.int64, count=len(self.buckets))
+        counts = np.fromiter((self.buckets[k] for k in keys.tolist()), dtype=np.int64, count=len(keys))
+        # key berurutan -> delta kecil, ter-compress jauh lebih baik
+        deltas = np.diff(keys, prepend=0) if len(keys) else keys
+        header = _HEADER.pack(
+            _FORMAT_VERSION,
+            self.relative_accuracy,
+            self.zero_count,
+            self.count,
+            self.sum,
+            self.min if self.count else 0.0,
+            self.max if self.count else 0.0,
+            len(keys),
+        )
+        return zlib.compress(header + deltas.astype("<i4").tobytes() + counts.astype("<i8").tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "LatencySketch":
+        raw = zlib.decompress(data)
+        version, accuracy, zero_count, count, total, vmin, vmax, n = _HEADER.unpack_from(raw)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported sketch format version {version}")
+
+        offset = _HEADER.size
+        deltas = np.frombuffer(raw, dtype="<i4", count=n, offset=offset)
+        counts = np.frombuffer(raw, dtype="<i8", count=n, offset=offset + 4 * n)
+        keys = np.cumsum(deltas.astype(np.int64))
+
+        sketch = cls(accuracy)
+        sketch.buckets = dict(zip(keys.tolist(), counts.tolist()))
+        sketch.zero_count = zero_count
+        sketch.count = count
+        sketch.sum = total
+        if count:
+            sketch.min = vmin
+            sketch.max = vmax
+        return sketch
+
+
+def sketch_from_percentiles(
+    count: int,
+    min_value: float,
+    percentiles: Mapping[float, float],
+) -> LatencySketch:
+    """
+    Rekonstruksi (aproksimasi) sketch dari baris stats CSV Locust yang hanya
+    berisi count, min, dan kolom percentile (50%, 66%, ..., 100%).
+
+    Massa di antara dua percentile berurutan ditaruh di nilai percentile atas,
+    jadi hasilnya tidak pernah lebih optimis dari data aslinya.
+    """
+    sketch = LatencySketch()
+    if count <= 0:
+        return sketch
+    if not percentiles:
+        sketch.add(min_value, count)
+        return sketch
+
+    sketch.add(min_value, 1)
+    remaining = count - 1
+    placed = 0
+    prev = 0.0
+    for p in sorted(percentiles):
+        upto = round(remaining * p / 100.0)
+        sketch.add(percentiles[p], upto - placed)
+        placed = upto
+        prev = p
+    if placed < remaining:
+        sketch.add(percentiles[prev], remaining - placed)
+    return sketch
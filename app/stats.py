@@ -0,0 +1,88 @@
+import os
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .bulk import dialect_insert
+from .cache import TTLCache, invalidate_on_commit
+
+PROJECT_SUMMARY_CACHE_SIZE = int(os.getenv("PROJECT_SUMMARY_CACHE_SIZE", "1024"))
+PROJECT_SUMMARY_CACHE_TTL = float(os.getenv("PROJECT_SUMMARY_CACHE_TTL", "30"))
+
+# project_id -> schemas.ProjectSummary
+_summary_cache = TTLCache(maxsize=PROJECT_SUMMARY_CACHE_SIZE, ttl=PROJECT_SUMMARY_CACHE_TTL)
+
+
+def pass_rate(run: models.TestRun) -> Optional[float]:
+    if run.total and run.total > 0:
+        return (run.passed / run.total) * 100.0
+    return None
+
+
+def _upsert(db: Session, project_id: int, values: dict) -> None:
+    values = {**values, "updated_at": datetime.utcnow()}
+    stmt = dialect_insert(db, models.ProjectStats).values(project_id=project_id, **values)
+    db.execute(stmt.on_conflict_do_update(index_elements=["project_id"], set_=values))
+    invalidate_on_commit(db, _summary_cache, project_id)
+
+
+def record_test_run(db: Session, run: models.TestRun) -> None:
+    """
+    Panggil di ingest route setelah counter run terisi (sebelum commit).
+    Run baru selalu menjadi "last test run" project-nya.
+    """
+    _upsert(db, run.project_id, {
+        "last_test_run_id": run.id,
+        "overall_pass_rate": pass_rate(run),
+    })
+
+
+def refresh_test_runs(db: Session, run_ids) -> None:
+    """
+    Panggil setelah counter run berubah (update status run case). Hanya
+    project yang last test run-nya ada di `run_ids` yang di-update.
+    """
+    rows = db.execute(
+        select(models.ProjectStats.project_id, models.TestRun)
+        .join(models.TestRun, models.ProjectStats.last_test_run_id == models.TestRun.id)
+        .where(models.TestRun.id.in_(list(run_ids)))
+        .execution_options(populate_existing=True)
+    )
+    for project_id, run in rows:
+        _upsert(db, project_id, {"overall_pass_rate": pass_rate(run)})
+
+
+def record_load_run(db: Session, run: models.LoadTestRun) -> None:
+    _upsert(db, run.project_id, {
+        "last_load_run_id": run.id,
+        "last_load_failure_rate": run.failure_rate,
+    })
+
+
+async def get_project_summary(db: AsyncSession, project_id: int) -> Optional[schemas.ProjectSummary]:
+    """
+    Cache hit: tanpa query DB. Cache miss: project + project_stats (2 lookup
+    by primary key). Return None kalau project tidak ada.
+    """
+    summary = _summary_cache.get(project_id)
+    if summary is not None:
+        return summary
+
+    project = await db.get(models.Project, project_id)
+    if not project:
+        return None
+
+    stats = await db.get(models.ProjectStats, project_id)
+    summary = schemas.ProjectSummary(
+        project=project,
+        last_test_run=stats.last_test_run if stats else None,
+        last_load_run=stats.last_load_run if stats else None,
+        overall_pass_rate=stats.overall_pass_rate if stats else None,
+        last_load_failure_rate=stats.last_load_failure_rate if stats else None,
+    )
+    _summary_cache.set(project_id, summary)
+    return summary
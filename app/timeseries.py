@@ -0,0 +1,112 @@
+import zlib
+from typing import Tuple
+
+import numpy as np
+
+# Metric yang diambil dari baris "Aggregated" di <prefix>_stats_history.csv
+HISTORY_METRICS = {
+    "users": "User Count",
+    "rps": "Requests/s",
+    "failures_per_s": "Failures/s",
+    "p50": "50%",
+    "p95": "95%",
+    "p99": "99%",
+    "avg_response_time": "Total Average Response Time",
+}
+
+DOWNSAMPLE_MODES = ("lttb", "minmax", "avg")
+
+
+# ==== ENCODING ==== #
+
+def encode_timestamps(ts: np.ndarray) -> bytes:
+    """
+    Timestamp (int64, detik/ms) -> delta-encoded + zlib. Sampling interval
+    yang konstan menjadi deret angka identik yang ter-compress hampir nol.
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    deltas = np.diff(ts, prepend=np.int64(0))
+    return zlib.compress(deltas.astype("<i8").tobytes())
+
+
+def decode_timestamps(data: bytes) -> np.ndarray:
+    deltas = np.frombuffer(zlib.decompress(data), dtype="<i8")
+    return np.cumsum(deltas)
+
+
+def encode_values(values: np.ndarray) -> bytes:
+    """
+    float64 -> byte-shuffle (byte ke-k dari semua nilai dikelompokkan) + zlib.
+    Byte exponent/sign yang mirip jadi berdampingan, sehingga compress jauh
+    lebih baik dibanding float mentah.
+    """
+    arr = np.ascontiguousarray(values, dtype="<f8")
+    shuffled = arr.view(np.uint8).reshape(-1, 8).T
+    return zlib.compress(shuffled.tobytes())
+
+
+def decode_values(data: bytes) -> np.ndarray:
+    raw = np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+    return raw.reshape(8, -1).T.copy().view("<f8").ravel()
+
+
+# ==== DOWNSAMPLING ==== #
+
+def _bucket_edges(n: int, buckets: int) -> np.ndarray:
+    return np.linspace(0, n, buckets + 1).astype(np.int64)
+
+
+def downsample_buckets(ts: np.ndarray, values: np.ndarray, points: int) -> Tuple[np.ndarray, ...]:
+    """
+    Bagi deret menjadi `points` bucket berurutan (jumlah sample sama), return
+    (timestamp awal bucket, min, max, avg). Vectorized dengan reduceat.
+    """
+    n = len(values)
+    if n <= points:
+        return ts, values, values, values
+
+    starts = _bucket_edges(n, points)[:-1]
+    sizes = np.diff(_bucket_edges(n, points))
+    return (
+        ts[starts],
+        np.minimum.reduceat(values, starts),
+        np.maximum.reduceat(values, starts),
+        np.add.reduceat(values, starts) / sizes,
+    )
+
+
+def lttb(ts: np.ndarray, values: np.ndarray, points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets: pilih `points` titik yang mempertahankan
+    bentuk visual kurva (spike tetap terlihat). Titik pertama & terakhir selalu
+    ikut.
+    """
+    n = len(values)
+    if points >= n or points < 3:
+        return ts, values
+
+    x = ts.astype(np.float64)
+    edges = _bucket_edges(n - 2, points - 2) + 1
+    selected = np.empty(points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    prev = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        # rata-rata bucket berikutnya (atau titik terakhir)
+        if i + 2 < len(edges):
+            nxt_start, nxt_end = edges[i + 1], edges[i + 2]
+        else:
+            nxt_start, nxt_end = n - 1, n
+        avg_x = x[nxt_start:nxt_end].mean()
+        avg_y = values[nxt_start:nxt_end].mean()
+
+        area = np.abs(
+            (x[prev] - avg_x) * (values[start:end] - values[prev])
+            - (x[prev] - x[start:end]) * (avg_y - values[prev])
+        )
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+
+    return ts[selected], values[selected]
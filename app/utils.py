@@ -1,6 +1,171 @@
-from typing import List, Tuple, Optional
+import csv
+import gzip
+import hashlib
+import io
+import os
+import tarfile
+import zipfile
+import zlib
+from typing import BinaryIO, Dict, Iterator, List, Tuple, Optional, Union
 from lxml import etree
 
+# Ukuran potongan yang dibaca dari upload per iterasi parser (1 MB)
+CHUNK_SIZE = 1024 * 1024
+
+
+def new_summary() -> dict:
+    return {
+        "total": 0,
+        "passed": 0,
+        "failed": 0,
+        "skipped": 0,
+    }
+
+
+def count_status(summary: dict, status: str) -> None:
+    """
+    Tambahkan satu testcase ke summary. "error" dihitung sebagai failed.
+    """
+    summary["total"] += 1
+    if status == "passed":
+        summary["passed"] += 1
+    elif status in ("failed", "error"):
+        summary["failed"] += 1
+    elif status == "skipped":
+        summary["skipped"] += 1
+
+
+# TestRunCase.status (eksekusi manual) -> kolom counter TestRun.
+# "untested" tidak menambah counter apa pun; "blocked" dihitung failed.
+RUN_CASE_COUNTERS = {
+    "untested": None,
+    "passed": "passed",
+    "failed": "failed",
+    "blocked": "failed",
+    "skipped": "skipped",
+}
+
+
+def run_status(summary: dict) -> str:
+    """
+    Turunkan TestRun.status (passed/failed/mixed/unknown) dari summary.
+    """
+    if summary["total"] == 0:
+        return "unknown"
+    if summary["failed"] == 0:
+        return "passed"
+    if summary["passed"] == 0:
+        return "failed"
+    return "mixed"
+
+
+def _iter_chunks(source: Union[bytes, BinaryIO], chunk_size: int) -> Iterator[bytes]:
+    if isinstance(source, (bytes, bytearray)):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+        return
+
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+# 53 bit: masih aman sebagai number di JSON / JavaScript dashboard
+IDENTITY_ID_BITS = 53
+
+
+def test_identity_id(classname: Optional[str], name: str) -> int:
+    """
+    Id stabil untuk pasangan (classname, name): blake2b dipotong ke 53 bit.
+    Dihitung lokal, jadi ingest tidak perlu lookup ke DB untuk tahu id-nya.
+
+    classname None dan "" dianggap sama (JUnit tanpa atribut classname vs
+    classname kosong = test yang sama); ingest menyimpannya sebagai NULL.
+    """
+    key = f"{classname or ''}\x1f{name}".encode()
+    digest = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+    return digest >> (64 - IDENTITY_ID_BITS)
+
+
+def _testcase_to_dict(tc) -> dict:
+    name = tc.get("name") or "unnamed"
+    classname = tc.get("classname")
+    time_str = tc.get("time")
+    duration = float(time_str) if time_str is not None else None
+
+    status = "passed"
+    message: Optional[str] = None
+
+    failure = tc.find("failure")
+    error = tc.find("error")
+    skipped_el = tc.find("skipped")
+
+    if failure is not None:
+        status = "failed"
+        message = (failure.get("message") or "") + "\n" + (failure.text or "")
+    elif error is not None:
+        status = "error"
+        message = (error.get("message") or "") + "\n" + (error.text or "")
+    elif skipped_el is not None:
+        status = "skipped"
+        message = (skipped_el.get("message") or "") + "\n" + (skipped_el.text or "")
+
+    return {
+        "name": name,
+        "classname": classname,
+        "status": status,
+        "duration": duration,
+        "message": message.strip() if message else None,
+    }
+
+
+def iter_junit_xml(
+    source: Union[bytes, BinaryIO],
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[dict]:
+    """
+    Versi streaming dari parse_junit_xml.
+
+    `source` boleh bytes atau file-like (mis. UploadFile.file). Dokumen dibaca
+    per `chunk_size` byte, setiap <testcase> di-yield begitu tag penutupnya
+    terbaca, lalu elemennya di-clear supaya memory tetap datar berapa pun
+    ukuran report-nya.
+
+    Aturan suite sama dengan parse_junit_xml: root <testsuites> -> testcase di
+    semua <testsuite> (nested juga), root <testsuite> -> hanya testcase
+    langsung di bawah root.
+    """
+    parser = etree.XMLPullParser(
+        events=("end",),
+        tag="testcase",
+        huge_tree=True,
+        resolve_entities=False,
+    )
+
+    def drain():
+        for _, tc in parser.read_events():
+            parent = tc.getparent()
+            root = tc.getroottree().getroot()
+            if parent is not None and parent.tag == "testsuite" and (
+                root.tag == "testsuites" or parent is root
+            ):
+                yield _testcase_to_dict(tc)
+
+            # buang elemen yang sudah diproses (+ sibling sebelumnya)
+            tc.clear(keep_tail=False)
+            if parent is not None:
+                while tc.getprevious() is not None:
+                    del parent[0]
+
+    for chunk in _iter_chunks(source, chunk_size):
+        parser.feed(chunk)
+        yield from drain()
+
+    parser.close()
+    yield from drain()
+
 
 def parse_junit_xml(xml_bytes: bytes) -> Tuple[List[dict], dict]:
     """
@@ -21,63 +186,174 @@ def parse_junit_xml(xml_bytes: bytes) -> Tuple[List[dict], dict]:
             "skipped": int,
         }
     """
-    root = etree.fromstring(xml_bytes)
-
     testcases = []
-    total = passed = failed = skipped = 0
-
-    # handle <testsuite> inside <testsuites> or directly
-    if root.tag == "testsuites":
-        suites = root.findall(".//testsuite")
-    elif root.tag == "testsuite":
-        suites = [root]
-    else:
-        suites = []
-
-    for suite in suites:
-        for tc in suite.findall("testcase"):
-            total += 1
-            name = tc.get("name") or "unnamed"
-            classname = tc.get("classname")
-            time_str = tc.get("time")
-            duration = float(time_str) if time_str is not None else None
-
-            status = "passed"
-            message: Optional[str] = None
-
-            failure = tc.find("failure")
-            error = tc.find("error")
-            skipped_el = tc.find("skipped")
-
-            if failure is not None:
-                status = "failed"
-                message = (failure.get("message") or "") + "\n" + (failure.text or "")
-                failed += 1
-            elif error is not None:
-                status = "error"
-                message = (error.get("message") or "") + "\n" + (error.text or "")
-                failed += 1
-            elif skipped_el is not None:
-                status = "skipped"
-                message = (skipped_el.get("message") or "") + "\n" + (skipped_el.text or "")
-                skipped += 1
-            else:
-                passed += 1
-
-            testcases.append(
-                {
-                    "name": name,
-                    "classname": classname,
-                    "status": status,
-                    "duration": duration,
-                    "message": message.strip() if message else None,
-                }
-            )
-
-    summary = {
-        "total": total,
-        "passed": passed,
-        "failed": failed,
-        "skipped": skipped,
-    }
+    summary = new_summary()
+
+    for tc in iter_junit_xml(xml_bytes):
+        count_status(summary, tc["status"])
+        testcases.append(tc)
+
     return testcases, summary
+
+
+def parse_junit_report(xml_bytes: bytes) -> Tuple[List[dict], dict]:
+    """
+    parse_junit_xml untuk dipanggil di process pool: XMLSyntaxError tidak bisa
+    di-pickle balik ke parent, jadi diubah menjadi ValueError.
+    """
+    try:
+        return parse_junit_xml(xml_bytes)
+    except etree.XMLSyntaxError as exc:
+        raise ValueError(f"Invalid JUnit XML: {exc}") from None
+
+
+# Batas archive upload (zip bomb): jumlah entry, ukuran satu report setelah
+# dekompresi, dan total ukuran semua report (semuanya ditahan di memory
+# sampai selesai di-parse).
+ARCHIVE_MAX_MEMBERS = int(os.getenv("ARCHIVE_MAX_MEMBERS", "10000"))
+ARCHIVE_MAX_MEMBER_BYTES = int(os.getenv("ARCHIVE_MAX_MEMBER_BYTES", str(256 * 1024 * 1024)))
+ARCHIVE_MAX_TOTAL_BYTES = int(os.getenv("ARCHIVE_MAX_TOTAL_BYTES", str(1024 * 1024 * 1024)))
+
+# Error baca archive rusak / terpotong (termasuk saat membaca isi member)
+_ARCHIVE_ERRORS = (zipfile.BadZipFile, zlib.error, EOFError, tarfile.TarError, gzip.BadGzipFile)
+
+
+def iter_archive_reports(fileobj: BinaryIO) -> Iterator[Tuple[str, bytes]]:
+    """
+    Baca .zip atau .tar(.gz) berisi banyak JUnit XML (mis. satu per shard CI).
+
+    Yield (nama member, isi bytes) untuk setiap file *.xml. Raise ValueError
+    kalau bukan zip/tar yang valid, atau archive-nya rusak / terpotong.
+    """
+    try:
+        yield from _iter_archive_members(fileobj)
+    except _ARCHIVE_ERRORS as exc:
+        raise ValueError(f"corrupt or truncated archive ({exc})") from exc
+
+
+class _ArchiveBudget:
+    """Cek batas archive SEBELUM isi member dibaca (ukuran dari header)."""
+
+    def __init__(self):
+        self.members = 0
+        self.total = 0
+
+    def count_member(self) -> None:
+        self.members += 1
+        if self.members > ARCHIVE_MAX_MEMBERS:
+            raise ValueError(f"archive has more than {ARCHIVE_MAX_MEMBERS} entries")
+
+    def reserve(self, name: str, size: int) -> None:
+        if size > ARCHIVE_MAX_MEMBER_BYTES:
+            raise ValueError(f"{name}: {size} bytes uncompressed exceeds limit of {ARCHIVE_MAX_MEMBER_BYTES}")
+        self.total += size
+        if self.total > ARCHIVE_MAX_TOTAL_BYTES:
+            raise ValueError(f"reports exceed {ARCHIVE_MAX_TOTAL_BYTES} bytes uncompressed in total")
+
+
+def _iter_archive_members(fileobj: BinaryIO) -> Iterator[Tuple[str, bytes]]:
+    budget = _ArchiveBudget()
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        with zipfile.ZipFile(fileobj) as zf:
+            infos = zf.infolist()
+            if len(infos) > ARCHIVE_MAX_MEMBERS:
+                raise ValueError(f"archive has more than {ARCHIVE_MAX_MEMBERS} entries")
+            for info in infos:
+                if info.is_dir() or not _is_report_name(info.filename):
+                    continue
+                # ZipExtFile tidak membaca melebihi file_size dari header
+                budget.reserve(info.filename, info.file_size)
+                yield info.filename, zf.read(info)
+        return
+
+    fileobj.seek(0)
+    try:
+        tf = tarfile.open(fileobj=fileobj, mode="r:*")
+    except tarfile.TarError as exc:
+        raise ValueError("Archive must be .zip or .tar/.tar.gz") from exc
+
+    with tf:
+        for member in tf:
+            budget.count_member()
+            if not member.isfile() or not _is_report_name(member.name):
+                continue
+            budget.reserve(member.name, member.size)
+            yield member.name, tf.extractfile(member).read()
+
+
+def _is_report_name(name: str) -> bool:
+    base = name.rsplit("/", 1)[-1]
+    return (
+        base.lower().endswith(".xml")
+        and not base.startswith(".")
+        and not name.startswith("__MACOSX/")
+    )
+
+
+def _csv_float(value: Optional[str]) -> Optional[float]:
+    if value is None or value.strip() in ("", "N/A"):
+        return None
+    return float(value)
+
+
+def parse_locust_stats_csv(fileobj: BinaryIO) -> List[dict]:
+    """
+    Parse `<prefix>_stats.csv` dari Locust (--csv).
+
+    Return list per baris: {
+        "name": str, "aggregated": bool,
+        "count": int, "failures": int,
+        "min": Optional[float], "max": Optional[float], "rps": Optional[float],
+        "percentiles": {50.0: ms, 66.0: ms, ..., 100.0: ms},
+    }
+    """
+    reader = csv.DictReader(io.TextIOWrapper(fileobj, encoding="utf-8-sig"))
+    rows = []
+    for row in reader:
+        percentiles: Dict[float, float] = {}
+        for column, value in row.items():
+            if column and column.endswith("%"):
+                parsed = _csv_float(value)
+                if parsed is not None:
+                    percentiles[float(column[:-1])] = parsed
+
+        rows.append(
+            {
+                "name": row.get("Name") or "",
+                "aggregated": (row.get("Name") or "") == "Aggregated",
+                "count": int(_csv_float(row.get("Request Count")) or 0),
+                "failures": int(_csv_float(row.get("Failure Count")) or 0),
+                "min": _csv_float(row.get("Min Response Time")),
+                "max": _csv_float(row.get("Max Response Time")),
+                "rps": _csv_float(row.get("Requests/s")),
+                "percentiles": percentiles,
+            }
+        )
+    return rows
+
+
+def parse_locust_history_csv(
+    fileobj: BinaryIO,
+    metrics: Dict[str, str],
+) -> Dict[str, Tuple[List[int], List[float]]]:
+    """
+    Parse `<prefix>_stats_history.csv` dari Locust, ambil baris "Aggregated".
+
+    `metrics` = {nama_metric: nama_kolom_csv}. Return
+    {nama_metric: (timestamps, values)}; nilai "N/A"/kosong dilewati per metric.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(fileobj, encoding="utf-8-sig"))
+    series: Dict[str, Tuple[List[int], List[float]]] = {name: ([], []) for name in metrics}
+
+    for row in reader:
+        if row.get("Name") != "Aggregated":
+            continue
+        ts = int(float(row["Timestamp"]))
+        for name, column in metrics.items():
+            value = _csv_float(row.get(column))
+            if value is not None:
+                series[name][0].append(ts)
+                series[name][1].append(value)
+
+    return {name: points for name, points in series.items() if points[0]}
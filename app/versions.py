@@ -0,0 +1,191 @@
+"""
+Version counter per entity untuk conditional GET (ETag / Last-Modified).
+
+Setiap write path menaikkan version entity yang datanya berubah (bump),
+dalam transaksi yang sama. Read endpoint yang sering di-poll dashboard
+memasang dependency `conditional(...)`: version dibaca (dari cache in-process
+berumur pendek, di-invalidate setelah commit write lokal), dan kalau cocok
+dengan If-None-Match / If-Modified-Since langsung dijawab 304 sebelum query
+data maupun serialisasi Pydantic.
+
+Scope:
+- project: test run, load run, dan summary project
+- test_run: run case satu test run
+- catalog: test case project (ter-embed di list run case)
+"""
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Awaitable, Callable, Iterable, List, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import models
+from .bulk import IN_CLAUSE_CHUNK, chunked, dialect_insert
+from .cache import TTLCache, invalidate_on_commit
+from .database import get_async_db
+
+SCOPE_PROJECT = "project"
+SCOPE_TEST_RUN = "test_run"
+SCOPE_CATALOG = "catalog"
+
+# Write dari worker lain tidak meng-invalidate cache proses ini; TTL ini
+# adalah batas basi maksimal untuk deployment multi-worker.
+VERSION_CACHE_TTL = float(os.getenv("VERSION_CACHE_TTL", "2"))
+_versions = TTLCache(maxsize=int(os.getenv("VERSION_CACHE_SIZE", "10000")), ttl=VERSION_CACHE_TTL)
+
+# test run tidak pernah pindah project
+_run_projects = TTLCache(maxsize=int(os.getenv("VERSION_CACHE_SIZE", "10000")), ttl=float("inf"))
+
+Key = Tuple[str, int]
+
+
+# ==== WRITE ==== #
+
+def bump(db: Session, scope: str, ids: Iterable[int]) -> None:
+    """version += 1 untuk setiap id (upsert). Panggil sebelum commit."""
+    ids = sorted(set(ids))
+    if not ids:
+        return
+    now = datetime.utcnow()
+    V = models.EntityVersion
+    stmt = dialect_insert(db, V)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["scope", "entity_id"],
+        set_={"version": V.version + 1, "updated_at": stmt.excluded.updated_at},
+    )
+    db.execute(stmt, [{"scope": scope, "entity_id": id_, "version": 1, "updated_at": now} for id_ in ids])
+    for id_ in ids:
+        invalidate_on_commit(db, _versions, (scope, id_))
+
+
+def bump_test_runs(db: Session, run_ids: Iterable[int]) -> None:
+    """Run case / counter test run berubah: bump run-nya dan project-nya."""
+    run_ids = sorted(set(run_ids))
+    project_ids = set()
+    for batch in chunked(run_ids, IN_CLAUSE_CHUNK):
+        project_ids.update(
+            db.scalars(select(models.TestRun.project_id).where(models.TestRun.id.in_(batch)))
+        )
+    bump(db, SCOPE_TEST_RUN, run_ids)
+    bump(db, SCOPE_PROJECT, project_ids)
+
+
+def stored(db: Session, key: Key) -> int:
+    """Version di DB, dibaca di dalam transaksi write (tanpa cache)."""
+    V = models.EntityVersion
+    return db.scalar(select(V.version).where(V.scope == key[0], V.entity_id == key[1])) or 0
+
+
+# ==== READ ==== #
+
+async def current(db: AsyncSession, key: Key) -> Tuple[int, Optional[datetime]]:
+    """(version, updated_at); entity yang belum pernah di-bump = (0, None)."""
+    cached = _versions.get(key)
+    if cached is None:
+        V = models.EntityVersion
+        row = (await db.execute(
+            select(V.version, V.updated_at).where(V.scope == key[0], V.entity_id == key[1])
+        )).first()
+        cached = (row[0], row[1]) if row else (0, None)
+        _versions.set(key, cached)
+    return cached
+
+
+async def run_project(db: AsyncSession, run_id: int) -> Optional[int]:
+    project_id = _run_projects.get(run_id)
+    if project_id is None:
+        project_id = await db.scalar(select(models.TestRun.project_id).where(models.TestRun.id == run_id))
+        if project_id is not None:
+            _run_projects.set(run_id, project_id)
+    return project_id
+
+
+def _etag(request: Request, stamps: List[Tuple[Key, int]]) -> str:
+    # query string (cursor/limit) dan Accept ikut, karena isi response-nya berbeda
+    raw = "|".join(f"{scope}:{id_}:{version}" for (scope, id_), version in stamps)
+    raw += f"|{request.url.query}|{request.headers.get('accept', '')}"
+    return f'W/"{hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()}"'
+
+
+def _settled(last_modified: Optional[datetime]) -> bool:
+    return last_modified is not None and last_modified < datetime.utcnow().replace(microsecond=0)
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match didahulukan; If-Modified-Since diabaikan (RFC 9110)
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in tags)
+
+    # Last-Modified hanya presisi detik: perubahan di detik yang sedang berjalan
+    # bisa disusul perubahan lain dengan Last-Modified yang sama, jadi tanggal
+    # itu baru dipercaya setelah detiknya lewat (ETag tetap berlaku).
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and _settled(last_modified):
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= since
+    return False
+
+
+def conditional(resolve: Callable[[Request, AsyncSession], Awaitable[List[Key]]]):
+    """
+    Dependency factory. `resolve(request, db)` mengembalikan key version yang
+    menentukan isi response (kosong = tidak conditional). Pasang SETELAH
+    require_api_key supaya 304 tidak melewati autentikasi.
+    """
+
+    async def dependency(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+        keys = await resolve(request, db)
+        if not keys:
+            return
+        stamps = []
+        last_modified = None
+        for key in keys:
+            version, updated_at = await current(db, key)
+            stamps.append((key, version))
+            if updated_at is not None and (last_modified is None or updated_at > last_modified):
+                last_modified = updated_at
+
+        headers = {"ETag": _etag(request, stamps), "Cache-Control": "no-cache"}
+        if _settled(last_modified):
+            headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+
+        if _not_modified(request, headers["ETag"], last_modified):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return dependency
+
+
+# ==== RESOLVER ==== #
+
+def _int_param(request: Request, name: str) -> Optional[int]:
+    value = request.path_params.get(name, request.query_params.get(name))
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+async def project_keys(request: Request, db: AsyncSession) -> List[Key]:
+    project_id = _int_param(request, "project_id")
+    return [(SCOPE_PROJECT, project_id)] if project_id is not None else []
+
+
+async def run_case_keys(request: Request, db: AsyncSession) -> List[Key]:
+    run_id = _int_param(request, "run_id")
+    project_id = await run_project(db, run_id) if run_id is not None else None
+    if project_id is None:
+        return []  # run tidak ada: biarkan route menjawab 404
+    return [(SCOPE_TEST_RUN, run_id), (SCOPE_CATALOG, project_id)]
@@ -0,0 +1,348 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import models
+from app.bulk import bulk_insert
+from app.database import Base
+from app.messages import compress_message, message_id
+from app.utils import test_identity_id
+
+
+def _temp_engine():
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def _seed_run(db):
+    project = models.Project(name="bench")
+    db.add(project)
+    db.flush()
+    run = models.TestRun(project_id=project.id, name="bench-run", status="unknown")
+    db.add(run)
+    db.commit()
+    return run.id
+
+
+def _result_rows(run_id, n):
+    for i in range(n):
+        yield {
+            "test_run_id": run_id,
+            "identity_id": test_identity_id(f"pkg.mod{i % 50}", f"test_{i}"),
+            "status": "failed" if i % 7 == 0 else "passed",
+            "duration": (i % 90) / 10.0,
+            "message_id": message_id("AssertionError") if i % 7 == 0 else None,
+        }
+
+
+def bench_bulk(rows, batch_size):
+    """
+    Bandingkan ORM add_all (unit-of-work) vs app.bulk.bulk_insert untuk
+    TestCaseResult.
+    """
+    for label in ("orm", "bulk"):
+        engine = _temp_engine()
+        with Session(engine) as db:
+            run_id = _seed_run(db)
+            start = time.perf_counter()
+            if label == "orm":
+                db.add_all(models.TestCaseResult(**row) for row in _result_rows(run_id, rows))
+            else:
+                bulk_insert(db, models.TestCaseResult, _result_rows(run_id, rows), batch_size=batch_size)
+            db.commit()
+            elapsed = time.perf_counter() - start
+        engine.dispose()
+        print(f"{label:>5}: {rows} rows in {elapsed:.3f}s -> {rows / elapsed:,.0f} rows/s")
+
+
+def bench_reads(requests, concurrency, latency_ms):
+    """
+    Throughput GET /test-runs/{id} versi async (AsyncSession) vs versi sync
+    (Session di threadpool) dengan request konkuren.
+
+    SQLite lokal hampir tidak punya latency I/O, jadi round-trip DB jaringan
+    disimulasikan dengan `latency_ms` per request sambil memegang koneksi
+    (time.sleep di versi sync, asyncio.sleep di versi async). Pool kedua
+    engine dibuat sebesar `concurrency`, jadi yang dibandingkan hanya
+    threadpool (sync) vs event loop (async).
+    """
+    import httpx
+    from fastapi import FastAPI
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app import schemas
+    from app.database import get_async_db
+    from app.dependencies import require_api_key
+    from app.routers import test_runs
+
+    seed_engine = _temp_engine()
+    with Session(seed_engine) as db:
+        run_id = _seed_run(db)
+    seed_engine.dispose()
+
+    pool = {"pool_size": concurrency, "max_overflow": 0}
+    engine = create_engine(seed_engine.url, connect_args={"check_same_thread": False}, **pool)
+    sync_sessions = sessionmaker(bind=engine)
+    async_engine = create_async_engine(seed_engine.url.set(drivername="sqlite+aiosqlite"), **pool)
+    async_sessions = async_sessionmaker(async_engine, expire_on_commit=False)
+    delay = latency_ms / 1000.0
+
+    async def get_bench_async_db():
+        async with async_sessions() as db:
+            await db.connection()
+            await asyncio.sleep(delay)
+            yield db
+
+    app = FastAPI()
+    app.include_router(test_runs.router)
+    app.dependency_overrides[get_async_db] = get_bench_async_db
+    app.dependency_overrides[require_api_key] = lambda: None
+
+    @app.get("/sync/test-runs/{run_id}", response_model=schemas.TestRunBase)
+    def get_test_run_sync(run_id: int):
+        with sync_sessions() as db:
+            db.connection()
+            time.sleep(delay)
+            return db.get(models.TestRun, run_id)
+
+    async def run(path):
+        transport = httpx.ASGITransport(app=app)
+        limit = asyncio.Semaphore(concurrency)
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def one():
+                async with limit:
+                    resp = await client.get(path)
+                    resp.raise_for_status()
+
+            start = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(requests)))
+            return time.perf_counter() - start
+
+    for label, path in (("sync", f"/sync/test-runs/{run_id}"), ("async", f"/test-runs/{run_id}")):
+        elapsed = asyncio.run(run(path))
+        print(f"{label:>5}: {requests} requests (concurrency {concurrency}, "
+              f"{latency_ms}ms db latency) in {elapsed:.3f}s -> {requests / elapsed:,.0f} req/s")
+
+    asyncio.run(async_engine.dispose())
+    engine.dispose()
+
+
+def bench_flaky(tests, runs):
+    """
+    record_outcomes untuk `runs` run berturut-turut masing-masing `tests`
+    test (scoring numpy + upsert state), dan ranking-nya.
+    """
+    import random
+
+    from sqlalchemy import select
+
+    from app import flakiness
+
+    engine = _temp_engine()
+    rnd = random.Random(0)
+    with Session(engine) as db:
+        project = models.Project(name="bench")
+        db.add(project)
+        db.commit()
+        for run_id in range(1, runs + 1):
+            outcomes = {i: rnd.random() < 0.05 for i in range(tests)}
+            start = time.perf_counter()
+            flakiness.record_outcomes(db, project.id, "main", run_id, outcomes)
+            db.commit()
+            print(f"run {run_id}: {tests} tests scored + stored in {time.perf_counter() - start:.3f}s")
+
+        Flaky = models.TestFlakiness
+        start = time.perf_counter()
+        db.execute(
+            select(Flaky).where(Flaky.project_id == project.id, Flaky.branch == "main")
+            .order_by(Flaky.score.desc()).limit(50)
+        ).all()
+        print(f"rank top 50: {(time.perf_counter() - start) * 1000:.1f}ms")
+    engine.dispose()
+
+
+def bench_durations(tests, runs):
+    """
+    fetch_durations + analyze untuk `runs` run x `tests` test (tests x runs
+    result), lewat async session seperti endpoint durations.
+    """
+    from datetime import datetime, timedelta
+
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    from app import durations
+    from app.database import to_async_url
+
+    engine = _temp_engine()
+    with Session(engine) as db:
+        project = models.Project(name="bench")
+        db.add(project)
+        db.commit()
+        for r in range(runs):
+            run = models.TestRun(project_id=project.id, name=f"run-{r}", status="unknown")
+            db.add(run)
+            db.flush()
+            rows = [
+                {"test_run_id": run.id, "identity_id": i + 1, "status": "passed", "duration": (i % 90) / 10.0 + r * 0.01}
+                for i in range(tests)
+            ]
+            bulk_insert(db, models.TestCaseResult, rows)
+            durations.record_run_durations(
+                db, run.id, [row["identity_id"] for row in rows], [row["duration"] for row in rows],
+            )
+        db.commit()
+        project_id = project.id
+
+    async def main():
+        async_engine = create_async_engine(to_async_url(str(engine.url)))
+        async with AsyncSession(async_engine) as db:
+            since = datetime.utcnow() - timedelta(days=1)
+            start = time.perf_counter()
+            data = await durations.fetch_durations(db, project_id, since)
+            fetched = time.perf_counter()
+            stats = durations.analyze(data)
+            done = time.perf_counter()
+        await async_engine.dispose()
+        print(f"{stats.n_results} results / {len(stats.identity_id)} tests: "
+              f"fetch {fetched - start:.3f}s, analyze {done - fetched:.3f}s")
+
+    asyncio.run(main())
+    engine.dispose()
+
+
+def bench_serialize(rows, requests):
+    """
+    GET run dengan `rows` result / run case: jalur lama (object ORM +
+    validasi response_model) vs fast path fastjson (tuple Core + orjson),
+    untuk /test-runs/{id}/detail dan /test-runs/{id}/cases.
+    """
+    import json
+    from typing import List
+
+    import httpx
+    from fastapi import FastAPI
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import joinedload, selectinload
+
+    from app import schemas
+    from app.database import get_async_db, to_async_url
+    from app.dependencies import require_api_key
+    from app.routers import test_runs
+
+    engine = _temp_engine()
+    with Session(engine) as db:
+        run_id = _seed_run(db)
+        project_id = db.get(models.TestRun, run_id).project_id
+        bulk_insert(db, models.TestIdentity, (
+            {"id": test_identity_id(f"pkg.mod{i % 50}", f"test_{i}"), "classname": f"pkg.mod{i % 50}", "name": f"test_{i}"}
+            for i in range(rows)
+        ))
+        bulk_insert(db, models.FailureMessage, [
+            {"id": message_id("AssertionError"), "body": compress_message("AssertionError"), "size": 14}
+        ])
+        bulk_insert(db, models.TestCaseResult, _result_rows(run_id, rows))
+        bulk_insert(db, models.TestCase, (
+            {"project_id": project_id, "title": f"case {i}", "steps": "open page; click; check", "priority": "medium"}
+            for i in range(rows)
+        ))
+        bulk_insert(db, models.TestRunCase, (
+            {"test_run_id": run_id, "test_case_id": i + 1, "status": "passed" if i % 3 else "failed"}
+            for i in range(rows)
+        ))
+        db.commit()
+
+    async_engine = create_async_engine(to_async_url(str(engine.url)))
+    async_sessions = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def get_bench_async_db():
+        async with async_sessions() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(test_runs.router)
+    app.dependency_overrides[get_async_db] = get_bench_async_db
+    app.dependency_overrides[require_api_key] = lambda: None
+
+    @app.get("/orm/test-runs/{run_id}/detail", response_model=schemas.TestRunDetail)
+    async def detail_orm(run_id: int):
+        async with async_sessions() as db:
+            return await db.scalar(
+                select(models.TestRun).options(selectinload(models.TestRun.cases)).where(models.TestRun.id == run_id)
+            )
+
+    @app.get("/orm/test-runs/{run_id}/cases", response_model=List[schemas.TestRunCaseWithTestCase])
+    async def cases_orm(run_id: int):
+        async with async_sessions() as db:
+            return (await db.scalars(
+                select(models.TestRunCase).options(joinedload(models.TestRunCase.test_case))
+                .where(models.TestRunCase.test_run_id == run_id).order_by(models.TestRunCase.id)
+            )).all()
+
+    async def run(path):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            (await client.get(path)).raise_for_status()  # warm up (cache message, koneksi)
+            start = time.perf_counter()
+            for _ in range(requests):
+                resp = await client.get(path)
+                resp.raise_for_status()
+            return (time.perf_counter() - start) / requests, resp.content
+
+    for endpoint in ("detail", "cases"):
+        orm_time, orm_body = asyncio.run(run(f"/orm/test-runs/{run_id}/{endpoint}"))
+        fast_time, fast_body = asyncio.run(run(f"/test-runs/{run_id}/{endpoint}"))
+        same = json.loads(orm_body) == json.loads(fast_body)
+        print(f"{endpoint:>7}: {rows} rows, orm {orm_time * 1000:.0f}ms -> {rows / orm_time:,.0f} rows/s, "
+              f"fast {fast_time * 1000:.0f}ms -> {rows / fast_time:,.0f} rows/s "
+              f"({orm_time / fast_time:.1f}x, same JSON: {same})")
+
+    asyncio.run(async_engine.dispose())
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_bulk = sub.add_parser("bulk", help="TestCaseResult insert throughput")
+    p_bulk.add_argument("--rows", type=int, default=100_000)
+    p_bulk.add_argument("--batch-size", type=int, default=5000)
+
+    p_reads = sub.add_parser("reads", help="concurrent GET throughput, sync vs async session")
+    p_reads.add_argument("--requests", type=int, default=2000)
+    p_reads.add_argument("--concurrency", type=int, default=200)
+    p_reads.add_argument("--latency-ms", type=float, default=100.0)
+
+    p_flaky = sub.add_parser("flaky", help="incremental flakiness scoring per ingest")
+    p_flaky.add_argument("--tests", type=int, default=50_000)
+    p_flaky.add_argument("--runs", type=int, default=5)
+
+    p_durations = sub.add_parser("durations", help="per-test duration analytics (fetch + numpy)")
+    p_durations.add_argument("--tests", type=int, default=10_000)
+    p_durations.add_argument("--runs", type=int, default=100)
+
+    p_serialize = sub.add_parser("serialize", help="large run responses, ORM + response_model vs orjson fast path")
+    p_serialize.add_argument("--rows", type=int, default=50_000)
+    p_serialize.add_argument("--requests", type=int, default=5)
+
+    args = parser.parse_args()
+    if args.command == "bulk":
+        bench_bulk(args.rows, args.batch_size)
+    elif args.command == "reads":
+        bench_reads(args.requests, args.concurrency, args.latency_ms)
+    elif args.command == "flaky":
+        bench_flaky(args.tests, args.runs)
+    elif args.command == "durations":
+        bench_durations(args.tests, args.runs)
+    elif args.command == "serialize":
+        bench_serialize(args.rows, args.requests)
@@ -0,0 +1,73 @@
+"""
+Upload stats history Locust ke load run, di database SQLite sementara yang
+dibuat lewat init_db. Hanya router load_runs yang dipasang; API key dan
+session DB di-override.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import get_db
+from app.dependencies import require_api_key
+from app.migrations import init_db
+from app.routers import load_runs
+
+_HEADER = "Timestamp,User Count,Type,Name,Requests/s,Failures/s,50%,95%,99%,Total Average Response Time\n"
+
+
+def _history_csv(points: int) -> str:
+    return _HEADER + "".join(f"{1700000000 + i},10,,Aggregated,{i},0,10,20,30,12\n" for i in range(points))
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.db'}")
+    init_db(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def client(session_factory):
+    app = FastAPI()
+    app.include_router(load_runs.router)
+
+    def get_test_db():
+        with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[require_api_key] = lambda: None
+    return TestClient(app)
+
+
+@pytest.fixture
+def load_run_id(session_factory):
+    with session_factory() as db:
+        project = models.Project(name="history")
+        db.add(project)
+        db.flush()
+        run = models.LoadTestRun(project_id=project.id, name="run", total_requests=1, total_failures=0)
+        db.add(run)
+        db.commit()
+        return run.id
+
+
+def test_reupload_replaces_series(client, session_factory, load_run_id):
+    first = client.post(f"/load-runs/{load_run_id}/history", files={"history_file": ("h.csv", _history_csv(5))})
+    assert first.status_code == 200
+    assert {series["points"] for series in first.json()} == {5}
+
+    second = client.post(f"/load-runs/{load_run_id}/history", files={"history_file": ("h.csv", _history_csv(8))})
+    assert second.status_code == 200
+    assert {series["points"] for series in second.json()} == {8}
+
+    Series = models.LoadTestSeries
+    with session_factory() as db:
+        stored = db.execute(
+            select(func.count(), func.min(Series.points), func.max(Series.points)).where(Series.load_run_id == load_run_id)
+        ).one()
+    assert tuple(stored) == (len(second.json()), 8, 8)
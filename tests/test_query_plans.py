@@ -0,0 +1,108 @@
+"""
+EXPLAIN QUERY PLAN untuk hot query router, di database SQLite sementara
+yang dibuat lewat init_db (schema + index persis seperti production).
+
+Plan yang ditolak:
+- SCAN tabel          full table scan
+- SCAN ... USING INDEX   full index scan (seluruh index dibaca)
+- USE TEMP B-TREE     sort / group di memory, bukan urutan index
+
+SCAN atas subquery (CO-ROUTINE) tidak dihitung: row-nya sudah berasal dari
+langkah plan lain yang dicek sendiri.
+"""
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import durations, export, models, planning, regression, rollups
+from app.migrations import init_db
+from app.pagination import encode_cursor, keyset_order
+from app.routers import analytics, evidences, load_runs, projects, test_cases, test_runs
+
+_BAD_PLAN = re.compile(r"^(SCAN |USE TEMP B-TREE)")
+_COROUTINE = re.compile(r"^CO-ROUTINE (.+)$")
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}")
+    init_db(engine)
+    yield engine
+    engine.dispose()
+
+
+def hot_queries():
+    """
+    Query router / modul baca yang sama persis (builder *_stmt yang dipakai
+    route), untuk diverifikasi dengan EXPLAIN QUERY PLAN.
+    """
+    now = datetime.utcnow()
+    cursor = encode_cursor(now - timedelta(days=1), 10)
+
+    def page(stmt, model):
+        # bentuk yang dijalankan pagination.paginate
+        return keyset_order(stmt, model, cursor).limit(101)
+
+    run = models.TestRun(id=1, project_id=1)
+    load_run = models.LoadTestRun(id=2, project_id=1, environment="staging", branch=None)
+
+    return [
+        ("list_projects", page(projects.projects_stmt(), models.Project)),
+        ("list_test_runs", page(test_runs.runs_stmt(1), models.TestRun)),
+        ("list_load_runs", page(load_runs.load_runs_stmt(1), models.LoadTestRun)),
+        ("list_test_cases", page(test_cases.cases_stmt(1), models.TestCase)),
+        ("list_test_cases.suite", page(test_cases.cases_stmt(1, suite_id=2), models.TestCase)),
+        ("test_identity.history", test_runs.history_stmt(1)),
+        ("test_identity.history.filtered", test_runs.history_stmt(1, project_id=1, branch="main", before_run_id=9)),
+        ("list_run_cases", test_runs.run_cases_stmt(1)),
+        ("test_run.detail", test_runs.run_results_stmt(1)),
+        ("export.test_run", export.result_rows_stmt(1)),
+        ("generate_run_cases.insert", lambda db: test_runs.run_cases_insert_stmt(db, run, models.TestCase.id.in_([2, 3]))),
+        ("generate_run_cases.filter", lambda db: test_runs.run_cases_insert_stmt(db, run, models.TestCase.suite_id == 2)),
+        ("evidences.by_case", page(evidences.evidences_by_case_stmt(1), models.Evidence)),
+        ("evidences.by_run", page(evidences.evidences_by_run_stmt(1), models.Evidence)),
+        ("flaky_tests", analytics.flaky_tests_stmt(1, "main", 5, 0.0, 50)),
+        ("failure_clusters", test_runs.failure_clusters_stmt(1, 50)),
+        ("failure_clusters.samples", test_runs.cluster_samples_stmt(1, [1, 2], 5)),
+        ("trends.test_runs", analytics.rollup_stmt(
+            models.TestRunRollup, rollups.TEST_SUMS, 1, "day", now.date(), now.date(), "staging", "main")),
+        ("trends.load_runs", analytics.rollup_stmt(
+            models.LoadRunRollup, rollups.LOAD_SUMS, 1, "week", now.date(), now.date())),
+        ("durations", durations.durations_stmt(1, now)),
+        ("test_plan.stats", planning.stats_stmt(1, [2, 3])),
+        ("regression.baseline", regression.baseline_stmt(load_run)),
+        ("load_run.sketches", load_runs.sketches_stmt([1, 2])),
+        ("load_run.series", load_runs.series_stmt(1, "rps")),
+    ]
+
+
+# Plan yang sengaja diterima, dengan alasannya
+ALLOWED = {
+    # evidence dari banyak run case digabung lalu diurutkan created_at: tidak
+    # ada satu index yang memberi urutan itu, dan jumlahnya per run kecil.
+    "evidences.by_run": {"USE TEMP B-TREE FOR ORDER BY"},
+    # window function per cluster atas failure satu run (sudah lewat index
+    # run): partisi dan hasilnya diurutkan di memory, ukurannya <= failure run.
+    "failure_clusters.samples": {"USE TEMP B-TREE FOR ORDER BY"},
+}
+
+
+@pytest.mark.parametrize("name,stmt", hot_queries(), ids=[name for name, _ in hot_queries()])
+def test_hot_query_uses_index(engine, name, stmt):
+    with Session(engine) as db:
+        if callable(stmt):  # insert butuh session untuk memilih dialect
+            stmt = stmt(db)
+        conn = db.connection()
+        compiled = stmt.compile(bind=conn, compile_kwargs={"render_postcompile": True})
+        params = compiled.construct_params()
+        args = tuple(params[key] for key in compiled.positiontup)
+        plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", args)]
+    subqueries = {f"SCAN {m.group(1)}" for detail in plan if (m := _COROUTINE.match(detail))}
+    bad = [
+        detail for detail in plan
+        if _BAD_PLAN.match(detail) and detail not in subqueries and detail not in ALLOWED.get(name, ())
+    ]
+    assert not bad, f"{name}: {' | '.join(plan)}"
@@ -0,0 +1,55 @@
+"""
+Full-text search test case (app.search) di database SQLite sementara yang
+dibuat lewat init_db.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from app import models, search
+from app.migrations import init_db
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "search.db"
+    engine = create_engine(f"sqlite:///{path}")
+    init_db(engine)
+    with Session(engine) as db:
+        project = models.Project(name="search")
+        db.add(project)
+        db.flush()
+        case = models.TestCase(
+            project_id=project.id,
+            title="login <script>alert(1)</script> form",
+            steps='open <img src=x onerror="alert(2)"> login page',
+        )
+        db.add(case)
+        db.flush()
+        search.index_case(db, case)
+        db.commit()
+    engine.dispose()
+    return path
+
+
+def _search(path, q):
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        try:
+            async with AsyncSession(engine) as db:
+                return await search.search_cases(db, 1, q, None, 10, 0)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+
+def test_snippet_escapes_stored_html(db_path):
+    [(case, snippet, score)] = _search(db_path, "login")
+    assert "<script>" not in snippet and "<img" not in snippet
+    assert "&lt;script&gt;" in snippet
+    assert "<mark>login</mark>" in snippet
+    assert score > 0
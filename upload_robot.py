@@ -1,8 +1,18 @@
 import argparse
 import requests
 
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz")
+
+
 def upload(api_url, api_key, project_id, xml_file):
-    files = {"junit_file": open(xml_file, "rb")}
+    # .zip / .tar.gz berisi banyak report (satu per shard) -> satu TestRun
+    if xml_file.lower().endswith(ARCHIVE_SUFFIXES):
+        endpoint = "/test-runs/robot/archive"
+        files = {"archive": open(xml_file, "rb")}
+    else:
+        endpoint = "/test-runs/robot"
+        files = {"junit_file": open(xml_file, "rb")}
+
     data = {
         "project_id": project_id,
         "name": "robot-ci",
@@ -11,7 +21,7 @@ def upload(api_url, api_key, project_id, xml_file):
     }
 
     resp = requests.post(
-        f"{api_url}/test-runs/robot",
+        f"{api_url}{endpoint}",
         headers={"X-API-KEY": api_key},
         data=data,
         files=files